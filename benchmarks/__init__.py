@@ -0,0 +1 @@
+"""Performance benchmarks for foxess_modbus. See the individual modules for how to run them"""
@@ -0,0 +1,36 @@
+"""Helpers shared by the benchmarks"""
+import json
+import math
+from pathlib import Path
+
+# Changes larger than this (as a fraction) are flagged when comparing against a baseline
+REGRESSION_THRESHOLD = 0.2
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+def load_baseline(path: Path) -> dict[str, dict[str, float]]:
+    """Load {scenario name: {metric: value}} from the given baseline file, if it exists"""
+    return json.loads(path.read_text()) if path.exists() else {}  # type: ignore[no-any-return]
+
+
+def save_baseline(path: Path, results: dict[str, dict[str, float]]) -> None:
+    """Save {scenario name: {metric: value}} to the given baseline file"""
+    rounded = {name: {k: round(v, 3) for k, v in metrics.items()} for name, metrics in sorted(results.items())}
+    path.write_text(json.dumps(rounded, indent=2) + "\n")
+    print(f"Wrote {path}")
+
+
+def format_change(value: float, baseline: float | None, higher_is_better: bool) -> str:
+    """Format the change from the baseline value (if any) as e.g. " (+5%)", flagging regressions with a "!\" """
+    if baseline is None or baseline == 0:
+        return ""
+    change = (value - baseline) / baseline
+    flag = ""
+    if (change < -REGRESSION_THRESHOLD) if higher_is_better else (change > REGRESSION_THRESHOLD):
+        flag = " !"
+    return f" ({change:+.0%}{flag})"
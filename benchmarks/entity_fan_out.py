@@ -0,0 +1,383 @@
+"""
+Benchmarks the fan-out of a register update to the entities: the controller notifying each entity whose addresses
+changed, the entity decoding its new value and writing its state, and then the ModbusLambdaSensors derived from those
+entities doing the same.
+
+Run from the repository root:
+
+    python -m benchmarks.entity_fan_out                     # Run all scenarios, and compare against the baseline
+    python -m benchmarks.entity_fan_out h1                  # Only run scenarios whose names contain all of these
+    python -m benchmarks.entity_fan_out --profile h1-aux    # Also print the functions which took the most time
+    python -m benchmarks.entity_fan_out --update-baseline   # Run, and save the results as the new baseline
+
+This creates the full set of entities for each model and connection type, backed by a fake controller and a fake HA
+state machine, so there's no I/O and no event loop: each cycle is one batch of changed registers, fanned out to the
+entities synchronously. Entities write their state through HA's own Entity._async_write_ha_state, so the cost of
+formatting the state and attributes is included, but not that of HA's event bus.
+
+Every entity address is read on every cycle (the real controller reads some of them less often, see PollTier), and the
+poll stats sensors aren't included, as they aren't driven by register updates.
+"""
+import argparse
+import cProfile
+import gc
+import logging
+import pstats
+import random
+import statistics
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+from typing import Callable
+
+from homeassistant.components.binary_sensor import BinarySensorEntity
+from homeassistant.components.number import NumberEntity
+from homeassistant.components.select import SelectEntity
+from homeassistant.components.sensor import SensorEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import Context
+from homeassistant.core import State
+from homeassistant.helpers.entity import Entity
+from homeassistant.util.unit_system import METRIC_SYSTEM
+
+from benchmarks.common import format_change
+from benchmarks.common import load_baseline
+from benchmarks.common import save_baseline
+from custom_components.foxess_modbus.common.entity_controller import EntityController
+from custom_components.foxess_modbus.common.entity_controller import ModbusControllerEntity
+from custom_components.foxess_modbus.common.poll_stats import PollStats
+from custom_components.foxess_modbus.const import AUX
+from custom_components.foxess_modbus.const import DOMAIN
+from custom_components.foxess_modbus.const import ENTITY_ID_PREFIX
+from custom_components.foxess_modbus.const import FRIENDLY_NAME
+from custom_components.foxess_modbus.const import H1
+from custom_components.foxess_modbus.const import INVERTER_BASE
+from custom_components.foxess_modbus.const import INVERTER_CONN
+from custom_components.foxess_modbus.const import INVERTER_MODEL
+from custom_components.foxess_modbus.const import ROUND_SENSOR_VALUES
+from custom_components.foxess_modbus.entities.modbus_entity_mixin import ModbusEntityMixin
+from custom_components.foxess_modbus.entities.modbus_fault_sensor import ModbusFaultSensor
+from custom_components.foxess_modbus.inverter_profiles import INVERTER_PROFILES
+from custom_components.foxess_modbus.inverter_profiles import create_entities
+
+_BASELINE_PATH = Path(__file__).parent / "entity_fan_out_baseline.json"
+# Cycles run before measuring, so that every entity has a value and the rounding filters are full
+_WARMUP_CYCLES = 10
+_REPEATS = 5
+_CYCLES = 200
+_ALLOCATION_CYCLES = 50
+# Each register moves by up to this much each cycle, so that most entities see a change (as with a busy inverter)
+_NOISE = 2
+# How often each fault register has a fault in it
+_FAULT_RATE = 0.05
+_PROFILE_LINES = 25
+_ENTITY_DOMAINS: dict[type[Entity], str] = {
+    SensorEntity: "sensor",
+    BinarySensorEntity: "binary_sensor",
+    SelectEntity: "select",
+    NumberEntity: "number",
+}
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """A single benchmark configuration"""
+
+    name: str
+    model: str = H1
+    connection_type: str = AUX
+    round_sensor_values: bool = False
+
+
+SCENARIOS = [
+    Scenario(f"{model.lower()}-{connection_type.lower()}", model, connection_type)
+    for model, profile in INVERTER_PROFILES.items()
+    for connection_type in profile.connection_types
+] + [Scenario("h1-aux-rounded", round_sensor_values=True)]
+
+
+class _FakeController(EntityController):
+    """
+    Holds register values and notifies entities of changes to them, in the same way as ModbusController, but without
+    reading anything
+    """
+
+    def __init__(self) -> None:
+        self._registers: dict[int, int] = {}
+        self._address_listeners: dict[int, list[ModbusControllerEntity]] = {}
+        self._address_read_listeners: dict[int, list[ModbusControllerEntity]] = {}
+        self._derived_listeners: list[ModbusControllerEntity] = []
+        self._poll_stats = PollStats()
+        self.num_notifications = 0
+
+    @property
+    def is_connected(self) -> bool:
+        return True
+
+    @property
+    def is_showing_restored_data(self) -> bool:
+        return False
+
+    @property
+    def poll_stats(self) -> PollStats:
+        return self._poll_stats
+
+    def register_modbus_entity(self, listener: ModbusControllerEntity) -> None:
+        # Entities are registered in the order they're created, which puts derived entities after their sources
+        if listener.sources:
+            self._derived_listeners.append(listener)
+        for address in listener.addresses:
+            self._address_listeners.setdefault(address, []).append(listener)
+            if listener.wants_unchanged_updates:
+                self._address_read_listeners.setdefault(address, []).append(listener)
+
+    def remove_modbus_entity(self, listener: ModbusControllerEntity) -> None:
+        for listeners in [
+            *self._address_listeners.values(),
+            *self._address_read_listeners.values(),
+            self._derived_listeners,
+        ]:
+            if listener in listeners:
+                listeners.remove(listener)
+
+    async def write_register(self, address: int, value: int) -> None:
+        raise NotImplementedError()
+
+    def read(self, address: int) -> int | None:
+        return self._registers.get(address)
+
+    def update(self, values: dict[int, int]) -> None:
+        """Store the given register values, as if they'd all just been read, and notify the entities which use them"""
+        changed_addresses = set()
+        for address, value in values.items():
+            if self._registers.get(address) != value:
+                self._registers[address] = value
+                changed_addresses.add(address)
+
+        # Mirrors ModbusController._notify_update
+        listeners: set[ModbusControllerEntity] = set()
+        for address in changed_addresses:
+            listeners.update(self._address_listeners.get(address, ()))
+        for address in values:
+            listeners.update(self._address_read_listeners.get(address, ()))
+
+        for listener in listeners:
+            listener.update_callback(changed_addresses)
+
+        for listener in self._derived_listeners:
+            if any(source in listeners for source in listener.sources):
+                listener.update_callback(changed_addresses)
+                listeners.add(listener)
+
+        self.num_notifications += len(listeners)
+
+
+class _FakeStateMachine:
+    """The parts of HA's StateMachine which entities use"""
+
+    def __init__(self) -> None:
+        self._states: dict[str, State] = {}
+
+    def get(self, entity_id: str) -> State | None:
+        return self._states.get(entity_id.lower())
+
+    def async_set(
+        self,
+        entity_id: str,
+        new_state: str,
+        attributes: dict[str, Any] | None = None,
+        force_update: bool = False,
+        context: Context | None = None,
+    ) -> None:
+        # Like StateMachine.async_set, this only creates a new State if something changed
+        entity_id = entity_id.lower()
+        old_state = self._states.get(entity_id)
+        same_state = old_state is not None and old_state.state == new_state and not force_update
+        if same_state and old_state is not None and old_state.attributes == (attributes or {}):
+            return
+
+        state = State(
+            entity_id,
+            new_state,
+            attributes,
+            last_changed=old_state.last_changed if same_state and old_state is not None else None,
+            context=context,
+        )
+        self._states[entity_id] = state
+
+
+class _Inverter:
+    """The entities of a single inverter, wired up to a fake controller and state machine"""
+
+    def __init__(self, scenario: Scenario) -> None:
+        self.controller = _FakeController()
+        self.states = _FakeStateMachine()
+        hass = SimpleNamespace(config=SimpleNamespace(units=METRIC_SYSTEM), states=self.states, data={})
+        self.state_writes: Counter[str] = Counter()
+
+        inverter_config = {
+            INVERTER_BASE: scenario.model,
+            INVERTER_CONN: scenario.connection_type,
+            INVERTER_MODEL: scenario.model,
+            ENTITY_ID_PREFIX: "",
+            FRIENDLY_NAME: "",
+            ROUND_SENSOR_VALUES: scenario.round_sensor_values,
+        }
+        entry = ConfigEntry(version=1, domain=DOMAIN, title="Benchmark", data={}, source="user")
+        self.entities: list[Entity] = []
+        for entity_type, domain in _ENTITY_DOMAINS.items():
+            for entity in create_entities(entity_type, self.controller, entry, inverter_config):
+                assert isinstance(entity, ModbusEntityMixin)
+                if not entity.addresses and not entity.sources:
+                    continue
+                self.controller.register_modbus_entity(entity)
+                # Otherwise HA's entity platform would pick this
+                if entity.entity_id is None:
+                    entity.entity_id = f"{domain}.{entity._get_unique_id()}"  # noqa: SLF001
+                entity.hass = hass  # type: ignore[assignment]
+                entity.schedule_update_ha_state = self._write_state_callback(entity)  # type: ignore[method-assign]
+                self.entities.append(entity)
+
+    def _write_state_callback(self, entity: Entity) -> Callable[..., None]:
+        # Entity.schedule_update_ha_state queues a job on the event loop to do this
+        name = type(entity).__name__
+
+        def write_state(*_args: Any) -> None:
+            self.state_writes[name] += 1
+            entity._async_write_ha_state()  # noqa: SLF001
+
+        return write_state
+
+
+def _create_register_values(entities: list[Entity], count: int) -> list[dict[int, int]]:
+    """
+    Create the register values to use for each cycle. Most registers are a random walk from some plausible starting
+    value, but fault registers are usually 0, with the occasional fault
+    """
+    rng = random.Random(0)
+    addresses = sorted({address for x in entities if isinstance(x, ModbusEntityMixin) for address in x.addresses})
+    fault_addresses = {address for x in entities if isinstance(x, ModbusFaultSensor) for address in x.addresses}
+    current = {address: 0 if address in fault_addresses else 100 + address % 1000 for address in addresses}
+    result = []
+    for _ in range(count):
+        current = {
+            address: (
+                (1 << rng.randrange(16) if rng.random() < _FAULT_RATE else 0)
+                if address in fault_addresses
+                else (value + rng.randint(-_NOISE, _NOISE)) & 0xFFFF
+            )
+            for address, value in current.items()
+        }
+        result.append(current)
+    return result
+
+
+def _run_cycles(inverter: _Inverter, values: list[dict[int, int]]) -> None:
+    for cycle_values in values:
+        inverter.controller.update(cycle_values)
+
+
+def _measure(scenario: Scenario, profile: bool) -> tuple[dict[str, float], Counter[str], pstats.Stats | None]:
+    inverter = _Inverter(scenario)
+    # Enough for the warmup, each repeat, measuring allocations, and profiling
+    all_values = _create_register_values(
+        inverter.entities, _WARMUP_CYCLES + (_REPEATS + 1) * _CYCLES + _ALLOCATION_CYCLES
+    )
+    position = 0
+
+    def take(count: int) -> list[dict[int, int]]:
+        nonlocal position
+        position += count
+        return all_values[position - count : position]
+
+    _run_cycles(inverter, take(_WARMUP_CYCLES))
+
+    # Report the median over a few repeats, to smooth out noise from the rest of the machine
+    cpu_times = []
+    notifications_before = inverter.controller.num_notifications
+    writes_before = sum(inverter.state_writes.values())
+    state_writes_before = Counter(inverter.state_writes)
+    for _ in range(_REPEATS):
+        repeat_values = take(_CYCLES)
+        gc.collect()
+        start = time.process_time()
+        _run_cycles(inverter, repeat_values)
+        cpu_times.append(time.process_time() - start)
+    num_cycles = _REPEATS * _CYCLES
+    state_writes = inverter.state_writes - state_writes_before
+
+    metrics = {
+        "cycles_per_second": _CYCLES / statistics.median(cpu_times),
+        "cpu_us_per_cycle": statistics.median(cpu_times) / _CYCLES * 1_000_000,
+        "notifications_per_cycle": (inverter.controller.num_notifications - notifications_before) / num_cycles,
+        "state_writes_per_cycle": (sum(inverter.state_writes.values()) - writes_before) / num_cycles,
+    }
+
+    # Allocations are measured separately, as tracing them slows everything down
+    allocated = 0
+    tracemalloc.start()
+    try:
+        for cycle_values in take(_ALLOCATION_CYCLES):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            inverter.controller.update(cycle_values)
+            _, peak = tracemalloc.get_traced_memory()
+            allocated += peak - before
+    finally:
+        tracemalloc.stop()
+    metrics["peak_alloc_kib_per_cycle"] = allocated / _ALLOCATION_CYCLES / 1024
+
+    stats = None
+    if profile:
+        profiler = cProfile.Profile()
+        profiler.runcall(_run_cycles, inverter, take(_CYCLES))
+        stats = pstats.Stats(profiler)
+
+    metrics["num_entities"] = len(inverter.entities)
+    return metrics, state_writes, stats
+
+
+def main() -> None:
+    """Entry point"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("filters", nargs="*", help="Only run scenarios whose names contain all of these")
+    parser.add_argument("--profile", action="store_true", help="Print the functions which took the most time")
+    parser.add_argument("--update-baseline", action="store_true", help="Save the results as the new baseline")
+    args = parser.parse_args()
+
+    # Entities log validation failures for noisy values
+    logging.basicConfig(level=logging.ERROR)
+
+    baseline = load_baseline(_BASELINE_PATH)
+    results = dict(baseline)
+    for scenario in SCENARIOS:
+        if not all(x in scenario.name for x in args.filters):
+            continue
+
+        metrics, state_writes, stats = _measure(scenario, args.profile)
+        results[scenario.name] = metrics
+        previous = baseline.get(scenario.name, {})
+        num_cycles = _REPEATS * _CYCLES
+        writes_by_class = ", ".join(f"{name} {count / num_cycles:.1f}" for name, count in state_writes.most_common())
+        print(
+            f"{scenario.name}: {metrics['num_entities']:.0f} entities, "
+            f"CPU {metrics['cpu_us_per_cycle']:.0f}us/cycle"
+            f"{format_change(metrics['cpu_us_per_cycle'], previous.get('cpu_us_per_cycle'), False)}, "
+            f"alloc {metrics['peak_alloc_kib_per_cycle']:.1f}KiB"
+            f"{format_change(metrics['peak_alloc_kib_per_cycle'], previous.get('peak_alloc_kib_per_cycle'), False)}, "
+            f"{metrics['notifications_per_cycle']:.1f} notifications/cycle, "
+            f"{metrics['state_writes_per_cycle']:.1f} state writes/cycle ({writes_by_class})"
+        )
+        if stats is not None:
+            stats.sort_stats(pstats.SortKey.TIME).print_stats(_PROFILE_LINES)
+
+    if args.update_baseline:
+        save_baseline(_BASELINE_PATH, results)
+
+
+if __name__ == "__main__":
+    main()
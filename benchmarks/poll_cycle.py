@@ -0,0 +1,297 @@
+"""
+Benchmarks a full poll cycle (ModbusController.poll of every inverter on a client) against simulated inverters.
+
+Run from the repository root:
+
+    python -m benchmarks.poll_cycle                     # Run all scenarios, and compare against the baseline
+    python -m benchmarks.poll_cycle h1 tcp              # Only run scenarios whose names contain all of these
+    python -m benchmarks.poll_cycle --update-baseline   # Run, and save the results as the new baseline
+
+The simulator runs in a separate process, so that the CPU and allocations reported are those of the integration
+(ModbusClient, ModbusController and entity decoding) only. Absolute numbers depend on the machine: compare against a
+baseline recorded on the same machine.
+"""
+import argparse
+import asyncio
+import dataclasses
+import gc
+import importlib.util
+import logging
+import multiprocessing
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from multiprocessing.connection import Connection
+from pathlib import Path
+from typing import Any
+from typing import Callable
+
+from homeassistant.components.binary_sensor import BinarySensorEntity
+from homeassistant.components.number import NumberEntity
+from homeassistant.components.select import SelectEntity
+from homeassistant.components.sensor import SensorEntity
+from homeassistant.config_entries import ConfigEntry
+
+from benchmarks.common import format_change
+from benchmarks.common import load_baseline
+from benchmarks.common import percentile
+from benchmarks.common import save_baseline
+from custom_components.foxess_modbus.common.entity_controller import ModbusControllerEntity
+from custom_components.foxess_modbus.const import AUX
+from custom_components.foxess_modbus.const import DOMAIN
+from custom_components.foxess_modbus.const import ENTITY_ID_PREFIX
+from custom_components.foxess_modbus.const import FRIENDLY_NAME
+from custom_components.foxess_modbus.const import H1
+from custom_components.foxess_modbus.const import H3
+from custom_components.foxess_modbus.const import INVERTER_BASE
+from custom_components.foxess_modbus.const import INVERTER_CONN
+from custom_components.foxess_modbus.const import INVERTER_MODEL
+from custom_components.foxess_modbus.const import KH
+from custom_components.foxess_modbus.const import LAN
+from custom_components.foxess_modbus.const import RTU_OVER_TCP
+from custom_components.foxess_modbus.const import SERIAL
+from custom_components.foxess_modbus.const import TCP
+from custom_components.foxess_modbus.const import UDP
+from custom_components.foxess_modbus.inverter_adapters import ADAPTERS
+from custom_components.foxess_modbus.inverter_profiles import INVERTER_PROFILES
+from custom_components.foxess_modbus.inverter_profiles import create_entities
+from custom_components.foxess_modbus.modbus_client import ModbusClient
+from custom_components.foxess_modbus.modbus_controller import ModbusController
+from tests.modbus_simulator import ModbusSimulator
+from tests.modbus_simulator import SimulatedInverter
+from tests.modbus_simulator import SimulatorBehaviour
+
+_BASELINE_PATH = Path(__file__).parent / "poll_cycle_baseline.json"
+# Cycles run before measuring, to connect, read every tier, and settle the inter-frame gap
+_WARMUP_CYCLES = 3
+_REPEATS = 5
+# Number of cycles over which allocations are measured: one cycle of each tier
+_ALLOCATION_CYCLES = 30
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """A single benchmark configuration"""
+
+    name: str
+    model: str = H1
+    connection_type: str = AUX
+    protocol: str = TCP
+    num_inverters: int = 1
+    max_read: int = 20
+    # Seconds which ModbusClient waits after each request
+    inter_frame_gap: float = 0.0
+    async_transport: bool = False
+    pipeline_requests: bool = False
+    # Tiers are read at different rates, so this should be a multiple of the slowest tier's interval (30)
+    cycles: int = 150
+
+
+SCENARIOS = [
+    Scenario("h1-aux-tcp-1x-mr20"),
+    Scenario("h1-aux-tcp-5x-mr20", num_inverters=5, cycles=30),
+    Scenario("h1-aux-tcp-1x-mr8", max_read=8),
+    Scenario("h1-aux-tcp-1x-mr100", max_read=100),
+    Scenario("h1-aux-tcp-1x-mr20-gap30", inter_frame_gap=0.03, cycles=30),
+    Scenario("h1-aux-udp-1x-mr20", protocol=UDP),
+    Scenario("h1-aux-rtu-over-tcp-1x-mr20", protocol=RTU_OVER_TCP),
+    Scenario("h1-aux-serial-1x-mr20", protocol=SERIAL),
+    Scenario("h1-aux-async-tcp-1x-mr20", async_transport=True),
+    Scenario("h1-lan-pipelined-tcp-1x-mr100", connection_type=LAN, max_read=100, pipeline_requests=True),
+    Scenario("h3-aux-tcp-1x-mr20", model=H3),
+    Scenario("kh-aux-tcp-1x-mr20", model=KH),
+]
+
+
+class _ExecutorHass:
+    """The only part of HomeAssistant which ModbusClient uses: running the sync pymodbus client in an executor"""
+
+    def async_add_executor_job(self, target: Callable[..., Any], *args: Any) -> "asyncio.Future[Any]":
+        return asyncio.get_running_loop().run_in_executor(None, target, *args)
+
+
+def _create_inverters(scenario: Scenario) -> list[SimulatedInverter]:
+    inverters = []
+    for slave in range(1, scenario.num_inverters + 1):
+        inverter = SimulatedInverter(scenario.model, scenario.connection_type, slave)
+        inverter.set_registers({address: 100 + address % 1000 for address in inverter.addresses})
+        inverters.append(inverter)
+    return inverters
+
+
+def _run_simulator(scenario: Scenario, conn: Connection) -> None:
+    """Entry point of the simulator process. Sends the client config, then serves until told to stop"""
+
+    async def serve() -> None:
+        # Noise makes entities see changing values, as they would on a real inverter
+        behaviour = SimulatorBehaviour(noise=2)
+        async with ModbusSimulator(scenario.protocol, _create_inverters(scenario), behaviour) as simulator:
+            conn.send(simulator.client_config)
+            await asyncio.get_running_loop().run_in_executor(None, conn.recv)
+
+    asyncio.run(serve())
+
+
+def _create_controllers(scenario: Scenario, client: ModbusClient) -> list[ModbusController]:
+    """Create a controller for each simulated inverter, with all of its real entities registered"""
+    profile = INVERTER_PROFILES[scenario.model].connection_types[scenario.connection_type]
+    entry = ConfigEntry(version=1, domain=DOMAIN, title="Benchmark", data={}, source="user")
+    controllers = []
+    for slave in range(1, scenario.num_inverters + 1):
+        controller = ModbusController(
+            client, profile, slave, 10, None, scenario.max_read, ADAPTERS["network_other"].read_cost_model
+        )
+        inverter_config = {
+            INVERTER_BASE: scenario.model,
+            INVERTER_CONN: scenario.connection_type,
+            INVERTER_MODEL: scenario.model,
+            ENTITY_ID_PREFIX: f"inverter_{slave}",
+            FRIENDLY_NAME: f"Inverter {slave}",
+        }
+        for entity_type in [SensorEntity, BinarySensorEntity, SelectEntity, NumberEntity]:
+            for entity in create_entities(entity_type, controller, entry, inverter_config):
+                assert isinstance(entity, ModbusControllerEntity)
+                # Entities which depend on other entities rather than registers aren't driven by the controller
+                if entity.addresses:
+                    # Stop entities from trying to write their state to HA
+                    entity.schedule_update_ha_state = lambda *_args: None  # type: ignore[method-assign]
+                    controller.register_modbus_entity(entity)
+        controllers.append(controller)
+    return controllers
+
+
+async def _run_cycle(controllers: list[ModbusController]) -> None:
+    # Like PollScheduler: each inverter on the client is polled in turn
+    for controller in controllers:
+        await controller.poll()
+        if controller.poll_stats.num_failed_polls > 0:
+            raise RuntimeError(f"Poll failed: {controller.poll_stats.as_dict()}")
+
+
+async def _time_cycles(controllers: list[ModbusController], cycles: int) -> dict[str, float]:
+    gc.collect()
+    start_requests = sum(x.poll_stats.num_requests for x in controllers)
+    durations = []
+    start_cpu = time.process_time()
+    start = time.perf_counter()
+    for _ in range(cycles):
+        cycle_start = time.perf_counter()
+        await _run_cycle(controllers)
+        durations.append(time.perf_counter() - cycle_start)
+    wall_time = time.perf_counter() - start
+    cpu_time = time.process_time() - start_cpu
+    num_requests = sum(x.poll_stats.num_requests for x in controllers) - start_requests
+
+    return {
+        "cycles_per_second": cycles / wall_time,
+        "p50_cycle_ms": percentile(durations, 0.5) * 1000,
+        "p99_cycle_ms": percentile(durations, 0.99) * 1000,
+        "cpu_ms_per_cycle": cpu_time / cycles * 1000,
+        "requests_per_cycle": num_requests / cycles,
+    }
+
+
+async def _measure(scenario: Scenario, client_config: dict[str, Any]) -> dict[str, float]:
+    adapter = dataclasses.replace(ADAPTERS["network_other"], inter_frame_gap=scenario.inter_frame_gap)
+    client = ModbusClient(
+        _ExecutorHass(),  # type: ignore[arg-type]
+        scenario.protocol,
+        adapter,
+        {**client_config, "timeout": 2},
+        use_async_transport=scenario.async_transport,
+        pipeline_requests=scenario.pipeline_requests,
+    )
+    try:
+        controllers = _create_controllers(scenario, client)
+        for _ in range(_WARMUP_CYCLES):
+            await _run_cycle(controllers)
+
+        # Report the median of each metric over a few repeats, to smooth out noise from the rest of the machine
+        repeats = [await _time_cycles(controllers, scenario.cycles) for _ in range(_REPEATS)]
+        metrics = {key: statistics.median(x[key] for x in repeats) for key in repeats[0]}
+
+        # Allocations are measured separately, as tracing them slows everything down
+        allocated = 0
+        tracemalloc.start()
+        try:
+            for _ in range(_ALLOCATION_CYCLES):
+                tracemalloc.reset_peak()
+                before, _ = tracemalloc.get_traced_memory()
+                await _run_cycle(controllers)
+                _, peak = tracemalloc.get_traced_memory()
+                allocated += peak - before
+        finally:
+            tracemalloc.stop()
+        metrics["peak_alloc_kib_per_cycle"] = allocated / _ALLOCATION_CYCLES / 1024
+
+        return metrics
+    finally:
+        await client.close()
+
+
+def run_scenario(scenario: Scenario) -> dict[str, float]:
+    """Run a scenario against a simulator in a separate process, returning its metrics"""
+    context = multiprocessing.get_context("spawn")
+    parent_conn, child_conn = context.Pipe()
+    process = context.Process(target=_run_simulator, args=(scenario, child_conn), daemon=True)
+    process.start()
+    try:
+        client_config = parent_conn.recv()
+        return asyncio.run(_measure(scenario, client_config))
+    finally:
+        parent_conn.send(None)
+        process.join(timeout=5)
+
+
+def _skip_reason(scenario: Scenario) -> str | None:
+    if scenario.protocol == SERIAL:
+        if importlib.util.find_spec("serial") is None:
+            return "pyserial is not installed"
+        if sys.platform == "win32":
+            return "pseudo-terminals are not supported on Windows"
+    return None
+
+
+def main() -> None:
+    """Entry point"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("filters", nargs="*", help="Only run scenarios whose names contain all of these")
+    parser.add_argument("--update-baseline", action="store_true", help="Save the results as the new baseline")
+    args = parser.parse_args()
+
+    # Entities log validation failures for noisy simulated values, and the controller logs each poll
+    logging.basicConfig(level=logging.ERROR)
+
+    baseline = load_baseline(_BASELINE_PATH)
+    results = dict(baseline)
+    for scenario in SCENARIOS:
+        if not all(x in scenario.name for x in args.filters):
+            continue
+        skip_reason = _skip_reason(scenario)
+        if skip_reason is not None:
+            print(f"{scenario.name}: skipped ({skip_reason})")
+            continue
+
+        metrics = run_scenario(scenario)
+        results[scenario.name] = metrics
+        previous = baseline.get(scenario.name, {})
+        print(
+            f"{scenario.name}: "
+            f"{metrics['cycles_per_second']:.1f} cycles/s"
+            f"{format_change(metrics['cycles_per_second'], previous.get('cycles_per_second'), True)}, "
+            f"p50 {metrics['p50_cycle_ms']:.1f}ms, p99 {metrics['p99_cycle_ms']:.1f}ms, "
+            f"CPU {metrics['cpu_ms_per_cycle']:.2f}ms"
+            f"{format_change(metrics['cpu_ms_per_cycle'], previous.get('cpu_ms_per_cycle'), False)}, "
+            f"alloc {metrics['peak_alloc_kib_per_cycle']:.0f}KiB"
+            f"{format_change(metrics['peak_alloc_kib_per_cycle'], previous.get('peak_alloc_kib_per_cycle'), False)}, "
+            f"{metrics['requests_per_cycle']:.1f} requests/cycle"
+        )
+
+    if args.update_baseline:
+        save_baseline(_BASELINE_PATH, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,7 @@ from homeassistant.helpers.typing import UNDEFINED
 
 from .const import ADAPTER_ID
 from .const import ADAPTER_WAS_MIGRATED
+from .const import ASYNC_TRANSPORT
 from .const import CONFIG_SAVE_TIME
 from .const import DOMAIN
 from .const import ENTITY_ID_PREFIX
@@ -25,23 +26,23 @@ from .const import FRIENDLY_NAME
 from .const import HOST
 from .const import INVERTER_CONN
 from .const import INVERTERS
+from .const import MAX_POLL_RATE
 from .const import MAX_READ
 from .const import MODBUS_CLIENTS
 from .const import MODBUS_SLAVE
 from .const import MODBUS_TYPE
+from .const import PIPELINE_REQUESTS
 from .const import PLATFORMS
 from .const import POLL_RATE
+from .const import POLL_SCHEDULERS
+from .const import REGISTER_SNAPSHOT_STORE
 from .const import RTU_OVER_TCP
 from .const import SERIAL
 from .const import STARTUP_MESSAGE
 from .const import TCP
 from .const import UDP
 from .inverter_adapters import ADAPTERS
-from .inverter_profiles import inverter_connection_type_profile_from_config
-from .modbus_client import ModbusClient
-from .modbus_controller import ModbusController
-from .services import update_charge_period_service
-from .services import write_registers_service
+from .inverter_adapters import InverterAdapter
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
@@ -54,6 +55,16 @@ async def async_setup(_hass: HomeAssistant, _config: Config) -> bool:
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up this integration using UI."""
 
+    # These pull in pymodbus and all of the entity descriptions, which are slow to import. Only import them once we
+    # know that we've got an inverter to talk to, so that they don't slow down HA's startup otherwise
+    from .inverter_profiles import inverter_connection_type_profile_from_config
+    from .modbus_client import ModbusClient
+    from .modbus_controller import ModbusController
+    from .poll_scheduler import PollScheduler
+    from .register_snapshot import RegisterSnapshotStore
+    from .services import update_charge_period_service
+    from .services import write_registers_service
+
     if DOMAIN not in hass.data:
         _LOGGER.info(STARTUP_MESSAGE)
 
@@ -70,21 +81,33 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         if entry_options.get(platform, True):
             hass.async_add_job(hass.config_entries.async_forward_entry_setup(entry, platform))
 
-    def create_controller(client: ModbusClient, inverter: dict[str, Any]) -> None:
+    def create_controller(
+        client: ModbusClient, adapter: InverterAdapter, inverter_id: str, inverter: dict[str, Any]
+    ) -> None:
         controller = ModbusController(
-            hass,
             client,
             inverter_connection_type_profile_from_config(inverter),
             inverter[MODBUS_SLAVE],
             inverter[POLL_RATE],
+            # Each controller adapts its own poll rate, so this can differ between inverters sharing a client
+            inverter.get(MAX_POLL_RATE),
             inverter[MAX_READ],
+            adapter.read_cost_model,
+            adapter.retry_policy,
         )
         inverter_controllers.append((inverter, controller))
+        snapshot_inverters.append((inverter_id, inverter, controller))
+        poll_schedulers[client].add_controller(controller)
 
     inverter_controllers: list[tuple[dict[str, Any], ModbusController]] = []
+    snapshot_inverters: list[tuple[str, dict[str, Any], ModbusController]] = []
 
     # {(modbus_type, host): client}
     clients: dict[tuple[str, str], ModbusClient] = {}
+    # {client: (async transport, pipeline requests)}. These apply to the connection, not to each inverter
+    client_options: dict[ModbusClient, tuple[bool, bool]] = {}
+    # All of the inverters on a client are polled by a single scheduler
+    poll_schedulers: dict[ModbusClient, PollScheduler] = {}
     for inverter_id, inverter in entry_data[INVERTERS].items():
         # Remember that there might not be any options
         options = entry_options.get(INVERTERS, {}).get(inverter_id, {})
@@ -103,6 +126,8 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             inverter.update(options)
 
         client_key = (inverter[MODBUS_TYPE], inverter[HOST])
+        use_async_transport = inverter.get(ASYNC_TRANSPORT, False)
+        pipeline_requests = inverter.get(PIPELINE_REQUESTS, False)
         client = clients.get(client_key)
         if client is None:
             if inverter[MODBUS_TYPE] in [TCP, UDP, RTU_OVER_TCP]:
@@ -112,17 +137,40 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
                 params = {"port": inverter[HOST], "baudrate": 9600}
             else:
                 raise AssertionError()
-            client = ModbusClient(hass, inverter[MODBUS_TYPE], adapter, params)
+            client = ModbusClient(
+                hass,
+                inverter[MODBUS_TYPE],
+                adapter,
+                params,
+                use_async_transport=use_async_transport,
+                pipeline_requests=pipeline_requests,
+            )
             clients[client_key] = client
-        create_controller(client, inverter)
+            client_options[client] = (use_async_transport, pipeline_requests)
+            poll_schedulers[client] = PollScheduler(hass, client)
+        elif client_options[client] != (use_async_transport, pipeline_requests):
+            # The options flow keeps these the same for all inverters on a connection, but older configs might not
+            _LOGGER.warning(
+                "Inverters on %s have different connection options. Using the options of the first inverter", client
+            )
+        create_controller(client, adapter, inverter_id, inverter)
+
+    register_snapshot_store = RegisterSnapshotStore(hass, entry.entry_id, snapshot_inverters)
 
     write_registers_service.register(hass, inverter_controllers)
     update_charge_period_service.register(hass, inverter_controllers)
 
+    # The platforms are already being set up, so these must be in place before we next await anything
     hass.data[DOMAIN][entry.entry_id][INVERTERS] = inverter_controllers
     hass.data[DOMAIN][entry.entry_id][MODBUS_CLIENTS] = clients.values()
+    hass.data[DOMAIN][entry.entry_id][POLL_SCHEDULERS] = poll_schedulers.values()
+    hass.data[DOMAIN][entry.entry_id][REGISTER_SNAPSHOT_STORE] = register_snapshot_store
     hass.data[DOMAIN][entry.entry_id]["unload"] = entry.add_update_listener(async_reload_entry)
 
+    # Give entities the values they had before a restart, until we've managed to poll the inverters. Entities which
+    # were created before this finishes are given them when they're restored
+    await register_snapshot_store.async_restore()
+
     return True
 
 
@@ -237,9 +285,13 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     )
 
     if unloaded:
+        # Do this first, so that it saves the controllers' final values
+        hass.data[DOMAIN][entry.entry_id][REGISTER_SNAPSHOT_STORE].unload()
         controllers = hass.data[DOMAIN][entry.entry_id][INVERTERS]
         for _, controller in controllers:
             controller.unload()
+        for poll_scheduler in hass.data[DOMAIN][entry.entry_id][POLL_SCHEDULERS]:
+            poll_scheduler.unload()
         clients = hass.data[DOMAIN][entry.entry_id][MODBUS_CLIENTS]
         await asyncio.gather(*[client.close() for client in clients])
 
@@ -0,0 +1,90 @@
+"""Works out how often to poll an inverter"""
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+# Weight given to the latest poll in the moving averages
+_SMOOTHING_FACTOR = 0.2
+# We aim to leave the bus idle for some time between polls: some adapters don't cope well with back-to-back requests,
+# and this leaves space for writes
+_HEADROOM = 1.5
+# How much to slow down by after a failed poll
+_BACKOFF_FACTOR = 2.0
+# How much to speed up by after a successful poll, if we're slower than we need to be
+_SPEEDUP_FACTOR = 0.9
+# Don't speed up if more than this proportion of recent polls failed
+_MAX_FAILURE_RATE_FOR_SPEEDUP = 0.1
+
+
+class AdaptivePollRate:
+    """
+    Decides how long to leave between the start of one poll and the start of the next, somewhere between min_interval
+    and max_interval.
+
+    We keep a moving average of how long polls take, and aim to poll as often as the adapter can sustain, with some
+    headroom. Failed polls (which often mean that the adapter is overloaded) make us back off quickly, and we recover
+    gradually once polls start succeeding again.
+
+    If min_interval == max_interval, this always gives a fixed interval.
+    """
+
+    def __init__(self, min_interval: float, max_interval: float) -> None:
+        self._min_interval = min_interval
+        self._max_interval = max(min_interval, max_interval)
+        self._interval = min_interval
+        self._average_duration: float | None = None
+        self._failure_rate = 0.0
+
+    @property
+    def interval(self) -> float:
+        """The current time in seconds between the start of one poll and the start of the next"""
+        return self._interval
+
+    @property
+    def is_adaptive(self) -> bool:
+        """Whether the interval can change at all"""
+        return self._min_interval != self._max_interval
+
+    @property
+    def average_duration(self) -> float | None:
+        """Moving average of how long polls take, in seconds, or None if there haven't been any polls"""
+        return self._average_duration
+
+    @property
+    def failure_rate(self) -> float:
+        """Moving average of the proportion of polls which failed"""
+        return self._failure_rate
+
+    def record_poll(self, duration: float, succeeded: bool) -> None:
+        """Record the outcome of a poll, and update the interval"""
+        if self._average_duration is None:
+            self._average_duration = duration
+        else:
+            self._average_duration += _SMOOTHING_FACTOR * (duration - self._average_duration)
+        self._failure_rate += _SMOOTHING_FACTOR * ((0.0 if succeeded else 1.0) - self._failure_rate)
+
+        if not self.is_adaptive:
+            return
+
+        previous_interval = self._interval
+        if not succeeded:
+            interval = self._interval * _BACKOFF_FACTOR
+        else:
+            target = self._average_duration * _HEADROOM
+            if target >= self._interval:
+                # Polls are taking longer than we're allowing for them: slow down straight away
+                interval = target
+            elif self._failure_rate <= _MAX_FAILURE_RATE_FOR_SPEEDUP:
+                interval = max(target, self._interval * _SPEEDUP_FACTOR)
+            else:
+                interval = self._interval
+
+        self._interval = min(max(interval, self._min_interval), self._max_interval)
+        if self._interval != previous_interval:
+            _LOGGER.debug(
+                "Poll interval changed from %.2fs to %.2fs (average duration %.2fs, failure rate %.2f)",
+                previous_interval,
+                self._interval,
+                self._average_duration,
+                self._failure_rate,
+            )
@@ -0,0 +1,83 @@
+"""Scans an adapter for inverters, trying several slave IDs and protocols"""
+import logging
+from dataclasses import dataclass
+from typing import AsyncGenerator
+from typing import Iterable
+
+from homeassistant.core import HomeAssistant
+from pymodbus.exceptions import ConnectionException
+
+from .common.exceptions import UnsupportedInverterError
+from .const import MAX_READ
+from .inverter_adapters import InverterAdapter
+from .modbus_client import ModbusClient
+from .modbus_client import ModbusClientFailedError
+from .modbus_controller import ModbusController
+
+_LOGGER = logging.getLogger(__name__)
+
+# The slave IDs we try by default. FoxESS inverters default to 247, and people who change it tend to pick a small number
+DEFAULT_SCAN_SLAVES = [247, *range(1, 17)]
+
+# Seconds to wait for each probe. Much shorter than normal: most of the slaves we probe won't exist. This also keeps a
+# full scan short enough that a run of missing slaves doesn't trip a client's circuit breaker
+_PROBE_TIMEOUT = 0.75
+
+
+@dataclass
+class DetectedInverter:
+    """An inverter found by scan_for_inverters"""
+
+    protocol: str
+    slave: int
+    base_model: str
+    full_model: str
+
+
+async def scan_for_inverters(
+    hass: HomeAssistant,
+    adapter: InverterAdapter,
+    host: str,
+    protocols: list[str],
+    slaves: Iterable[int] = DEFAULT_SCAN_SLAVES,
+    use_async_transport: bool = False,
+) -> AsyncGenerator[DetectedInverter, None]:
+    """
+    Look for supported inverters on the given network adapter (host is "hostname:port"), probing all combinations of
+    protocol and slave ID.
+
+    Everything sits on the same RS485 bus behind the adapter, and some adapters misbehave with several requests in
+    flight, so we probe one slave at a time, using a single non-pipelined connection per protocol. Each slave is tried
+    with every protocol before moving on to the next, so put the slaves which are most likely to be used first.
+
+    Inverters are yielded as they're found: stop iterating (and close the iterator) once you've found the one you want.
+    """
+    slaves = list(slaves)
+    host_parts = host.split(":")
+    params = {"host": host_parts[0], "port": int(host_parts[1]), "timeout": _PROBE_TIMEOUT}
+    clients = {
+        protocol: ModbusClient(hass, protocol, adapter, params, use_async_transport=use_async_transport)
+        for protocol in protocols
+    }
+
+    async def probe(protocol: str, slave: int) -> DetectedInverter | None:
+        client = clients[protocol]
+        try:
+            max_read = adapter.config.inverter_config(protocol)[MAX_READ]
+            base_model, full_model = await ModbusController.read_model(client, slave, max_read)
+            return DetectedInverter(protocol, slave, base_model, full_model)
+        except UnsupportedInverterError as ex:
+            _LOGGER.warning("Scan of %s found unsupported inverter at slave %s: %s", client, slave, ex)
+        except (ConnectionException, ModbusClientFailedError) as ex:
+            _LOGGER.debug("Scan of %s found nothing at slave %s: %s", client, slave, ex)
+        return None
+
+    try:
+        for slave in slaves:
+            for protocol in protocols:
+                inverter = await probe(protocol, slave)
+                if inverter is not None:
+                    yield inverter
+    finally:
+        for client in clients.values():
+            await client.close()
@@ -0,0 +1,104 @@
+"""Stops us from hammering an adapter which isn't responding"""
+import logging
+import time
+from enum import Enum
+
+from pymodbus.exceptions import ConnectionException
+
+_LOGGER = logging.getLogger(__name__)
+
+# We open the circuit once nothing has succeeded for this long, and at least this many requests have failed. Requiring
+# both means that one inverter which isn't responding doesn't trip the breaker for other inverters on the same adapter,
+# as their requests keep succeeding
+_FAILURE_PERIOD = 30.0
+_FAILURE_THRESHOLD = 5
+# How long to wait before sending a probe request once the circuit is open. This doubles each time a probe fails
+_MIN_OPEN_DURATION = 10.0
+_MAX_OPEN_DURATION = 300.0
+
+
+class CircuitState(Enum):
+    """State of a CircuitBreaker"""
+
+    CLOSED = "closed"  # Requests are allowed
+    OPEN = "open"  # Requests are rejected
+    HALF_OPEN = "half_open"  # A single probe request is allowed, to see whether the adapter has recovered
+
+
+class CircuitOpenError(ConnectionException):
+    """Raised instead of sending a request when the circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Tracks whether requests to an adapter are succeeding, and rejects requests for a while if they aren't.
+
+    Failed requests to an unreachable adapter each take a full timeout, holding up everything else. Once the breaker
+    opens, requests fail immediately with CircuitOpenError (a ConnectionException, so callers treat it like any other
+    connection failure). After a while we let a single probe request through: if it succeeds the breaker closes again,
+    otherwise we wait twice as long before the next probe.
+    """
+
+    def __init__(self) -> None:
+        self._state = CircuitState.CLOSED
+        self._last_success_time = time.monotonic()
+        self._num_failures = 0
+        self._open_duration = _MIN_OPEN_DURATION
+        self._probe_time = 0.0
+        self._is_probing = False
+
+    @property
+    def state(self) -> CircuitState:
+        """The current state"""
+        return self._state
+
+    def before_request(self) -> None:
+        """Call before sending a request. Raises CircuitOpenError if the request shouldn't be sent"""
+        if self._state == CircuitState.CLOSED:
+            return
+        if self._state == CircuitState.OPEN and time.monotonic() >= self._probe_time:
+            self._state = CircuitState.HALF_OPEN
+        if self._state == CircuitState.HALF_OPEN and not self._is_probing:
+            self._is_probing = True
+            return
+        raise CircuitOpenError("Adapter is not responding: waiting before trying again")
+
+    def record_result(self, succeeded: bool) -> None:
+        """Call after each request which was sent, with whether we got a response"""
+        now = time.monotonic()
+        if succeeded:
+            if self._state != CircuitState.CLOSED:
+                _LOGGER.info("Adapter responded: resuming requests")
+            self._state = CircuitState.CLOSED
+            self._last_success_time = now
+            self._num_failures = 0
+            self._open_duration = _MIN_OPEN_DURATION
+            self._is_probing = False
+            return
+
+        self._num_failures += 1
+        if self._state == CircuitState.HALF_OPEN:
+            self._is_probing = False
+            self._open_duration = min(self._open_duration * 2, _MAX_OPEN_DURATION)
+            self._open(now)
+        elif (
+            self._state == CircuitState.CLOSED
+            and self._num_failures >= _FAILURE_THRESHOLD
+            and now - self._last_success_time >= _FAILURE_PERIOD
+        ):
+            self._open(now)
+
+    def record_cancelled(self) -> None:
+        """Call if a request was cancelled before we found out whether it succeeded"""
+        # We don't know anything more about the adapter. If this was the probe, let the next request probe instead
+        self._is_probing = False
+
+    def _open(self, now: float) -> None:
+        _LOGGER.warning(
+            "%s requests failed and nothing has succeeded for %.0fs: pausing requests for %.0fs",
+            self._num_failures,
+            now - self._last_success_time,
+            self._open_duration,
+        )
+        self._state = CircuitState.OPEN
+        self._probe_time = now + self._open_duration
@@ -3,6 +3,9 @@ import logging
 from abc import ABC
 from abc import abstractmethod
 
+from .poll_stats import PollStats
+from .poll_tier import PollTier
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -14,9 +17,41 @@ class ModbusControllerEntity(ABC):
     def addresses(self) -> list[int]:
         """The addresses that this entity depends on (if any)"""
 
+    @property
+    def poll_tier(self) -> PollTier:
+        """How often the addresses that this entity depends on need to be polled"""
+        return PollTier.NORMAL
+
+    @property
+    def consistency_group(self) -> str | None:
+        """
+        If set, the addresses of all entities with the same consistency group are only updated together: if reading any
+        of them fails, none of them are updated
+        """
+        return None
+
+    @property
+    def sources(self) -> list["ModbusControllerEntity"]:
+        """
+        Other entities which this entity's value is derived from (if any). update_callback is called once per poll,
+        after all of the sources which were updated in that poll
+        """
+        return []
+
+    @property
+    def wants_unchanged_updates(self) -> bool:
+        """
+        Whether update_callback should be called whenever any of this entity's addresses are read, even if they haven't
+        changed
+        """
+        return False
+
     @abstractmethod
     def update_callback(self, changed_addresses: set[int]) -> None:
-        """Notify listeners that the given addresses have changed"""
+        """
+        Notify listeners that the given addresses have changed. This is only called if at least one of the entity's
+        addresses changed (or was read, see wants_unchanged_updates), or if any of its sources were updated
+        """
 
     @abstractmethod
     def is_connected_changed_callback(self) -> None:
@@ -31,6 +66,16 @@ class EntityController(ABC):
     def is_connected(self) -> bool:
         """Returns whether the inverter is currently connected"""
 
+    @property
+    @abstractmethod
+    def is_showing_restored_data(self) -> bool:
+        """Whether register values come from a restored snapshot, rather than the inverter"""
+
+    @property
+    @abstractmethod
+    def poll_stats(self) -> PollStats:
+        """Statistics about the polls of this inverter"""
+
     @abstractmethod
     def register_modbus_entity(self, listener: ModbusControllerEntity) -> None:
         """Register a modbus entity with the ModbusController"""
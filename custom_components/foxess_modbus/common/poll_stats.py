@@ -0,0 +1,140 @@
+"""Timing and traffic statistics for polls of an inverter"""
+import bisect
+from typing import Any
+from typing import Callable
+
+
+class LatencyHistogram:
+    """Counts durations into fixed buckets, so that we can report percentiles without keeping every sample"""
+
+    # Upper bound (inclusive) of each bucket, in seconds. There's a final bucket for anything larger
+    BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self) -> None:
+        self._counts = [0] * (len(self.BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, duration: float) -> None:
+        """Add a duration, in seconds"""
+        self._counts[bisect.bisect_left(self.BUCKETS, duration)] += 1
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+
+    @property
+    def mean(self) -> float | None:
+        """The mean duration, or None if nothing has been recorded"""
+        return self.total / self.count if self.count > 0 else None
+
+    def percentile(self, fraction: float) -> float | None:
+        """
+        Upper bound of the bucket containing the given fraction (0-1) of durations, capped at the largest duration seen.
+        None if nothing has been recorded
+        """
+        if self.count == 0:
+            return None
+        target = fraction * self.count
+        cumulative = 0
+        for upper_bound, count in zip(self.BUCKETS, self._counts, strict=False):
+            cumulative += count
+            if cumulative >= target:
+                return min(upper_bound, self.max)
+        return self.max
+
+    def as_dict(self) -> dict[str, Any]:
+        """Summarise this histogram, for diagnostics"""
+        bucket_names = [f"<={x}s" for x in self.BUCKETS] + [f">{self.BUCKETS[-1]}s"]
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "max": self.max,
+            "buckets": dict(zip(bucket_names, self._counts, strict=True)),
+        }
+
+
+class PollStats:
+    """
+    Statistics about the polls of a single inverter, and the requests which make them up. Counts are totals since the
+    integration was loaded.
+
+    Listeners are called at the end of each poll.
+    """
+
+    def __init__(self) -> None:
+        self.poll_durations = LatencyHistogram()
+        self.request_durations = LatencyHistogram()
+        self.last_poll_duration: float | None = None
+        self.last_poll_num_requests = 0
+        self.num_polls = 0
+        # Polls where at least one read failed
+        self.num_failed_polls = 0
+        # Polls which took longer than the poll interval, and so delayed the next one
+        self.num_overrun_polls = 0
+        self.num_requests = 0
+        self.num_failed_requests = 0
+        self.num_retries = 0
+        # Reads of a block which were skipped, because that block had been failing
+        self.num_skipped_reads = 0
+        # Register data (2 bytes per register) received in successful reads
+        self.bytes_read = 0
+        self._num_requests_this_poll = 0
+        self._listeners: set[Callable[[], None]] = set()
+
+    def record_request(self, duration: float, num_registers: int, succeeded: bool) -> None:
+        """Record a single read request"""
+        self.request_durations.record(duration)
+        self.num_requests += 1
+        self._num_requests_this_poll += 1
+        if succeeded:
+            self.bytes_read += num_registers * 2
+        else:
+            self.num_failed_requests += 1
+
+    def record_retry(self) -> None:
+        """Record that a failed read is being retried"""
+        self.num_retries += 1
+
+    def record_skipped_read(self) -> None:
+        """Record that a block wasn't read, as it has been failing"""
+        self.num_skipped_reads += 1
+
+    def record_poll(self, duration: float, failed: bool, overran: bool) -> None:
+        """Record the end of a poll, and notify listeners"""
+        self.poll_durations.record(duration)
+        self.last_poll_duration = duration
+        self.last_poll_num_requests = self._num_requests_this_poll
+        self._num_requests_this_poll = 0
+        self.num_polls += 1
+        if failed:
+            self.num_failed_polls += 1
+        if overran:
+            self.num_overrun_polls += 1
+
+        for listener in list(self._listeners):
+            listener()
+
+    def add_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Call the given listener at the end of each poll. Returns a function which removes the listener"""
+        self._listeners.add(listener)
+        return lambda: self._listeners.discard(listener)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Summarise these stats, for diagnostics"""
+        return {
+            "poll_durations": self.poll_durations.as_dict(),
+            "request_durations": self.request_durations.as_dict(),
+            "last_poll_duration": self.last_poll_duration,
+            "last_poll_num_requests": self.last_poll_num_requests,
+            "num_polls": self.num_polls,
+            "num_failed_polls": self.num_failed_polls,
+            "num_overrun_polls": self.num_overrun_polls,
+            "num_requests": self.num_requests,
+            "num_failed_requests": self.num_failed_requests,
+            "num_retries": self.num_retries,
+            "num_skipped_reads": self.num_skipped_reads,
+            "bytes_read": self.bytes_read,
+        }
@@ -0,0 +1,15 @@
+"""Defines PollTier"""
+from enum import Enum
+
+
+class PollTier(Enum):
+    """
+    How often the registers behind an entity need to be polled. The ModbusController decides how often to poll each
+    tier, relative to the configured poll rate.
+
+    These are ordered fastest first: if two entities with different tiers share a register, the faster tier wins.
+    """
+
+    FAST = 1  # Values which change quickly and which people want to see promptly, e.g. power
+    NORMAL = 2
+    SLOW = 3  # Values which rarely change, e.g. settings
@@ -38,9 +38,12 @@ MODBUS_DEVICE = "modbus_device"
 MODBUS_TYPE = "modbus_type"  # TCP, UDP, SERIAL, RTU_OVER_TCP
 MODBUS_SERIAL_BAUD = "modbus_serial_baud"
 POLL_RATE = "poll_rate"
+MAX_POLL_RATE = "max_poll_rate"
 MAX_READ = "max_read"
 ADAPTER_ID = "adapter_id"
 ROUND_SENSOR_VALUES = "round_sensor_values"
+ASYNC_TRANSPORT = "async_transport"
+PIPELINE_REQUESTS = "pipeline_requests"
 # Used as a key in the inverter config to indicate that the adapter was migrated from config version 1
 ADAPTER_WAS_MIGRATED = "adapter_was_migrated"
 
@@ -49,6 +52,8 @@ INVERTER_BASE = "inverter_base"
 INVERTER_CONN = "inverter_conn"
 INVERTERS = "inverters"
 MODBUS_CLIENTS = "modbus_clients"
+POLL_SCHEDULERS = "poll_schedulers"
+REGISTER_SNAPSHOT_STORE = "register_snapshot_store"
 
 CONFIG_SAVE_TIME = "save_time"
 
@@ -0,0 +1,36 @@
+"""Diagnostics support for foxess_modbus"""
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .const import HOST
+from .const import INVERTERS
+from .const import MAX_READ
+from .const import MODBUS_CLIENTS
+
+_TO_REDACT = {HOST}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return diagnostics for a config entry: the inverter config, and how polling each inverter is going"""
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    return {
+        "inverters": [
+            {
+                "config": async_redact_data(inverter, _TO_REDACT),
+                "is_connected": controller.is_connected,
+                "is_showing_restored_data": controller.is_showing_restored_data,
+                "poll_interval": controller.poll_interval,
+                "max_read": inverter[MAX_READ],
+                "poll_stats": controller.poll_stats.as_dict(),
+            }
+            for inverter, controller in entry_data[INVERTERS]
+        ],
+        "clients": [
+            {"protocol": client.protocol, "circuit_state": client.circuit_state.value}
+            for client in entry_data.get(MODBUS_CLIENTS, [])
+        ],
+    }
@@ -6,6 +6,11 @@ from abc import abstractmethod
 class BaseValidator(ABC):
     """Base validator"""
 
+    @property
+    def bounds(self) -> tuple[float, float] | None:
+        """If this validator just checks that values are within (min, max) inclusive, return those bounds"""
+        return None
+
     @abstractmethod
     def validate(self, data: int | float) -> bool:
         """Validate a value against a set of rules"""
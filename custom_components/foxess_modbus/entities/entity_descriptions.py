@@ -3,8 +3,10 @@ from homeassistant.components.number import NumberDeviceClass
 from homeassistant.components.number import NumberMode
 from homeassistant.components.sensor import SensorDeviceClass
 from homeassistant.components.sensor import SensorStateClass
+from homeassistant.const import UnitOfInformation
 from homeassistant.const import UnitOfTime
 
+from ..common.poll_tier import PollTier
 from ..common.register_type import RegisterType
 from ..const import AC1
 from ..const import AIO_H1
@@ -25,6 +27,7 @@ from .modbus_inverter_state_sensor import KH_INVERTER_STATES
 from .modbus_inverter_state_sensor import ModbusInverterStateSensorDescription
 from .modbus_lambda_sensor import ModbusLambdaSensorDescription
 from .modbus_number import ModbusNumberDescription
+from .modbus_poll_stats_sensor import ModbusPollStatsSensorDescription
 from .modbus_select import ModbusSelectDescription
 from .modbus_sensor import ModbusSensorDescription
 from .validation import Min
@@ -38,6 +41,9 @@ BMS_CONNECT_STATE_ADDRESS = [
     ModbusAddressSpec(models=[H1, AIO_H1, AC1, KH], input=11058, holding=31029),
 ]
 
+# The powers flowing in and out of the inverter should always be shown from the same poll, so that they add up
+_POWER_FLOW = "power_flow"
+
 
 def _pv_voltage(key: str, addresses: list[ModbusAddressesSpec], name: str) -> EntityFactory:
     return ModbusSensorDescription(
@@ -73,6 +79,7 @@ def _pv_power(key: str, addresses: list[ModbusAddressesSpec], name: str) -> Enti
         addresses=addresses,
         name=name,
         device_class=SensorDeviceClass.POWER,
+        poll_tier=PollTier.FAST,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="kW",
         icon="mdi:solar-power-variant-outline",
@@ -80,6 +87,7 @@ def _pv_power(key: str, addresses: list[ModbusAddressesSpec], name: str) -> Enti
         round_to=0.01,
         # This can go negative if no panels are attached
         post_process=lambda x: max(x, 0),
+        consistency_group=_POWER_FLOW,
     )
 
 
@@ -312,6 +320,8 @@ _H1_CURRENT_VOLTAGE_POWER_ENTITIES: list[EntityFactory] = [
         ],
         name="Load Power",
         device_class=SensorDeviceClass.POWER,
+        consistency_group=_POWER_FLOW,
+        poll_tier=PollTier.FAST,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="kW",
         icon="mdi:home-lightning-bolt-outline",
@@ -354,6 +364,8 @@ _H1_CURRENT_VOLTAGE_POWER_ENTITIES: list[EntityFactory] = [
         ],
         name="Inverter Power",
         device_class=SensorDeviceClass.POWER,
+        consistency_group=_POWER_FLOW,
+        poll_tier=PollTier.FAST,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="kW",
         icon="mdi:export",
@@ -433,6 +445,7 @@ _H1_CURRENT_VOLTAGE_POWER_ENTITIES: list[EntityFactory] = [
         entity_registry_enabled_default=False,
         name="EPS Power",
         device_class=SensorDeviceClass.POWER,
+        poll_tier=PollTier.FAST,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="kW",
         icon="mdi:power-socket",
@@ -482,6 +495,8 @@ _H1_CURRENT_VOLTAGE_POWER_ENTITIES: list[EntityFactory] = [
         ],
         name="Grid CT",
         device_class=SensorDeviceClass.POWER,
+        consistency_group=_POWER_FLOW,
+        poll_tier=PollTier.FAST,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="kW",
         icon="mdi:meter-electric-outline",
@@ -496,6 +511,7 @@ _H1_CURRENT_VOLTAGE_POWER_ENTITIES: list[EntityFactory] = [
         ],
         name="Feed-in",
         device_class=SensorDeviceClass.POWER,
+        poll_tier=PollTier.FAST,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="kW",
         icon="mdi:transmission-tower-import",
@@ -511,6 +527,7 @@ _H1_CURRENT_VOLTAGE_POWER_ENTITIES: list[EntityFactory] = [
         ],
         name="Grid Consumption",
         device_class=SensorDeviceClass.POWER,
+        poll_tier=PollTier.FAST,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="kW",
         icon="mdi:transmission-tower-export",
@@ -526,6 +543,7 @@ _H1_CURRENT_VOLTAGE_POWER_ENTITIES: list[EntityFactory] = [
         ],
         name="CT2 Meter",
         device_class=SensorDeviceClass.POWER,
+        poll_tier=PollTier.FAST,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="kW",
         icon="mdi:meter-electric-outline",
@@ -613,6 +631,7 @@ _H3_CURRENT_VOLTAGE_POWER_ENTITIES: list[EntityFactory] = [
         addresses=[ModbusAddressesSpec(models=[H3, AIO_H3], holding=[31012])],
         name="Inverter Power R",
         device_class=SensorDeviceClass.POWER,
+        poll_tier=PollTier.FAST,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="kW",
         scale=0.001,
@@ -625,6 +644,7 @@ _H3_CURRENT_VOLTAGE_POWER_ENTITIES: list[EntityFactory] = [
         addresses=[ModbusAddressesSpec(models=[H3, AIO_H3], holding=[31013])],
         name="Inverter Power S",
         device_class=SensorDeviceClass.POWER,
+        poll_tier=PollTier.FAST,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="kW",
         scale=0.001,
@@ -637,6 +657,7 @@ _H3_CURRENT_VOLTAGE_POWER_ENTITIES: list[EntityFactory] = [
         addresses=[ModbusAddressesSpec(models=[H3, AIO_H3], holding=[31014])],
         name="Inverter Power T",
         device_class=SensorDeviceClass.POWER,
+        poll_tier=PollTier.FAST,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="kW",
         scale=0.001,
@@ -650,6 +671,7 @@ _H3_CURRENT_VOLTAGE_POWER_ENTITIES: list[EntityFactory] = [
         entity_registry_enabled_default=False,
         name="EPS Power R",
         device_class=SensorDeviceClass.POWER,
+        poll_tier=PollTier.FAST,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="kW",
         icon="mdi:power-socket",
@@ -664,6 +686,7 @@ _H3_CURRENT_VOLTAGE_POWER_ENTITIES: list[EntityFactory] = [
         entity_registry_enabled_default=False,
         name="EPS Power S",
         device_class=SensorDeviceClass.POWER,
+        poll_tier=PollTier.FAST,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="kW",
         icon="mdi:power-socket",
@@ -678,6 +701,7 @@ _H3_CURRENT_VOLTAGE_POWER_ENTITIES: list[EntityFactory] = [
         entity_registry_enabled_default=False,
         name="EPS Power T",
         device_class=SensorDeviceClass.POWER,
+        poll_tier=PollTier.FAST,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="kW",
         icon="mdi:power-socket",
@@ -691,6 +715,7 @@ _H3_CURRENT_VOLTAGE_POWER_ENTITIES: list[EntityFactory] = [
         addresses=[ModbusAddressesSpec(models=[H3, AIO_H3], holding=[31026])],
         name="Grid CT R",
         device_class=SensorDeviceClass.POWER,
+        poll_tier=PollTier.FAST,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="kW",
         icon="mdi:meter-electric-outline",
@@ -703,6 +728,7 @@ _H3_CURRENT_VOLTAGE_POWER_ENTITIES: list[EntityFactory] = [
         addresses=[ModbusAddressesSpec(models=[H3, AIO_H3], holding=[31026])],
         name="Feed-in R",
         device_class=SensorDeviceClass.POWER,
+        poll_tier=PollTier.FAST,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="kW",
         icon="mdi:transmission-tower-import",
@@ -716,6 +742,7 @@ _H3_CURRENT_VOLTAGE_POWER_ENTITIES: list[EntityFactory] = [
         addresses=[ModbusAddressesSpec(models=[H3, AIO_H3], holding=[31026])],
         name="Grid Consumption R",
         device_class=SensorDeviceClass.POWER,
+        poll_tier=PollTier.FAST,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="kW",
         icon="mdi:transmission-tower-export",
@@ -729,6 +756,7 @@ _H3_CURRENT_VOLTAGE_POWER_ENTITIES: list[EntityFactory] = [
         addresses=[ModbusAddressesSpec(models=[H3, AIO_H3], holding=[31027])],
         name="Grid CT S",
         device_class=SensorDeviceClass.POWER,
+        poll_tier=PollTier.FAST,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="kW",
         icon="mdi:meter-electric-outline",
@@ -741,6 +769,7 @@ _H3_CURRENT_VOLTAGE_POWER_ENTITIES: list[EntityFactory] = [
         addresses=[ModbusAddressesSpec(models=[H3, AIO_H3], holding=[31027])],
         name="Feed-in S",
         device_class=SensorDeviceClass.POWER,
+        poll_tier=PollTier.FAST,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="kW",
         icon="mdi:transmission-tower-import",
@@ -754,6 +783,7 @@ _H3_CURRENT_VOLTAGE_POWER_ENTITIES: list[EntityFactory] = [
         addresses=[ModbusAddressesSpec(models=[H3, AIO_H3], holding=[31027])],
         name="Grid Consumption S",
         device_class=SensorDeviceClass.POWER,
+        poll_tier=PollTier.FAST,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="kW",
         icon="mdi:transmission-tower-export",
@@ -767,6 +797,7 @@ _H3_CURRENT_VOLTAGE_POWER_ENTITIES: list[EntityFactory] = [
         addresses=[ModbusAddressesSpec(models=[H3, AIO_H3], holding=[31028])],
         name="Grid CT T",
         device_class=SensorDeviceClass.POWER,
+        poll_tier=PollTier.FAST,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="kW",
         icon="mdi:meter-electric-outline",
@@ -779,6 +810,7 @@ _H3_CURRENT_VOLTAGE_POWER_ENTITIES: list[EntityFactory] = [
         addresses=[ModbusAddressesSpec(models=[H3, AIO_H3], holding=[31028])],
         name="Feed-in T",
         device_class=SensorDeviceClass.POWER,
+        poll_tier=PollTier.FAST,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="kW",
         icon="mdi:transmission-tower-import",
@@ -792,6 +824,7 @@ _H3_CURRENT_VOLTAGE_POWER_ENTITIES: list[EntityFactory] = [
         addresses=[ModbusAddressesSpec(models=[H3, AIO_H3], holding=[31028])],
         name="Grid Consumption T",
         device_class=SensorDeviceClass.POWER,
+        poll_tier=PollTier.FAST,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="kW",
         icon="mdi:transmission-tower-export",
@@ -805,6 +838,7 @@ _H3_CURRENT_VOLTAGE_POWER_ENTITIES: list[EntityFactory] = [
         addresses=[ModbusAddressesSpec(models=[H3, AIO_H3], holding=[31029])],
         name="Load Power R",
         device_class=SensorDeviceClass.POWER,
+        poll_tier=PollTier.FAST,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="kW",
         icon="mdi:home-lightning-bolt-outline",
@@ -817,6 +851,7 @@ _H3_CURRENT_VOLTAGE_POWER_ENTITIES: list[EntityFactory] = [
         addresses=[ModbusAddressesSpec(models=[H3, AIO_H3], holding=[31030])],
         name="Load Power S",
         device_class=SensorDeviceClass.POWER,
+        poll_tier=PollTier.FAST,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="kW",
         icon="mdi:home-lightning-bolt-outline",
@@ -829,6 +864,7 @@ _H3_CURRENT_VOLTAGE_POWER_ENTITIES: list[EntityFactory] = [
         addresses=[ModbusAddressesSpec(models=[H3, AIO_H3], holding=[31031])],
         name="Load Power T",
         device_class=SensorDeviceClass.POWER,
+        poll_tier=PollTier.FAST,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="kW",
         icon="mdi:home-lightning-bolt-outline",
@@ -847,6 +883,8 @@ _INVERTER_ENTITIES: list[EntityFactory] = [
         ],
         name="Inverter Battery Power",
         device_class=SensorDeviceClass.POWER,
+        consistency_group=_POWER_FLOW,
+        poll_tier=PollTier.FAST,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="kW",
         scale=0.001,
@@ -861,6 +899,7 @@ _INVERTER_ENTITIES: list[EntityFactory] = [
         ],
         name="Battery Discharge",
         device_class=SensorDeviceClass.POWER,
+        poll_tier=PollTier.FAST,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="kW",
         icon="mdi:battery-arrow-down-outline",
@@ -877,6 +916,7 @@ _INVERTER_ENTITIES: list[EntityFactory] = [
         ],
         name="Battery Charge",
         device_class=SensorDeviceClass.POWER,
+        poll_tier=PollTier.FAST,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="kW",
         icon="mdi:battery-arrow-up-outline",
@@ -1021,6 +1061,7 @@ _INVERTER_ENTITIES: list[EntityFactory] = [
         entity_registry_enabled_default=False,
         bms_connect_state_address=BMS_CONNECT_STATE_ADDRESS,
         name="BMS Charge Rate",
+        poll_tier=PollTier.SLOW,
         device_class=SensorDeviceClass.CURRENT,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="A",
@@ -1034,6 +1075,7 @@ _INVERTER_ENTITIES: list[EntityFactory] = [
         entity_registry_enabled_default=False,
         bms_connect_state_address=BMS_CONNECT_STATE_ADDRESS,
         name="BMS Discharge Rate",
+        poll_tier=PollTier.SLOW,
         device_class=SensorDeviceClass.CURRENT,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="A",
@@ -1091,6 +1133,7 @@ _INVERTER_ENTITIES: list[EntityFactory] = [
         addresses=[ModbusAddressesSpec(models=[H1, AIO_H1, AC1, KH], input=[11048])],
         bms_connect_state_address=BMS_CONNECT_STATE_ADDRESS,
         name="BMS Cycle Count",
+        poll_tier=PollTier.SLOW,
         state_class=SensorStateClass.MEASUREMENT,
         icon="mdi:counter",
         signed=False,
@@ -1589,11 +1632,96 @@ _CONFIGURATION_ENTITIES: list[EntityFactory] = [
     ),
 ]
 
+_ALL_MODELS = [
+    EntitySpec(models=[H1, AIO_H1, AC1, KH, H3, AIO_H3], register_types=[RegisterType.INPUT, RegisterType.HOLDING])
+]
+
+
+def _round_duration(value: float | None) -> float | None:
+    return round(value, 3) if value is not None else None
+
+
+_POLL_STATS_ENTITIES: list[EntityFactory] = [
+    ModbusPollStatsSensorDescription(
+        key="poll_duration",
+        models=_ALL_MODELS,
+        name="Poll Duration",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        icon="mdi:timer-outline",
+        value=lambda stats: _round_duration(stats.last_poll_duration),
+    ),
+    ModbusPollStatsSensorDescription(
+        key="poll_duration_p95",
+        models=_ALL_MODELS,
+        name="Poll Duration (95th Percentile)",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        icon="mdi:timer-outline",
+        value=lambda stats: _round_duration(stats.poll_durations.percentile(0.95)),
+    ),
+    ModbusPollStatsSensorDescription(
+        key="request_duration_mean",
+        models=_ALL_MODELS,
+        name="Request Round Trip (Mean)",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        icon="mdi:timer-outline",
+        value=lambda stats: _round_duration(stats.request_durations.mean),
+    ),
+    ModbusPollStatsSensorDescription(
+        key="requests_per_poll",
+        models=_ALL_MODELS,
+        name="Requests per Poll",
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:swap-vertical",
+        value=lambda stats: stats.last_poll_num_requests,
+    ),
+    ModbusPollStatsSensorDescription(
+        key="data_read",
+        models=_ALL_MODELS,
+        name="Data Read",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        icon="mdi:download",
+        value=lambda stats: stats.bytes_read,
+    ),
+    ModbusPollStatsSensorDescription(
+        key="read_retries",
+        models=_ALL_MODELS,
+        name="Read Retries",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:refresh",
+        value=lambda stats: stats.num_retries,
+    ),
+    ModbusPollStatsSensorDescription(
+        key="failed_polls",
+        models=_ALL_MODELS,
+        name="Failed Polls",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:alert-circle-outline",
+        value=lambda stats: stats.num_failed_polls,
+    ),
+    ModbusPollStatsSensorDescription(
+        key="overrun_polls",
+        models=_ALL_MODELS,
+        name="Overrun Polls",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:timer-alert-outline",
+        value=lambda stats: stats.num_overrun_polls,
+    ),
+]
+
 ENTITIES: list[EntityFactory] = (
     _PV_ENTITIES
     + _H1_CURRENT_VOLTAGE_POWER_ENTITIES
     + _H3_CURRENT_VOLTAGE_POWER_ENTITIES
     + _INVERTER_ENTITIES
     + _CONFIGURATION_ENTITIES
+    + _POLL_STATS_ENTITIES
     + [description for x in CHARGE_PERIODS for description in x.entity_descriptions]
 )
@@ -8,6 +8,7 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.entity import Entity
 
 from ..common.entity_controller import EntityController
+from ..common.poll_tier import PollTier
 from ..common.register_type import RegisterType
 from .inverter_model_spec import InverterModelSpec
 
@@ -15,6 +16,13 @@ from .inverter_model_spec import InverterModelSpec
 class EntityFactory(ABC):
     """Factory which can create entities"""
 
+    # How often the registers used by the created entities need to be polled. Descriptions which let this be
+    # configured override this with a dataclass field
+    poll_tier: PollTier = PollTier.NORMAL
+    # See ModbusControllerEntity.consistency_group. Descriptions which let this be configured override this with a
+    # dataclass field
+    consistency_group: str | None = None
+
     @property
     @abstractmethod
     def entity_type(self) -> type[Entity]:
@@ -18,6 +18,7 @@ from homeassistant.helpers.restore_state import RestoredExtraData
 from homeassistant.helpers.restore_state import RestoreEntity
 
 from ..common.entity_controller import EntityController
+from ..common.poll_tier import PollTier
 from ..common.register_type import RegisterType
 from .base_validator import BaseValidator
 from .entity_factory import EntityFactory
@@ -59,6 +60,7 @@ class ModbusChargePeriodStartEndSensorDescription(SensorEntityDescription, Entit
     # Address of period end if this is the start, and vice versa
     other_address: list[InverterModelSpec]
     validate: list[BaseValidator] = field(default_factory=list)
+    poll_tier: PollTier = PollTier.SLOW
 
     @property
     def entity_type(self) -> type[Entity]:
@@ -183,6 +185,7 @@ class ModbusEnableForceChargeSensorDescription(BinarySensorEntityDescription, En
     period_start_address: list[InverterModelSpec]
     period_end_address: list[InverterModelSpec]
     validate: list[BaseValidator] = field(default_factory=list)
+    poll_tier: PollTier = PollTier.SLOW
 
     @property
     def entity_type(self) -> type[Entity]:
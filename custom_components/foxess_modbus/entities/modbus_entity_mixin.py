@@ -10,12 +10,14 @@ from homeassistant.helpers.entity import Entity
 
 from ..common.entity_controller import EntityController
 from ..common.entity_controller import ModbusControllerEntity
+from ..common.poll_tier import PollTier
 from ..const import DOMAIN
 from ..const import ENTITY_ID_PREFIX
 from ..const import FRIENDLY_NAME
 from ..const import INVERTER_CONN
 from ..const import INVERTER_MODEL
 from .base_validator import BaseValidator
+from .entity_factory import EntityFactory
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -72,6 +74,16 @@ class ModbusEntityMixin(ModbusControllerEntity, ModbusEntityProtocol, _ModbusEnt
             return f"{self.entity_description.name} ({friendly_name})"
         return cast(str | None, self.entity_description.name)
 
+    @property
+    def poll_tier(self) -> PollTier:
+        """How often the addresses that this entity depends on need to be polled"""
+        return cast(EntityFactory, self.entity_description).poll_tier
+
+    @property
+    def consistency_group(self) -> str | None:
+        """Addresses of entities in the same consistency group are only updated together"""
+        return cast(EntityFactory, self.entity_description).consistency_group
+
     @property
     def available(self) -> bool:
         """Return True if entity is available."""
@@ -87,13 +99,19 @@ class ModbusEntityMixin(ModbusControllerEntity, ModbusEntityProtocol, _ModbusEnt
         self._controller.remove_modbus_entity(self)
         await super().async_will_remove_from_hass()
 
-    def update_callback(self, changed_addresses: set[int]) -> None:
-        if any(x in changed_addresses for x in self.addresses):
-            self._address_updated()
+    def update_callback(self, _changed_addresses: set[int]) -> None:
+        # The controller only calls us if one of our addresses changed
+        self._address_updated()
 
     def is_connected_changed_callback(self) -> None:
         self.schedule_update_ha_state()
 
+    def link_sources(self, entities: dict[str, Entity]) -> None:
+        """
+        Called once all of the inverter's entities of the same type have been created (keyed by entity description
+        key), so that entities which are derived from other entities can find them
+        """
+
     def _address_updated(self) -> None:
         """Called when the controller reads an updated to any of the addresses in self.addresses"""
         self.schedule_update_ha_state()
@@ -1,34 +1,54 @@
-"""Sensor"""
+"""Sensor which integrates the value of another sensor over time, e.g. power into energy"""
 import logging
+import time
 from dataclasses import dataclass
 from typing import Any
 
-from homeassistant.components.integration.sensor import DEFAULT_ROUND
-from homeassistant.components.integration.sensor import IntegrationSensor
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.components.sensor import SensorEntityDescription
+from homeassistant.components.sensor import SensorStateClass
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import UnitOfTime
 from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.restore_state import ExtraStoredData
+from homeassistant.helpers.restore_state import RestoredExtraData
+from homeassistant.helpers.restore_state import RestoreEntity
 
 from ..common.entity_controller import EntityController
+from ..common.poll_tier import PollTier
 from ..common.register_type import RegisterType
 from .entity_factory import EntityFactory
 from .inverter_model_spec import EntitySpec
 from .modbus_entity_mixin import ModbusEntityMixin
+from .modbus_sensor import ModbusSensor
 
 _LOGGER = logging.getLogger(__name__)
 
+_DEFAULT_ROUND_DIGITS = 3
+
+_UNIT_TIME_SECONDS = {
+    UnitOfTime.SECONDS: 1,
+    UnitOfTime.MINUTES: 60,
+    UnitOfTime.HOURS: 60 * 60,
+    UnitOfTime.DAYS: 24 * 60 * 60,
+}
+
+# Same as HA's integration sensor, so that existing users keep their history
+_ATTR_SOURCE_ID = "source"
+
 
 @dataclass(kw_only=True)
 class ModbusIntegrationSensorDescription(SensorEntityDescription, EntityFactory):
     """Custom sensor description"""
 
     models: list[EntitySpec]
+    # "left", "right" or "trapezoidal", as with HA's integration sensor
     integration_method: str
     round_digits: int | None = None
+    # Key of the ModbusSensor of the same inverter to integrate
     source_entity: str
     unit_time: UnitOfTime
+    state_class: SensorStateClass | str | None = SensorStateClass.TOTAL
 
     @property
     def entity_type(self) -> type[Entity]:
@@ -39,66 +59,133 @@ class ModbusIntegrationSensorDescription(SensorEntityDescription, EntityFactory)
         controller: EntityController,
         inverter_model: str,
         register_type: RegisterType,
-        entry: ConfigEntry,
+        _entry: ConfigEntry,
         inv_details: dict[str, Any],
     ) -> Entity | None:
         if not self._supports_inverter_model(self.models, inverter_model, register_type):
             return None
 
-        # this piggybacks on the existing factory to create IntegrationSensors
-        return ModbusIntegrationSensor(
-            controller=controller,
-            entity_description=self,
-            entry=entry,
-            inv_details=inv_details,
-            integration_method=self.integration_method,
-            round_digits=self.round_digits,
-            source_entity=self.source_entity,
-            unit_time=self.unit_time,
-        )
+        return ModbusIntegrationSensor(controller=controller, entity_description=self, inv_details=inv_details)
+
 
+class ModbusIntegrationSensor(ModbusEntityMixin, RestoreEntity, SensorEntity):
+    """
+    Integrates the value of another sensor over time, using a Riemann sum.
 
-class ModbusIntegrationSensor(ModbusEntityMixin, IntegrationSensor):
-    """Sensor class."""
+    Rather than listening to the source sensor's state, this takes a sample of the source sensor's registers (before any
+    rounding) every time they're read, timestamped when they were read. The total is updated incrementally on each
+    poll, and persisted across restarts.
+    """
 
     def __init__(
         self,
         controller: EntityController,
         entity_description: ModbusIntegrationSensorDescription,
-        entry: ConfigEntry,
         inv_details: dict[str, Any],
-        integration_method: str,
-        round_digits: int | None,
-        source_entity: str,
-        unit_time: UnitOfTime,
     ) -> None:
         """Initialize the sensor."""
 
-        if round_digits is None:
-            round_digits = DEFAULT_ROUND
+        assert entity_description.integration_method in ("left", "right", "trapezoidal")
 
         self._controller = controller
-        self._entry = entry
-        self._inv_details = inv_details
         self.entity_description = entity_description
+        self._inv_details = inv_details
+        self._source: ModbusSensor | None = None
+        self._round_digits = (
+            entity_description.round_digits if entity_description.round_digits is not None else _DEFAULT_ROUND_DIGITS
+        )
+        self._unit_time_seconds = _UNIT_TIME_SECONDS[entity_description.unit_time]
+        self._total: float | None = None
+        # (time.monotonic(), value) of the previous sample, or None if there's nothing to integrate from
+        self._last_sample: tuple[float, float] | None = None
         self.entity_id = "sensor." + self._get_unique_id()
 
-        source_entity = f"sensor.{self._add_entity_id_prefix(source_entity)}"
-
-        IntegrationSensor.__init__(
-            self=self,
-            integration_method=integration_method,
-            name=entity_description.name,
-            round_digits=round_digits,
-            source_entity=source_entity,
-            unique_id=None,
-            unit_prefix=None,
-            unit_time=unit_time,
-        )
+    def link_sources(self, entities: dict[str, Entity]) -> None:
+        key = self._description.source_entity
+        source = entities.get(key)
+        assert isinstance(source, ModbusSensor), f"Integration source '{key}' must be a ModbusSensor"
+        self._source = source
+
+    @property
+    def _description(self) -> ModbusIntegrationSensorDescription:
+        assert isinstance(self.entity_description, ModbusIntegrationSensorDescription)
+        return self.entity_description
+
+    async def async_added_to_hass(self) -> None:
+        """Add update callback after being added to hass."""
+        # Restore the total before registering with the controller, so that the first sample adds to it
+        extra_data = await self.async_get_last_extra_data()
+        if extra_data is not None and extra_data.as_dict().get("total") is not None:
+            self._total = float(extra_data.as_dict()["total"])
+        elif (state := await self.async_get_last_state()) is not None:
+            # Written by HA's integration sensor, which we used to use
+            try:
+                self._total = float(state.state)
+            except ValueError:
+                _LOGGER.debug("%s could not restore last state %s", self.entity_id, state.state)
+        await super().async_added_to_hass()
 
-        # Use the icon from entity_description
-        delattr(self, "_attr_icon")
+    @property
+    def extra_restore_state_data(self) -> ExtraStoredData:
+        """Return specific state data to be restored."""
+        # The state is rounded, so keep the full total
+        return RestoredExtraData(json_dict={"total": self._total})
+
+    @property
+    def native_value(self) -> float | None:
+        return round(self._total, self._round_digits) if self._total is not None else None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        return {_ATTR_SOURCE_ID: self._source.entity_id} if self._source is not None else None
+
+    def _address_updated(self) -> None:
+        assert self._source is not None
+        now = time.monotonic()
+        value = self._source.decoded_value
+        # Restored values are from before a restart, so they don't tell us anything about what happened since
+        if value is None or self._controller.is_showing_restored_data:
+            # Don't integrate across a gap in the source's values
+            self._last_sample = None
+            return
+
+        previous = self._last_sample
+        self._last_sample = (now, value)
+        if previous is None:
+            return
+
+        previous_time, previous_value = previous
+        method = self._description.integration_method
+        if method == "left":
+            average = previous_value
+        elif method == "right":
+            average = value
+        else:
+            average = (previous_value + value) / 2
+
+        old_value = self.native_value
+        self._total = (self._total or 0.0) + average * (now - previous_time) / self._unit_time_seconds
+        if self.native_value != old_value:
+            self.schedule_update_ha_state()
+
+    def is_connected_changed_callback(self) -> None:
+        # We don't know what happened while we were disconnected, so don't integrate over it
+        self._last_sample = None
+        super().is_connected_changed_callback()
 
     @property
     def addresses(self) -> list[int]:
-        return []
+        return self._source.addresses if self._source is not None else []
+
+    @property
+    def poll_tier(self) -> PollTier:
+        return self._source.poll_tier if self._source is not None else PollTier.NORMAL
+
+    @property
+    def consistency_group(self) -> str | None:
+        return self._source.consistency_group if self._source is not None else None
+
+    @property
+    def wants_unchanged_updates(self) -> bool:
+        # We need a sample every time the source's registers are read, even if they didn't change
+        return True
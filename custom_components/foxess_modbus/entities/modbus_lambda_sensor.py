@@ -7,11 +7,10 @@ from typing import Callable
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.components.sensor import SensorEntityDescription
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import Event
 from homeassistant.helpers.entity import Entity
-from homeassistant.helpers.event import async_track_state_change_event
 
 from ..common.entity_controller import EntityController
+from ..common.entity_controller import ModbusControllerEntity
 from ..common.register_type import RegisterType
 from .entity_factory import EntityFactory
 from .inverter_model_spec import EntitySpec
@@ -25,6 +24,7 @@ class ModbusLambdaSensorDescription(SensorEntityDescription, EntityFactory):
     """Entity description for ModbusLambdaSensors"""
 
     models: list[EntitySpec]
+    # Keys of the sensors of the same inverter which this is calculated from
     sources: list[str]
     # This might have fewer inputs than there are elements in sources, if some inputs are disabled
     method: Callable[[list[float]], Any]
@@ -54,7 +54,11 @@ class ModbusLambdaSensorDescription(SensorEntityDescription, EntityFactory):
 
 
 class ModbusLambdaSensor(ModbusEntityMixin, SensorEntity):
-    """Generates a value by applying a lambda to the values of a number of other sensors"""
+    """
+    Generates a value by applying a lambda to the values of a number of other sensors.
+
+    The controller updates this once per poll, after any of the source sensors have been updated.
+    """
 
     def __init__(
         self,
@@ -67,44 +71,40 @@ class ModbusLambdaSensor(ModbusEntityMixin, SensorEntity):
         self._controller = controller
         self.entity_description = entity_description
         self._inv_details = inv_details
-        self._source_entity_ids = [f"sensor.{self._add_entity_id_prefix(x)}" for x in sources]
+        self._source_keys = sources
+        self._sources: list[SensorEntity] = []
         self._method = method
 
+    def link_sources(self, entities: dict[str, Entity]) -> None:
+        # Sources which this inverter doesn't have are ignored, in the same way as disabled ones
+        self._sources = [source for key in self._source_keys if isinstance(source := entities.get(key), SensorEntity)]
+
     async def async_added_to_hass(self) -> None:
         """Add update callback after being added to hass."""
         await super().async_added_to_hass()
-
-        self.async_on_remove(async_track_state_change_event(self.hass, self._source_entity_ids, self._handle_event))
-
         self._update_value()
 
-    def _handle_event(self, _event: Event) -> None:
+    def _address_updated(self) -> None:
         self._update_value()
 
     def _update_value(self) -> None:
         inputs = []
         new_value = None
         success = True
-        # If all source sensors are unknown/unavailable, return unknown.
+        # If all source sensors are unknown, return unknown.
         # However we might be operating on a number of inputs and the user might have disabled some
         # (e.g. we sum PV1-PV4 and the user disabled PV4), so if any input is disabled (provided we have
         # at least one enabled input), we'll keep going.
-        # However, if any input isn't a float, or is unknown/unavailable, we'll abort.
-        for source in self._source_entity_ids:
-            state = self.hass.states.get(source)
-            if state is None:
-                # Disabled
+        # However, if any input isn't a number, or is unknown, we'll abort.
+        for source in self._sources:
+            if source.hass is None:
+                # Disabled, so HA never added it
                 continue
-            str_value = state.state
-            if str_value is None or str_value == "unknown" or str_value == "unavailable":
-                success = False
-                break
-            try:
-                float_value = float(str_value)
-                inputs.append(float_value)
-            except ValueError:
+            value = source.native_value
+            if not isinstance(value, int | float):
                 success = False
                 break
+            inputs.append(float(value))
 
         if success and len(inputs) > 0:
             new_value = self._method(inputs)
@@ -113,6 +113,10 @@ class ModbusLambdaSensor(ModbusEntityMixin, SensorEntity):
             self._attr_native_value = new_value
             self.schedule_update_ha_state()
 
+    @property
+    def sources(self) -> list[ModbusControllerEntity]:
+        return [x for x in self._sources if isinstance(x, ModbusControllerEntity)]
+
     @property
     def addresses(self) -> list[int]:
         return []
@@ -0,0 +1,84 @@
+"""Diagnostic sensors which report on how polling the inverter is going"""
+import logging
+from dataclasses import dataclass
+from typing import Any
+from typing import Callable
+
+from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import SensorEntityDescription
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.entity import EntityCategory
+
+from ..common.entity_controller import EntityController
+from ..common.poll_stats import PollStats
+from ..common.register_type import RegisterType
+from .entity_factory import EntityFactory
+from .inverter_model_spec import EntitySpec
+from .modbus_entity_mixin import ModbusEntityMixin
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(kw_only=True)
+class ModbusPollStatsSensorDescription(SensorEntityDescription, EntityFactory):
+    """Entity description for ModbusPollStatsSensors"""
+
+    models: list[EntitySpec]
+    value: Callable[[PollStats], float | int | None]
+    entity_category: EntityCategory | None = EntityCategory.DIAGNOSTIC
+    # These update on every poll, which would fill up the recorder. Users can enable the ones they want
+    entity_registry_enabled_default: bool = False
+
+    @property
+    def entity_type(self) -> type[Entity]:
+        return SensorEntity
+
+    def create_entity_if_supported(
+        self,
+        controller: EntityController,
+        inverter_model: str,
+        register_type: RegisterType,
+        _entry: ConfigEntry,
+        inv_details: dict[str, Any],
+    ) -> Entity | None:
+        if not self._supports_inverter_model(self.models, inverter_model, register_type):
+            return None
+
+        return ModbusPollStatsSensor(controller, self, inv_details)
+
+
+class ModbusPollStatsSensor(ModbusEntityMixin, SensorEntity):
+    """Sensor which shows one of the controller's PollStats, updated at the end of each poll"""
+
+    def __init__(
+        self,
+        controller: EntityController,
+        entity_description: ModbusPollStatsSensorDescription,
+        inv_details: dict[str, Any],
+    ) -> None:
+        self._controller = controller
+        self.entity_description = entity_description
+        self._inv_details = inv_details
+        self._value = entity_description.value
+
+    async def async_added_to_hass(self) -> None:
+        """Add update callback after being added to hass."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self._controller.poll_stats.add_listener(self._update_value))
+        self._update_value()
+
+    def _update_value(self) -> None:
+        new_value = self._value(self._controller.poll_stats)
+        if new_value != self._attr_native_value:
+            self._attr_native_value = new_value
+            self.schedule_update_ha_state()
+
+    @property
+    def available(self) -> bool:
+        # These are most interesting when the inverter isn't responding
+        return True
+
+    @property
+    def addresses(self) -> list[int]:
+        return []
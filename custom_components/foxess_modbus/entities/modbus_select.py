@@ -11,6 +11,7 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.entity import Entity
 
 from ..common.entity_controller import EntityController
+from ..common.poll_tier import PollTier
 from ..common.register_type import RegisterType
 from .base_validator import BaseValidator
 from .entity_factory import EntityFactory
@@ -27,6 +28,7 @@ class ModbusSelectDescription(SelectEntityDescription, EntityFactory):
     address: list[ModbusAddressSpec]
     options_map: dict[int, str]
     validate: list[BaseValidator] = field(default_factory=list)
+    poll_tier: PollTier = PollTier.SLOW
 
     @property
     def entity_type(self) -> type[Entity]:
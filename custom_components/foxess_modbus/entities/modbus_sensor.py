@@ -13,12 +13,14 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.entity import Entity
 
 from ..common.entity_controller import EntityController
+from ..common.poll_tier import PollTier
 from ..common.register_type import RegisterType
 from ..const import ROUND_SENSOR_VALUES
 from .base_validator import BaseValidator
 from .entity_factory import EntityFactory
 from .inverter_model_spec import ModbusAddressesSpec
 from .modbus_entity_mixin import ModbusEntityMixin
+from .register_decoder import RegisterDecoder
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -33,6 +35,8 @@ class ModbusSensorDescription(SensorEntityDescription, EntityFactory):
     post_process: Callable[[float], float] | None = None
     validate: list[BaseValidator] = field(default_factory=list)
     signed: bool = True
+    poll_tier: PollTier = PollTier.NORMAL
+    consistency_group: str | None = None
 
     @property
     def entity_type(self) -> type[Entity]:
@@ -70,35 +74,38 @@ class ModbusSensor(ModbusEntityMixin, SensorEntity):
         self._addresses = addresses
         self._inv_details = inv_details
         self._round_to = round_to
+        self._decoder = RegisterDecoder(
+            addresses,
+            entity_description.signed,
+            entity_description.scale,
+            entity_description.post_process,
+            entity_description.validate,
+        )
         self._moving_average_filter: deque[float] | None = deque(maxlen=6) if round_to is not None else None
         self.entity_id = "sensor." + self._get_unique_id()
 
     def _calculate_native_value(self) -> int | float | None:
         """Return the value reported by the sensor."""
-        original = 0
-        for i, address in enumerate(self._addresses):
-            register_value = self._controller.read(address)
-            if register_value is None:
-                return None
-            original |= (register_value & 0xFFFF) << (i * 16)
-
-        entity_description = cast(ModbusSensorDescription, self.entity_description)
-
-        if entity_description.signed:
-            sign_bit = 1 << (len(self._addresses) * 16 - 1)
-            original = (original & (sign_bit - 1)) - (original & sign_bit)
-
-        value: float | int = original
-
-        if entity_description.scale is not None:
-            value = value * entity_description.scale
-        if entity_description.post_process is not None:
-            value = entity_description.post_process(float(value))
-        if not self._validate(entity_description.validate, value, original):
+        decoded = self._decoder.decode(self._controller.read)
+        if decoded is None:
+            return None
+
+        original, value = decoded
+        if not self._decoder.is_valid(value):
+            # Go through the validators again, to log which one failed
+            self._validate(cast(ModbusSensorDescription, self.entity_description).validate, value, original)
             return None
 
         return value
 
+    @property
+    def decoded_value(self) -> int | float | None:
+        """The current value of the registers, before any rounding. None if unknown or invalid"""
+        decoded = self._decoder.decode(self._controller.read)
+        if decoded is None or not self._decoder.is_valid(decoded[1]):
+            return None
+        return decoded[1]
+
     def _round_native_value(self, value: int | float | None) -> Any:
         def nearest_multiple(value: float, round_to: float) -> float:
             return round_to * round(value / round_to)
@@ -145,12 +152,10 @@ class ModbusSensor(ModbusEntityMixin, SensorEntity):
 
         return value
 
-    def update_callback(self, changed_addresses: set[int]) -> None:
+    @property
+    def wants_unchanged_updates(self) -> bool:
         # If we're using rounding and a filter, we need to respond to every update, even if the register hasn't changed
-        if self._round_to is None:
-            super().update_callback(changed_addresses)
-        else:
-            self._address_updated()
+        return self._round_to is not None
 
     def _address_updated(self) -> None:
         new_value = self._round_native_value(self._calculate_native_value())
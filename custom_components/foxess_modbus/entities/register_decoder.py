@@ -0,0 +1,75 @@
+"""Turns a sensor's registers into its value"""
+import math
+from typing import Callable
+
+from .base_validator import BaseValidator
+
+
+class RegisterDecoder:
+    """
+    Decodes the value of a sensor which is split over one or more registers.
+
+    Everything which doesn't change between updates (the sign bit, scale, post-processing and validation bounds) is
+    worked out once, when the sensor is created, so that decoding an update is a handful of integer operations rather
+    than repeated lookups on the entity description.
+    """
+
+    __slots__ = ("addresses", "_sign_bit", "_scale", "_post_process", "_min", "_max", "_other_validators")
+
+    def __init__(
+        self,
+        # Registers which this value is split over, from lower-order bits to higher-order bits
+        addresses: list[int],
+        signed: bool,
+        scale: float | None,
+        post_process: Callable[[float], float] | None,
+        validators: list[BaseValidator],
+    ) -> None:
+        self.addresses = tuple(addresses)
+        self._sign_bit = 1 << (len(addresses) * 16 - 1) if signed else 0
+        self._scale = scale
+        self._post_process = post_process
+
+        # Validators which are simple bounds are merged into a single range check
+        self._min = -math.inf
+        self._max = math.inf
+        self._other_validators: list[BaseValidator] = []
+        for validator in validators:
+            bounds = validator.bounds
+            if bounds is None:
+                self._other_validators.append(validator)
+            else:
+                self._min = max(self._min, bounds[0])
+                self._max = min(self._max, bounds[1])
+
+    def decode(self, read: Callable[[int], int | None]) -> tuple[int, int | float] | None:
+        """
+        Read and decode the value, without validating it.
+
+        :returns: (original value from the registers, processed value), or None if any register hasn't been read
+        """
+        original = 0
+        shift = 0
+        for address in self.addresses:
+            register_value = read(address)
+            if register_value is None:
+                return None
+            original |= (register_value & 0xFFFF) << shift
+            shift += 16
+
+        sign_bit = self._sign_bit
+        if sign_bit:
+            original = (original & (sign_bit - 1)) - (original & sign_bit)
+
+        value: int | float = original
+        if self._scale is not None:
+            value = value * self._scale
+        if self._post_process is not None:
+            value = self._post_process(float(value))
+        return original, value
+
+    def is_valid(self, value: int | float) -> bool:
+        """Check whether a decoded value passes all of the validators"""
+        if not self._min <= value <= self._max:
+            return False
+        return all(validator.validate(value) for validator in self._other_validators)
@@ -1,4 +1,6 @@
 """Validation"""
+import math
+
 from .base_validator import BaseValidator
 from .modbus_charge_period_sensors import is_time_value_valid
 
@@ -11,6 +13,10 @@ class Range(BaseValidator):
         self._min = min_value
         self._max = max_value
 
+    @property
+    def bounds(self) -> tuple[float, float] | None:
+        return (self._min, self._max)
+
     def validate(self, data: int | float) -> bool:
         """Validate a value against a set of rules"""
 
@@ -24,6 +30,10 @@ class Min(BaseValidator):
         """Init"""
         self._min = min_value
 
+    @property
+    def bounds(self) -> tuple[float, float] | None:
+        return (self._min, math.inf)
+
     def validate(self, data: int | float) -> bool:
         """Validate a value against a set of rules"""
 
@@ -37,6 +47,10 @@ class Max(BaseValidator):
         """Init"""
         self._max = max_value
 
+    @property
+    def bounds(self) -> tuple[float, float] | None:
+        return (-math.inf, self._max)
+
     def validate(self, data: int | float) -> bool:
         """Validate a value against a set of rules"""
 
@@ -1,3 +1,4 @@
+import contextlib
 from typing import Any
 from typing import Awaitable
 from typing import Callable
@@ -9,6 +10,8 @@ from homeassistant.helpers.selector import selector
 from pymodbus.exceptions import ConnectionException
 from pymodbus.exceptions import ModbusIOException
 
+from ..autodetect_scan import DEFAULT_SCAN_SLAVES
+from ..autodetect_scan import scan_for_inverters
 from ..common.exceptions import AutoconnectFailedError
 from ..common.exceptions import UnsupportedInverterError
 from ..const import AUX
@@ -139,7 +142,10 @@ class AdapterFlowSegment:
             port = user_input.get("adapter_port", _DEFAULT_PORT)
             host_and_port = f"{host}:{port}"
             slave = user_input.get("modbus_slave", _DEFAULT_SLAVE)
-            await self._autodetect_modbus_and_save_to_inverter_data(protocol, host_and_port, slave, adapter)
+            if user_input.get("scan_for_inverters", False):
+                await self._scan_and_save_to_inverter_data(protocol, host_and_port, slave, adapter)
+            else:
+                await self._autodetect_modbus_and_save_to_inverter_data(protocol, host_and_port, slave, adapter)
             return await self._on_complete()
 
         assert adapter is not None
@@ -183,6 +189,7 @@ class AdapterFlowSegment:
                 default=_DEFAULT_SLAVE,
             )
         ] = int
+        schema_parts[vol.Optional("scan_for_inverters", default=False)] = bool
 
         schema = vol.Schema(schema_parts)
 
@@ -249,6 +256,39 @@ class AdapterFlowSegment:
             description_placeholders=description_placeholders,
         )
 
+    async def _scan_and_save_to_inverter_data(
+        self,
+        protocol: str,
+        host: str,
+        slave: int,
+        adapter: InverterAdapter,
+    ) -> None:
+        """
+        Scan the adapter for inverters across all slave IDs and protocols, and add the details of the first one which
+        hasn't already been set up to self._inverter_data. The protocol and slave which the user entered are tried first
+        """
+        assert adapter.network_protocols is not None
+        protocols = sorted(adapter.network_protocols, key=lambda x: x != protocol)
+        # dict.fromkeys keeps the order, so we try the user's slave, then 247, then the rest
+        slaves = list(dict.fromkeys([slave, *DEFAULT_SCAN_SLAVES]))
+        inverter = None
+        async with contextlib.aclosing(scan_for_inverters(self._flow.hass, adapter, host, protocols, slaves)) as scan:
+            async for detected in scan:
+                if not any(
+                    x.inverter_protocol == detected.protocol and x.host == host and x.modbus_slave == detected.slave
+                    for x in self._other_inverters
+                ):
+                    inverter = detected
+                    break
+        if inverter is None:
+            raise ValidationFailedError({"base": "scan_found_no_inverters"})
+
+        self.inverter_data.inverter_base_model = inverter.base_model
+        self.inverter_data.inverter_model = inverter.full_model
+        self.inverter_data.inverter_protocol = inverter.protocol
+        self.inverter_data.modbus_slave = inverter.slave
+        self.inverter_data.host = host
+
     async def _autodetect_modbus_and_save_to_inverter_data(
         self,
         protocol: str,
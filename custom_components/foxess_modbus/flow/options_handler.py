@@ -7,15 +7,26 @@ from homeassistant.data_entry_flow import FlowResult
 from homeassistant.helpers.selector import selector
 
 from ..const import ADAPTER_ID
+from ..const import ASYNC_TRANSPORT
 from ..const import CONFIG_ENTRY_TITLE
+from ..const import DOMAIN
+from ..const import HOST
 from ..const import INVERTERS
+from ..const import MAX_POLL_RATE
 from ..const import MAX_READ
+from ..const import MODBUS_SLAVE
 from ..const import MODBUS_TYPE
+from ..const import PIPELINE_REQUESTS
 from ..const import POLL_RATE
 from ..const import ROUND_SENSOR_VALUES
+from ..const import SERIAL
+from ..const import TCP
 from ..inverter_adapters import ADAPTERS
+from ..max_read_calibration import ReadProbeResult
+from ..max_read_calibration import largest_reliable_max_read
 from .adapter_flow_segment import AdapterFlowSegment
 from .flow_handler_mixin import FlowHandlerMixin
+from .flow_handler_mixin import ValidationFailedError
 
 
 class OptionsHandler(FlowHandlerMixin, config_entries.OptionsFlow):
@@ -26,6 +37,7 @@ class OptionsHandler(FlowHandlerMixin, config_entries.OptionsFlow):
         self._selected_inverter_id: str | None = None
 
         self._adapter_segment: AdapterFlowSegment | None = None
+        self._calibration_results: list[ReadProbeResult] | None = None
 
     async def async_step_init(self, _user_input: dict[str, Any] | None = None) -> FlowResult:
         """Start the config flow"""
@@ -66,7 +78,7 @@ class OptionsHandler(FlowHandlerMixin, config_entries.OptionsFlow):
     async def async_step_inverter_options_category(self, _user_input: dict[str, Any] | None = None) -> FlowResult:
         """Let the user choose what sort of inverter options to configure"""
 
-        options = ["select_adapter_type", "inverter_advanced_options"]
+        options = ["select_adapter_type", "inverter_advanced_options", "calibrate_max_read"]
         return self.async_show_menu(step_id="inverter_options_category", menu_options=options)
 
     async def async_step_select_adapter_type(self, user_input: dict[str, Any] | None = None) -> FlowResult:
@@ -122,6 +134,11 @@ class OptionsHandler(FlowHandlerMixin, config_entries.OptionsFlow):
                 options[POLL_RATE] = poll_rate
             else:
                 options.pop(POLL_RATE, None)
+            max_poll_rate = user_input.get("max_poll_rate")
+            if max_poll_rate is not None:
+                options[MAX_POLL_RATE] = max_poll_rate
+            else:
+                options.pop(MAX_POLL_RATE, None)
             if user_input.get("round_sensor_values", False):
                 options[ROUND_SENSOR_VALUES] = True
             else:
@@ -131,8 +148,13 @@ class OptionsHandler(FlowHandlerMixin, config_entries.OptionsFlow):
                 options[MAX_READ] = max_read
             else:
                 options.pop(MAX_READ, None)
+            # These configure the connection, which is shared by every inverter on the same host
+            connection_options = {
+                ASYNC_TRANSPORT: user_input.get("async_transport", False),
+                PIPELINE_REQUESTS: user_input.get("pipeline_requests", False),
+            }
 
-            return self._save_selected_inverter_options(options)
+            return self._save_selected_inverter_options(options, connection_options)
 
         schema_parts: dict[Any, Any] = {}
 
@@ -145,9 +167,25 @@ class OptionsHandler(FlowHandlerMixin, config_entries.OptionsFlow):
                 description={"suggested_value": options.get(POLL_RATE)},
             )
         ] = vol.Any(None, vol.All(int, vol.Range(min=1)))
+        schema_parts[
+            vol.Optional(
+                "max_poll_rate",
+                description={"suggested_value": options.get(MAX_POLL_RATE)},
+            )
+        ] = vol.Any(None, vol.All(int, vol.Range(min=1)))
         schema_parts[vol.Optional("max_read", description={"suggested_value": options.get(MAX_READ)})] = vol.Any(
             None, vol.All(int, vol.Range(min=1))
         )
+        # The native async transport doesn't support serial connections
+        if combined_config_options[MODBUS_TYPE] != SERIAL:
+            schema_parts[vol.Required("async_transport", default=options.get(ASYNC_TRANSPORT, False))] = selector(
+                {"boolean": {}}
+            )
+        # Pipelining relies on Modbus TCP's transaction IDs
+        if combined_config_options[MODBUS_TYPE] == TCP:
+            schema_parts[vol.Required("pipeline_requests", default=options.get(PIPELINE_REQUESTS, False))] = selector(
+                {"boolean": {}}
+            )
 
         schema = vol.Schema(schema_parts)
 
@@ -167,10 +205,104 @@ class OptionsHandler(FlowHandlerMixin, config_entries.OptionsFlow):
             description_placeholders=description_placeholders,
         )
 
-    def _save_selected_inverter_options(self, inverter_options: dict[str, Any]) -> FlowResult:
+    async def async_step_calibrate_max_read(self, user_input: dict[str, Any] | None = None) -> FlowResult:
+        """Let the user probe how many registers their adapter can read at once"""
+
+        assert self._selected_inverter_id is not None
+
+        _, _, combined_config_options = self._config_for_inverter(self._selected_inverter_id)
+
+        async def body(_user_input: dict[str, Any]) -> FlowResult:
+            # Go through the running controller, so that we share its connection rather than opening another one
+            inverter_controllers = self.hass.data.get(DOMAIN, {}).get(self._config.entry_id, {}).get(INVERTERS, [])
+            controller = next(
+                (
+                    controller
+                    for inverter, controller in inverter_controllers
+                    if inverter[HOST] == combined_config_options[HOST]
+                    and inverter[MODBUS_SLAVE] == combined_config_options[MODBUS_SLAVE]
+                ),
+                None,
+            )
+            if controller is None:
+                raise ValidationFailedError({"base": "inverter_not_running"})
+
+            calibration_results: list[ReadProbeResult] = await controller.calibrate_max_read()
+            if largest_reliable_max_read(calibration_results) is None:
+                raise ValidationFailedError({"base": "calibration_failed"})
+            self._calibration_results = calibration_results
+            return await self.async_step_calibrate_max_read_result()
+
+        return await self.with_default_form(
+            body,
+            user_input,
+            "calibrate_max_read",
+            vol.Schema({}),
+            description_placeholders={"inverter": self._create_label_for_inverter(combined_config_options)},
+        )
+
+    async def async_step_calibrate_max_read_result(self, user_input: dict[str, Any] | None = None) -> FlowResult:
+        """Show the results of the max read calibration, and let the user save it"""
+
+        assert self._selected_inverter_id is not None
+        calibration_results = self._calibration_results
+        assert calibration_results is not None
+
+        _, options, combined_config_options = self._config_for_inverter(self._selected_inverter_id)
+
+        async def body(user_input: dict[str, Any]) -> FlowResult:
+            options[MAX_READ] = user_input["max_read"]
+            self._calibration_results = None
+            return self._save_selected_inverter_options(options)
+
+        results = "\n".join(
+            f"- {result.num_registers}: {result.num_attempts - result.num_failures}/{result.num_attempts} succeeded"
+            + (f", {result.average_latency * 1000:.0f} ms" if result.average_latency is not None else "")
+            for result in calibration_results
+        )
+        schema = vol.Schema(
+            {
+                vol.Required("max_read", default=largest_reliable_max_read(calibration_results)): vol.All(
+                    int, vol.Range(min=1)
+                ),
+            }
+        )
+
+        return await self.with_default_form(
+            body,
+            user_input,
+            "calibrate_max_read_result",
+            schema,
+            description_placeholders={
+                "results": results,
+                "current_max_read": f"{combined_config_options[MAX_READ]}",
+            },
+        )
+
+    def _save_selected_inverter_options(
+        self, inverter_options: dict[str, Any], connection_options: dict[str, bool] | None = None
+    ) -> FlowResult:
+        """
+        Save the options for the selected inverter. connection_options are boolean options which apply to the
+        connection, and are saved for every inverter which shares it
+        """
+        assert self._selected_inverter_id is not None
         # We must not mutate any part of self._config.options, otherwise HA thinks we haven't changed the options
         options = copy.deepcopy(dict(self._config.options))
-        options.setdefault(INVERTERS, {})[self._selected_inverter_id] = inverter_options
+        all_inverter_options = options.setdefault(INVERTERS, {})
+        all_inverter_options[self._selected_inverter_id] = inverter_options
+
+        if connection_options:
+            _, _, selected_config = self._config_for_inverter(self._selected_inverter_id)
+            connection = (selected_config[MODBUS_TYPE], selected_config[HOST])
+            for inverter_id, combined_config in self._combined_config_for_all_inverters().items():
+                if (combined_config[MODBUS_TYPE], combined_config[HOST]) == connection:
+                    options_to_update = all_inverter_options.setdefault(inverter_id, {})
+                    for key, value in connection_options.items():
+                        if value:
+                            options_to_update[key] = True
+                        else:
+                            options_to_update.pop(key, None)
 
         return self.async_create_entry(title=CONFIG_ENTRY_TITLE, data=options)
 
@@ -0,0 +1,69 @@
+"""Works out how long to wait after each request, before sending the next"""
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+# The delay we've always used. Some serial adapters and inverters need something like this, otherwise subsequent reads
+# fail. The HA modbus integration does the same
+MAX_INTER_FRAME_GAP = 30 / 1000
+
+# How much to shrink the gap by after each successful request
+_STEP = 1 / 1000
+# After a failure, we won't go within this much of the gap which failed again
+_FAILURE_MARGIN = 5 / 1000
+# After this many successful requests in a row, we lower the gap that we won't go below by _STEP. Failures might have
+# been caused by something else (e.g. the inverter restarting), so we give smaller gaps another go eventually
+_FLOOR_DECAY_REQUESTS = 500
+
+
+def rtu_inter_frame_gap(baudrate: int) -> float:
+    """
+    The minimum gap between Modbus RTU frames at the given baud rate, in seconds.
+
+    This is 3.5 character times (of 11 bits each: start, 8 data, parity/stop, stop). Above 19200 baud the spec fixes
+    this at 1.75ms.
+    """
+    if baudrate > 19200:
+        return 1.75 / 1000
+    return 3.5 * 11 / baudrate
+
+
+class InterFrameGap:
+    """
+    Tracks how long to wait after each request before sending the next one.
+
+    If min_delay < max_delay, this starts at max_delay (which is known to be safe), and shrinks towards min_delay while
+    requests succeed. If a request fails, the gap goes back to max_delay, and we don't shrink it to within
+    _FAILURE_MARGIN of the gap which failed. That floor drops back towards min_delay after every _FLOOR_DECAY_REQUESTS
+    successful requests in a row.
+
+    Only failures of the transport or framing should be recorded as failures: an exception response from the inverter
+    means that the request got through fine.
+    """
+
+    def __init__(self, min_delay: float, max_delay: float) -> None:
+        self._lowest_delay = min(min_delay, max_delay)
+        self._min_delay = self._lowest_delay
+        self._max_delay = max_delay
+        self._delay = max_delay
+        self._num_successes = 0
+
+    @property
+    def delay(self) -> float:
+        """The current gap, in seconds"""
+        return self._delay
+
+    def record_result(self, succeeded: bool) -> None:
+        """Record whether the last request succeeded"""
+        if succeeded:
+            self._num_successes += 1
+            if self._num_successes >= _FLOOR_DECAY_REQUESTS and self._min_delay > self._lowest_delay:
+                self._num_successes = 0
+                self._min_delay = max(self._min_delay - _STEP, self._lowest_delay)
+            self._delay = max(self._delay - _STEP, self._min_delay)
+        else:
+            self._num_successes = 0
+            if self._delay < self._max_delay:
+                _LOGGER.debug("Request failed with an inter-frame gap of %.1fms. Backing off", self._delay * 1000)
+                self._min_delay = min(self._delay + _FAILURE_MARGIN, self._max_delay)
+                self._delay = self._max_delay
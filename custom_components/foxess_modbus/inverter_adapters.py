@@ -12,6 +12,8 @@ from .const import POLL_RATE
 from .const import RTU_OVER_TCP
 from .const import TCP
 from .const import UDP
+from .retry_policy import DEFAULT_RETRY_POLICY
+from .retry_policy import RetryPolicy
 
 
 class InverterAdapterType(str, Enum):
@@ -27,6 +29,28 @@ _DEFAULT_POLL_RATE = 10
 _DEFAULT_MAX_READ = 20  # Be safe by default
 
 
+@dataclass(frozen=True)
+class ReadCostModel:
+    """
+    Rough model of how long it takes to read registers over a particular adapter, used to decide how to group reads.
+    Only the ratio between the two matters.
+    """
+
+    request_overhead: float  # Seconds of round-trip time per read request, regardless of its size
+    register_cost: float  # Additional seconds per register read
+
+
+# An RS485 bus at 9600 baud moves about 1ms per byte, so each register costs ~2ms. Each request has ~15 bytes of
+# framing, the inverter's turnaround time, and the 30ms delay which ModbusClient adds after each request.
+_SERIAL_READ_COST = ReadCostModel(request_overhead=0.07, register_cost=0.0023)
+# Network adapters talk to the same RS485 bus, plus a network round trip
+_NETWORK_READ_COST = ReadCostModel(request_overhead=0.1, register_cost=0.0023)
+# The W610 has a particularly large round-trip time
+_W610_READ_COST = ReadCostModel(request_overhead=0.3, register_cost=0.0023)
+# Over the inverter's LAN port, reading extra registers is almost free
+_LAN_READ_COST = ReadCostModel(request_overhead=0.04, register_cost=0.0001)
+
+
 class InverterAdapterConfigProvider(ABC):
     @abstractmethod
     def inverter_config(self, network_protocol: str) -> dict[str, Any]:
@@ -63,6 +87,10 @@ class InverterAdapter:
     network_protocols: list[str] | None = None  # If type is NETWORK/DIRECT, whether we support TCP and/or UDP
     recommended_protocol: str | None = None
     default_host: str | None = None
+    read_cost_model: ReadCostModel = _NETWORK_READ_COST
+    retry_policy: RetryPolicy = DEFAULT_RETRY_POLICY
+    # Seconds to wait after each request. If None, this is worked out from the connection type
+    inter_frame_gap: float | None = None
 
     @staticmethod
     def direct(
@@ -79,6 +107,7 @@ class InverterAdapter:
             setup_link=setup_link,
             network_protocols=[TCP],
             config=config,
+            read_cost_model=_LAN_READ_COST,
         )
 
     @staticmethod
@@ -97,6 +126,7 @@ class InverterAdapter:
             setup_link=setup_link,
             default_host=default_host,
             config=config,
+            read_cost_model=_SERIAL_READ_COST,
         )
 
     @staticmethod
@@ -106,6 +136,7 @@ class InverterAdapter:
         network_protocols: list[str],
         config: InverterAdapterConfigProvider,
         recommended_protocol: str | None = None,
+        read_cost_model: ReadCostModel = _NETWORK_READ_COST,
     ) -> "InverterAdapter":
         """Add a network connection to the inverter"""
 
@@ -117,6 +148,7 @@ class InverterAdapter:
             network_protocols=network_protocols,
             recommended_protocol=recommended_protocol,
             config=config,
+            read_cost_model=read_cost_model,
         )
 
 
@@ -181,6 +213,7 @@ ADAPTERS = {
             network_protocols=[TCP, UDP],
             recommended_protocol=UDP,
             config=_W610Config(),
+            read_cost_model=_W610_READ_COST,
         ),
         InverterAdapter.network(
             "waveshare_rs485_to_eth_b",
@@ -194,6 +227,7 @@ ADAPTERS = {
             network_protocols=[TCP, UDP, RTU_OVER_TCP],
             # This might be a W610 and they've been migrated
             config=_W610Config(),
+            read_cost_model=_W610_READ_COST,
         ),
     ]
 }
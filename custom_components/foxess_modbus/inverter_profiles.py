@@ -20,10 +20,17 @@ from .const import LAN
 from .entities import invalid_ranges
 from .entities.charge_periods import CHARGE_PERIODS
 from .entities.entity_descriptions import ENTITIES
+from .entities.entity_factory import EntityFactory
 from .entities.modbus_charge_period_config import ModbusChargePeriodConfig
+from .entities.modbus_entity_mixin import ModbusEntityMixin
 
 _LOGGER = logging.getLogger(__package__)
 
+# {(inverter model, register type, entity type): factories which create an entity for that combination}.
+# Whether a factory supports an inverter only depends on its model and register type, so we record which factories
+# created entities for the first inverter of each model, and only look at those for later inverters / entry reloads
+_ENTITY_FACTORY_INDEX: dict[tuple[str, RegisterType, type[Entity]], list[EntityFactory]] = {}
+
 
 class InverterModelConnectionTypeProfile:
     """Describes the capabilities of an inverter when connected to over a particular interface"""
@@ -55,17 +62,33 @@ class InverterModelConnectionTypeProfile:
 
         result = []
 
-        for entity_factory in ENTITIES:
-            if entity_factory.entity_type == entity_type:
-                entity = entity_factory.create_entity_if_supported(
-                    controller,
-                    self.inverter_model,
-                    self.register_type,
-                    entry,
-                    inverter_details,
-                )
-                if entity is not None:
-                    result.append(entity)
+        index_key = (self.inverter_model, self.register_type, entity_type)
+        entity_factories = _ENTITY_FACTORY_INDEX.get(index_key)
+        is_indexed = entity_factories is not None
+        if entity_factories is None:
+            entity_factories = [x for x in ENTITIES if x.entity_type == entity_type]
+
+        supported_factories = []
+        for entity_factory in entity_factories:
+            entity = entity_factory.create_entity_if_supported(
+                controller,
+                self.inverter_model,
+                self.register_type,
+                entry,
+                inverter_details,
+            )
+            if entity is not None:
+                result.append(entity)
+                supported_factories.append(entity_factory)
+
+        if not is_indexed:
+            _ENTITY_FACTORY_INDEX[index_key] = supported_factories
+
+        # Derived sensors take their values straight from other entities of the same inverter
+        entities_by_key = {x.entity_description.key: x for x in result}
+        for entity in result:
+            if isinstance(entity, ModbusEntityMixin):
+                entity.link_sources(entities_by_key)
 
         return result
 
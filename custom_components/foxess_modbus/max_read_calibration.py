@@ -0,0 +1,86 @@
+"""Works out how many registers an adapter can reliably read at once"""
+import logging
+import time
+from dataclasses import dataclass
+
+from pymodbus.exceptions import ConnectionException
+
+from .common.register_type import RegisterType
+from .inverter_profiles import InverterModelConnectionTypeProfile
+from .modbus_client import ModbusClient
+from .modbus_client import ModbusClientFailedError
+
+_LOGGER = logging.getLogger(__name__)
+
+# The block sizes we try, in order. Modbus doesn't allow reading more than 125 registers at once
+_PROBE_SIZES = [8, 16, 20, 32, 50, 64, 80, 100, 125]
+_ATTEMPTS_PER_SIZE = 5
+
+# All inverters have a block of real-time data (PV voltages, etc) starting here, which we can read without side-effects
+_PROBE_START_ADDRESSES = {
+    RegisterType.INPUT: 11000,
+    RegisterType.HOLDING: 31000,
+}
+
+
+@dataclass
+class ReadProbeResult:
+    """The result of repeatedly reading a block of a particular size"""
+
+    num_registers: int
+    num_attempts: int
+    num_failures: int
+    average_latency: float | None  # Seconds, averaged over the successful reads
+
+    @property
+    def is_reliable(self) -> bool:
+        """Whether all reads of this size succeeded"""
+        return self.num_failures == 0
+
+
+async def calibrate_max_read(
+    client: ModbusClient,
+    slave: int,
+    connection_type_profile: InverterModelConnectionTypeProfile,
+) -> list[ReadProbeResult]:
+    """
+    Read increasingly large blocks of registers from the inverter, until reads start failing.
+
+    :returns: The results for each block size tried. The last one is unreliable, unless we ran out of sizes to try
+    """
+    register_type = connection_type_profile.register_type
+    start_address = _PROBE_START_ADDRESSES[register_type]
+
+    results: list[ReadProbeResult] = []
+    for num_registers in _PROBE_SIZES:
+        if connection_type_profile.overlaps_invalid_range(start_address, start_address + num_registers - 1):
+            break
+
+        latencies: list[float] = []
+        num_failures = 0
+        for _ in range(_ATTEMPTS_PER_SIZE):
+            start = time.monotonic()
+            try:
+                await client.read_registers(start_address, num_registers, register_type, slave)
+                latencies.append(time.monotonic() - start)
+            except (ConnectionException, ModbusClientFailedError) as ex:
+                _LOGGER.debug("Calibration read of %s registers from %s failed: %s", num_registers, client, ex)
+                num_failures += 1
+
+        result = ReadProbeResult(
+            num_registers=num_registers,
+            num_attempts=_ATTEMPTS_PER_SIZE,
+            num_failures=num_failures,
+            average_latency=sum(latencies) / len(latencies) if latencies else None,
+        )
+        _LOGGER.debug("Calibration of %s: %s", client, result)
+        results.append(result)
+        if not result.is_reliable:
+            break
+
+    return results
+
+
+def largest_reliable_max_read(results: list[ReadProbeResult]) -> int | None:
+    """Fetch the largest block size which could be read reliably, or None if none could be"""
+    return max((result.num_registers for result in results if result.is_reliable), default=None)
@@ -5,9 +5,7 @@ import select
 import socket
 import time
 from typing import Any
-from typing import Callable
 from typing import Type
-from typing import TypeVar
 from typing import cast
 
 from homeassistant.core import HomeAssistant
@@ -15,25 +13,41 @@ from pymodbus.client import ModbusSerialClient
 from pymodbus.client import ModbusTcpClient
 from pymodbus.client import ModbusUdpClient
 from pymodbus.exceptions import ConnectionException
+from pymodbus.exceptions import ModbusIOException
+from pymodbus.pdu import ModbusRequest
 from pymodbus.pdu import ModbusResponse
+from pymodbus.register_read_message import ReadHoldingRegistersRequest
 from pymodbus.register_read_message import ReadHoldingRegistersResponse
+from pymodbus.register_read_message import ReadInputRegistersRequest
 from pymodbus.register_read_message import ReadInputRegistersResponse
+from pymodbus.register_write_message import WriteMultipleRegistersRequest
 from pymodbus.register_write_message import WriteMultipleRegistersResponse
+from pymodbus.register_write_message import WriteSingleRegisterRequest
 from pymodbus.register_write_message import WriteSingleRegisterResponse
 from pymodbus.transaction import ModbusRtuFramer
 from pymodbus.transaction import ModbusSocketFramer
 
+from .circuit_breaker import CircuitBreaker
+from .circuit_breaker import CircuitState
 from .common.register_type import RegisterType
 from .const import LAN
 from .const import RTU_OVER_TCP
 from .const import SERIAL
 from .const import TCP
 from .const import UDP
+from .inter_frame_gap import MAX_INTER_FRAME_GAP
+from .inter_frame_gap import InterFrameGap
+from .inter_frame_gap import rtu_inter_frame_gap
 from .inverter_adapters import InverterAdapter
+from .modbus_transport import ModbusTransport
+from .modbus_transport import TcpTransport
+from .modbus_transport import UdpTransport
+from .raw_register_responses import register_raw_responses
 
 _LOGGER = logging.getLogger(__name__)
 
-T = TypeVar("T")
+# How many requests we'll send without waiting for a response, if pipelining is enabled
+_MAX_PIPELINED_REQUESTS = 4
 
 
 class CustomModbusTcpClient(ModbusTcpClient):
@@ -142,14 +156,17 @@ _CLIENTS = {
     TCP: {
         "client": CustomModbusTcpClient,
         "framer": ModbusSocketFramer,
+        "transport": TcpTransport,
     },
     UDP: {
         "client": ModbusUdpClient,
         "framer": ModbusSocketFramer,
+        "transport": UdpTransport,
     },
     RTU_OVER_TCP: {
         "client": CustomModbusTcpClient,
         "framer": ModbusRtuFramer,
+        "transport": TcpTransport,
     },
 }
 
@@ -157,7 +174,15 @@ _CLIENTS = {
 class ModbusClient:
     """Modbus"""
 
-    def __init__(self, hass: HomeAssistant, protocol: str, adapter: InverterAdapter, config: dict[str, Any]) -> None:
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        protocol: str,
+        adapter: InverterAdapter,
+        config: dict[str, Any],
+        use_async_transport: bool = False,
+        pipeline_requests: bool = False,
+    ) -> None:
         """Init"""
         self._hass = hass
         self._config = config
@@ -174,16 +199,56 @@ class ModbusClient:
             "delay_on_connect": 1 if adapter.connection_type == LAN else None,
         }
 
-        # Some serial devices need a short delay after polling. Also do this for the inverter, just
-        # in case it helps.
-        self._poll_delay = 30 / 1000 if protocol == SERIAL or adapter.connection_type == LAN else 0
+        # Some serial devices need a short delay after polling. Also do this for the inverter, just in case it helps.
+        # For RTU, the spec gives a minimum gap. We start with a safe gap, and shrink it towards the minimum while
+        # requests succeed.
+        if adapter.inter_frame_gap is not None:
+            self._inter_frame_gap = InterFrameGap(adapter.inter_frame_gap, adapter.inter_frame_gap)
+        elif protocol == SERIAL:
+            self._inter_frame_gap = InterFrameGap(rtu_inter_frame_gap(config["baudrate"]), MAX_INTER_FRAME_GAP)
+        elif adapter.connection_type == LAN:
+            self._inter_frame_gap = InterFrameGap(0, MAX_INTER_FRAME_GAP)
+        else:
+            self._inter_frame_gap = InterFrameGap(0, 0)
+
+        # Shared by all inverters which use this client, as they all sit behind the same adapter
+        self._circuit_breaker = CircuitBreaker()
+
+        # The native asyncio transports don't support serial: that always goes through the sync pymodbus client.
+        # Pipelining needs transaction IDs, so is only supported over Modbus TCP, and needs the native transport.
+        self._client: Any = None
+        self._transport: ModbusTransport | None = None
+        if pipeline_requests and protocol == TCP:
+            self._transport = client["transport"](**config, max_in_flight=_MAX_PIPELINED_REQUESTS)
+        elif use_async_transport and "transport" in client:
+            self._transport = client["transport"](**config)
+        else:
+            self._client = client["client"](**config)
+            register_raw_responses(self._client.framer.decoder)
+
+    @property
+    def is_pipelined(self) -> bool:
+        """Whether several requests can be made at the same time, without waiting for earlier responses"""
+        return self._transport is not None and self._transport.is_pipelined
 
-        self._client = client["client"](**config)
+    @property
+    def protocol(self) -> str:
+        """The protocol used to talk to the adapter: one of TCP, UDP, SERIAL, RTU_OVER_TCP"""
+        return self._protocol
+
+    @property
+    def circuit_state(self) -> CircuitState:
+        """Whether requests are currently being sent, or held back because the adapter isn't responding"""
+        return self._circuit_breaker.state
 
     async def close(self) -> None:
         """Close connection"""
         _LOGGER.debug("Closing connection to modbus on %s", self)
-        await self._async_pymodbus_call(self._client.close)
+        async with self._lock:
+            if self._transport is not None:
+                await self._transport.close()
+            else:
+                await self._hass.async_add_executor_job(self._client.close)
 
     async def read_registers(
         self,
@@ -193,22 +258,33 @@ class ModbusClient:
         slave: int,
     ) -> list[int]:
         """Read registers"""
+        response = await self._read_registers_response(start_address, num_registers, register_type, slave)
+        return cast(list[int], response.registers)
+
+    async def read_registers_raw(
+        self,
+        start_address: int,
+        num_registers: int,
+        register_type: RegisterType,
+        slave: int,
+    ) -> memoryview:
+        """Read registers, returning the raw register bytes from the response (big-endian, 2 bytes per register)"""
+        response = await self._read_registers_response(start_address, num_registers, register_type, slave)
+        return cast(memoryview, response.payload)
+
+    async def _read_registers_response(
+        self,
+        start_address: int,
+        num_registers: int,
+        register_type: RegisterType,
+        slave: int,
+    ) -> Any:
         expected_response_type: Type[Any]
         if register_type == RegisterType.HOLDING:
-            response = await self._async_pymodbus_call(
-                self._client.read_holding_registers,
-                start_address,
-                num_registers,
-                slave,
-            )
+            response = await self._execute(ReadHoldingRegistersRequest(start_address, num_registers, slave))
             expected_response_type = ReadHoldingRegistersResponse
         elif register_type == RegisterType.INPUT:
-            response = await self._async_pymodbus_call(
-                self._client.read_input_registers,
-                start_address,
-                num_registers,
-                slave,
-            )
+            response = await self._execute(ReadInputRegistersRequest(start_address, num_registers, slave))
             expected_response_type = ReadInputRegistersResponse
         else:
             raise AssertionError()
@@ -239,27 +315,17 @@ class ModbusClient:
                 response,
             )
 
-        return cast(list[int], response.registers)
+        return response
 
     async def write_registers(self, register_address: int, register_values: list[int], slave: int) -> None:
         """Write registers"""
         expected_response_type: Type[Any]
         if len(register_values) > 1:
             register_values = [int(i) for i in register_values]
-            response = await self._async_pymodbus_call(
-                self._client.write_registers,
-                register_address,
-                register_values,
-                slave,
-            )
+            response = await self._execute(WriteMultipleRegistersRequest(register_address, register_values, slave))
             expected_response_type = WriteMultipleRegistersResponse
         else:
-            response = await self._async_pymodbus_call(
-                self._client.write_register,
-                register_address,
-                int(register_values[0]),
-                slave,
-            )
+            response = await self._execute(WriteSingleRegisterRequest(register_address, int(register_values[0]), slave))
             expected_response_type = WriteSingleRegisterResponse
 
         if response.isError():
@@ -283,14 +349,43 @@ class ModbusClient:
                 response,
             )
 
-    async def _async_pymodbus_call(self, call: Callable[..., T], *args: Any) -> T:
-        """Convert async to sync pymodbus call."""
+    async def _execute(self, request: ModbusRequest) -> Any:
+        """Send a request, unless the circuit breaker says that the adapter isn't responding"""
+        self._circuit_breaker.before_request()
+        try:
+            result = await self._execute_request(request)
+        except asyncio.CancelledError:
+            self._circuit_breaker.record_cancelled()
+            raise
+        except Exception:
+            self._circuit_breaker.record_result(succeeded=False)
+            raise
+        # An exception response still means that the adapter (and inverter) responded
+        self._circuit_breaker.record_result(succeeded=not isinstance(result, ModbusIOException))
+        return result
+
+    async def _execute_request(self, request: ModbusRequest) -> Any:
+        """Send a request using either the native async transport, or the sync pymodbus client"""
+
+        # The transport takes care of limiting the number of requests in flight. We don't add a delay between requests:
+        # the point of pipelining is to avoid the gaps between them
+        if self._transport is not None and self._transport.is_pipelined:
+            return await self._transport.execute(request)
+
         async with self._lock:
-            result = await self._hass.async_add_executor_job(call, *args)
-            # This seems to be required for serial devices, otherwise subsequent reads fail
-            # The HA modbus integration does the same
-            if self._poll_delay > 0:
-                await asyncio.sleep(self._poll_delay)
+            try:
+                if self._transport is not None:
+                    result = await self._transport.execute(request)
+                else:
+                    result = await self._hass.async_add_executor_job(self._client.execute, request)
+            except Exception:
+                self._inter_frame_gap.record_result(succeeded=False)
+                raise
+
+            # Exception responses (e.g. an illegal address) mean that the frame got through fine
+            self._inter_frame_gap.record_result(succeeded=not isinstance(result, ModbusIOException))
+            if self._inter_frame_gap.delay > 0:
+                await asyncio.sleep(self._inter_frame_gap.delay)
             return result
 
     def __str__(self) -> str:
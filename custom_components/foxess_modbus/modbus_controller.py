@@ -1,46 +1,110 @@
 """Modbus controller"""
+import asyncio
+import bisect
+import graphlib
+import itertools
 import logging
-import threading
-from contextlib import contextmanager
+import math
+import time
 from datetime import datetime
-from datetime import timedelta
+from datetime import timezone
 from typing import Any
 from typing import Iterable
-from typing import Iterator
+from typing import NamedTuple
 
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.event import async_track_time_interval
 from pymodbus.exceptions import ConnectionException
 
+from .adaptive_poll_rate import AdaptivePollRate
 from .common.entity_controller import EntityController
 from .common.entity_controller import ModbusControllerEntity
 from .common.exceptions import AutoconnectFailedError
 from .common.exceptions import UnsupportedInverterError
+from .common.poll_stats import PollStats
+from .common.poll_tier import PollTier
 from .common.register_type import RegisterType
 from .common.unload_controller import UnloadController
 from .const import MAX_READ
+from .inverter_adapters import ReadCostModel
 from .inverter_profiles import INVERTER_PROFILES
 from .inverter_profiles import InverterModelConnectionTypeProfile
+from .max_read_calibration import ReadProbeResult
+from .max_read_calibration import calibrate_max_read
 from .modbus_client import ModbusClient
 from .modbus_client import ModbusClientFailedError
+from .register_bank import RegisterBank
+from .retry_policy import DEFAULT_RETRY_POLICY
+from .retry_policy import RetryPolicy
 
 _LOGGER = logging.getLogger(__name__)
 
 # How many failed polls before we mark sensors as Unavailable
 _NUM_FAILED_POLLS_FOR_DISCONNECTION = 5
 
+# How many polls (each poll_rate seconds apart) between reads of each tier. Every tier is read on the first poll after
+# connecting, and after the set of addresses changes
+_POLL_TIER_INTERVALS = {
+    PollTier.FAST: 1,
+    PollTier.NORMAL: 3,
+    PollTier.SLOW: 30,
+}
+
 _MODEL_START_ADDRESS = 30000
 _MODEL_LENGTH = 15
 
 
-@contextmanager
-def _acquire_nonblocking(lock: threading.Lock) -> Iterator[bool]:
-    locked = lock.acquire(False)
-    try:
-        yield locked
-    finally:
-        if locked:
-            lock.release()
+class _ReadSkippedError(Exception):
+    """Raised instead of reading a block which has been failing, while the RetryPolicy says to leave it alone"""
+
+
+class _RefreshResult(NamedTuple):
+    """Outcome of a single refresh"""
+
+    # Whether everything which was due got read, apart from blocks which the RetryPolicy is backing off from
+    complete: bool
+    # Whether any read failed (skipped reads don't count)
+    read_failed: bool
+
+
+def _group_read_ranges(read_ranges: list[tuple[int, int]], units: Iterable[Iterable[int]]) -> list[int]:
+    """
+    Put the read ranges into groups, such that all of the addresses in each unit are read by ranges in the same group.
+
+    :returns: The group number of each read range
+    """
+    starts = [start for start, _ in read_ranges]
+    parents = list(range(len(read_ranges)))
+
+    def find(index: int) -> int:
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    for unit in units:
+        root: int | None = None
+        for address in unit:
+            index = bisect.bisect_right(starts, address) - 1
+            # Addresses in tiers which aren't being read at the moment don't have a range
+            if index < 0 or address >= starts[index] + read_ranges[index][1]:
+                continue
+            if root is None:
+                root = find(index)
+            else:
+                parents[find(index)] = root
+
+    return [find(index) for index in range(len(read_ranges))]
+
+
+def _discard_listener(
+    address_listeners: dict[int, set[ModbusControllerEntity]], address: int, listener: ModbusControllerEntity
+) -> None:
+    """Remove listener from address_listeners[address], dropping the address once nothing is listening to it"""
+    listeners = address_listeners.get(address)
+    if listeners is None:
+        return
+    listeners.discard(listener)
+    if not listeners:
+        del address_listeners[address]
 
 
 class ModbusController(EntityController, UnloadController):
@@ -48,47 +112,115 @@ class ModbusController(EntityController, UnloadController):
 
     def __init__(
         self,
-        hass: HomeAssistant,
         client: ModbusClient,
         connection_type_profile: InverterModelConnectionTypeProfile,
         slave: int,
         poll_rate: int,
+        max_poll_rate: int | None,
         max_read: int,
+        read_cost_model: ReadCostModel,
+        retry_policy: RetryPolicy = DEFAULT_RETRY_POLICY,
     ) -> None:
         """Init"""
-        self._hass = hass
         self._update_listeners: set[ModbusControllerEntity] = set()
-        self._data: dict[int, int | None] = {}
+        # {address: entities which use that address}. Used to only notify the entities whose addresses have changed
+        self._address_listeners: dict[int, set[ModbusControllerEntity]] = {}
+        # As above, but only for entities which want to be notified whenever their addresses are read
+        self._address_read_listeners: dict[int, set[ModbusControllerEntity]] = {}
+        # Entities which are derived from other entities, ordered so that each comes after all of its sources
+        self._derived_listeners: list[ModbusControllerEntity] = []
+        # The last-read value of each address which an entity uses
+        self._registers = RegisterBank()
         self._client = client
         self._connection_type_profile = connection_type_profile
         self.charge_periods = connection_type_profile.create_charge_periods()
         self._slave = slave
-        self._poll_rate = poll_rate
+        # If max_poll_rate is set, we adapt the poll rate between poll_rate and max_poll_rate
+        self._poll_rate = AdaptivePollRate(poll_rate, max_poll_rate if max_poll_rate is not None else poll_rate)
         self._max_read = max_read
-        self._refresh_lock = threading.Lock()
+        self._read_cost_model = read_cost_model
+        # The fastest PollTier of any entity using each address in _registers
+        self._address_tiers: dict[int, PollTier] = {}
+        # Cached results of _create_read_ranges, keyed by the set of tiers being read. Cleared whenever _address_tiers
+        # changes
+        self._read_ranges: dict[frozenset[PollTier], list[tuple[int, int]]] = {}
+        # Cached results of _get_read_range_groups, keyed in the same way. Cleared whenever the entities change
+        self._read_range_groups: dict[frozenset[PollTier], list[int]] = {}
+        self._retry_policy = retry_policy
+        # {(start, count): number of polls in a row on which reading that block failed}
+        self._block_failures: dict[tuple[int, int], int] = {}
+        # {(start, count): the poll number on which to try reading that block again}
+        self._block_retry_polls: dict[tuple[int, int], int] = {}
+        self._num_polls = 0
+        self._poll_stats = PollStats()
+        # Number of successful polls since the addresses last changed, used to decide which tiers are due
+        self._num_successful_polls = 0
         self._num_failed_poll_attempts = 0
         self._is_connected = True  # Start off assuming we can connect
+        # When we last committed anything read from the inverter, or None if we haven't yet
+        self._last_read_time: datetime | None = None
+        # Register values restored from a snapshot, kept until the first successful poll so that they can be given to
+        # entities which register late
+        self._restored_registers: dict[int, int] | None = None
 
         # Setup mixins
         EntityController.__init__(self)
         UnloadController.__init__(self)
 
-        if self._hass is not None:
-            refresh = async_track_time_interval(
-                self._hass,
-                self._refresh,
-                timedelta(seconds=self._poll_rate),
-            )
-
-            self._unload_listeners.append(refresh)
-
     @property
     def is_connected(self) -> bool:
         return self._is_connected
 
+    @property
+    def poll_stats(self) -> PollStats:
+        return self._poll_stats
+
+    @property
+    def poll_interval(self) -> float:
+        """The time in seconds between the start of one poll and the start of the next"""
+        return self._poll_rate.interval
+
+    @property
+    def is_showing_restored_data(self) -> bool:
+        """Whether register values come from a restored snapshot, rather than the inverter"""
+        return self._restored_registers is not None
+
     def read(self, address: int) -> int | None:
         """Modbus status"""
-        return self._data.get(address)
+        return self._registers.get(address)
+
+    @property
+    def last_read_time(self) -> datetime | None:
+        """When register values were last read from the inverter, or None if no poll has succeeded yet"""
+        return self._last_read_time
+
+    def registers_snapshot(self) -> dict[int, int] | None:
+        """Fetch {address: value} of all registers read so far, or None if no poll has succeeded yet"""
+        return self._registers.snapshot() if self._last_read_time is not None else None
+
+    def restore_registers(self, values: dict[int, int]) -> None:
+        """
+        Show the given register values (saved by registers_snapshot before a restart) until the first successful poll.
+        Values read from the inverter always take priority.
+
+        Only registers in the SLOW tier (settings and the like) are restored. Values which change more quickly, such as
+        power, are left unknown until they're read: otherwise a value from hours ago would be shown and recorded as
+        current
+        """
+        if self._last_read_time is not None:
+            return
+        self._restored_registers = values
+        self._apply_restored_registers()
+
+    def _apply_restored_registers(self) -> None:
+        """Fill in the SLOW-tier registers which haven't been read yet from _restored_registers"""
+        assert self._restored_registers is not None
+        values = {
+            address: value
+            for address, value in self._restored_registers.items()
+            if self._address_tiers.get(address) == PollTier.SLOW
+        }
+        self._notify_update(self._registers.restore(values))
 
     async def write_register(self, address: int, value: int) -> None:
         await self.write_registers(address, [value])
@@ -104,133 +236,297 @@ class ModbusController(EntityController, UnloadController):
         )
         try:
             await self._client.write_registers(start_address, values, self._slave)
-            changed_addresses = set()
-            for i, value in enumerate(values):
-                address = start_address + i
-                value = int(value)  # Ensure that we've been given an int
-                # Only store the result of the write if it's a register we care about ourselves
-                if self._data.get(address, value) != value:
-                    self._data[address] = value
-                    changed_addresses.add(address)
+            # Only store the result of the write if it's a register we care about ourselves
+            changed_addresses = self._registers.write(start_address, [int(x) for x in values])
             self._notify_update(changed_addresses)
         except Exception as ex:
             # Failed writes are always bad
             _LOGGER.error("Failed to write registers", exc_info=True)
             raise ex
 
-    async def _refresh(self, _time: datetime) -> None:
-        """Refresh modbus data"""
-        # Make sure that we don't do two refreshes at the same time, if one is too slow
-        with _acquire_nonblocking(self._refresh_lock) as acquired:
-            if not acquired:
-                _LOGGER.warning(
-                    "Aborting refresh of %s %s as a previous refresh is still in progress. Is your poll rate '%s' too "
-                    "high?",
-                    self._client,
-                    self._slave,
-                    self._poll_rate,
-                )
-                return
+    async def poll(self) -> None:
+        """Poll the inverter. Called by the PollScheduler"""
+        start = time.monotonic()
+        result = await self._refresh()
+        duration = time.monotonic() - start
+
+        self._poll_rate.record_poll(duration, result.complete)
+        interval = self._poll_rate.interval
+        self._poll_stats.record_poll(duration, failed=result.read_failed, overran=duration > interval)
+        if duration > interval:
+            _LOGGER.warning(
+                "Refresh of %s %s took %.1fs, which is longer than the poll rate of %.1fs. Is your poll rate too high?",
+                self._client,
+                self._slave,
+                duration,
+                interval,
+            )
 
-            # List of (start address, [read values starting at that address])
-            read_values: list[tuple[int, list[int]]] = []
-            exception: Exception | None = None
-            try:
-                for (
-                    start_address,
-                    num_reads,
-                ) in self._create_read_ranges(self._max_read):
-                    _LOGGER.debug(
-                        "Reading addresses on %s %s: (%s, %s)",
-                        self._client,
-                        self._slave,
-                        start_address,
-                        num_reads,
-                    )
-                    reads = await self._client.read_registers(
-                        start_address,
-                        num_reads,
-                        self._connection_type_profile.register_type,
-                        self._slave,
-                    )
-                    read_values.append((start_address, reads))
-
-                # If we made it to here, then all reads succeeded. Write them to _data and notify the sensors.
-                # This avoids recording reads if poll failed partway through (ensuring that we don't record potentially
-                # inconsistent data)
-                changed_addresses = set()
-                for start_address, reads in read_values:
-                    for i, value in enumerate(reads):
-                        address = start_address + i
-                        # We might be reading a register we don't care about (for efficiency). Discard it if so
-                        if self._data.get(address, value) != value:
-                            changed_addresses.add(address)
-                            self._data[address] = value
-
-                _LOGGER.debug(
-                    "Refresh of %s %s complete - notifying sensors: %s",
-                    self._client,
-                    self._slave,
-                    changed_addresses,
-                )
-                self._notify_update(changed_addresses)
-            except ConnectionException as ex:
-                exception = ex
-                _LOGGER.debug(
-                    "Failed to connect to %s %s: %s",
-                    self._client,
-                    self._slave,
-                    ex,
-                )
-            except ModbusClientFailedError as ex:
-                exception = ex
-                _LOGGER.debug(
-                    "Modbus error when polling %s %s: %s",
+    async def _refresh(self) -> _RefreshResult:
+        """Refresh modbus data, returning how much of it succeeded"""
+        exception: Exception | None = None
+        complete = False
+        num_read_ranges = 0
+        num_committed_ranges = 0
+        tiers = self._get_due_poll_tiers()
+        self._num_polls += 1
+        try:
+            read_ranges = self._get_read_ranges(tiers)
+            num_read_ranges = len(read_ranges)
+            results = await self._read_all_ranges(read_ranges)
+
+            # Write the successful reads to _registers and notify the sensors. If any read in a consistency group
+            # failed, we discard the rest of that group's reads, so that we don't record potentially inconsistent data.
+            # Other groups are independent, so one bad read doesn't throw away the whole poll.
+            # We might be reading registers we don't care about (for efficiency): _registers discards these
+            groups = self._get_read_range_groups(tiers)
+            failed_groups = {
+                group for group, result in zip(groups, results, strict=True) if isinstance(result, BaseException)
+            }
+            committed_ranges: list[tuple[int, int]] = []
+            changed_addresses: set[int] = set()
+            for read_range, group, result in zip(read_ranges, groups, results, strict=True):
+                if group not in failed_groups:
+                    assert not isinstance(result, BaseException)
+                    changed_addresses.update(self._registers.write_raw(read_range[0], result))
+                    committed_ranges.append(read_range)
+            num_committed_ranges = len(committed_ranges)
+            read_addresses = [
+                address
+                for address in self._address_read_listeners
+                if any(start <= address < start + count for start, count in committed_ranges)
+            ]
+
+            _LOGGER.debug(
+                "Refresh of %s %s complete (%s/%s reads committed) - notifying sensors: %s",
+                self._client,
+                self._slave,
+                num_committed_ranges,
+                len(read_ranges),
+                changed_addresses,
+            )
+            self._notify_update(changed_addresses, read_addresses)
+
+            # Skipped blocks weren't read this poll, and blocks which have failed enough for the RetryPolicy to back
+            # off from them are dealt with by that backoff: neither stops the poll from counting as complete.
+            # Otherwise one permanently failing block would stop the tiers from ever moving on
+            failures = [
+                (read_range, result)
+                for read_range, result in zip(read_ranges, results, strict=True)
+                if isinstance(result, BaseException) and not isinstance(result, _ReadSkippedError)
+            ]
+            complete = all(
+                isinstance(result, ModbusClientFailedError) and read_range in self._block_retry_polls
+                for read_range, result in failures
+            )
+
+            # Report the first failure (if any) below
+            for _, result in failures:
+                raise result
+        except ConnectionException as ex:
+            exception = ex
+            _LOGGER.debug(
+                "Failed to connect to %s %s: %s",
+                self._client,
+                self._slave,
+                ex,
+            )
+        except ModbusClientFailedError as ex:
+            exception = ex
+            _LOGGER.debug(
+                "Modbus error when polling %s %s: %s",
+                self._client,
+                self._slave,
+                ex.response,
+            )
+        except Exception as ex:
+            exception = ex
+            _LOGGER.warning(
+                "General exception when polling %s %s: %s",
+                self._client,
+                self._slave,
+                repr(ex),
+                exc_info=True,
+            )
+
+        # Do this after recording new values in _registers. That way the sensors show the new values when they
+        # become available after a disconnection
+        # If some reads succeeded, the inverter is there, even if the poll as a whole failed
+        if exception is None or num_committed_ranges > 0:
+            self._num_failed_poll_attempts = 0
+            if not self._is_connected:
+                _LOGGER.info(
+                    "%s %s - poll succeeded: now connected",
                     self._client,
                     self._slave,
-                    ex.response,
                 )
-            except Exception as ex:
-                exception = ex
+                self._is_connected = True
+                self._notify_is_connected_changed()
+
+        if num_committed_ranges > 0 or (exception is None and num_read_ranges == 0):
+            self._last_read_time = datetime.now(timezone.utc)
+            self._restored_registers = None
+        if complete:
+            # Only move on to the next set of tiers if this poll was complete, so that a failed poll of a slow tier is
+            # retried next time
+            self._num_successful_polls += 1
+        elif exception is not None and num_committed_ranges == 0 and self._is_connected:
+            self._num_failed_poll_attempts += 1
+            if self._num_failed_poll_attempts >= _NUM_FAILED_POLLS_FOR_DISCONNECTION:
                 _LOGGER.warning(
-                    "General exception when polling %s %s: %s",
+                    "%s %s - %s failed poll attempts: now not connected. Last error: %s",
                     self._client,
                     self._slave,
-                    repr(ex),
-                    exc_info=True,
+                    self._num_failed_poll_attempts,
+                    exception,
                 )
+                self._is_connected = False
+                # We don't know what happened while we were disconnected (maybe the inverter was replaced), so read
+                # every tier once we reconnect
+                self._num_successful_polls = 0
+                self._notify_is_connected_changed()
+
+        return _RefreshResult(complete=complete, read_failed=exception is not None)
 
-            # Do this after recording new values in _data. That way the sensors show the new values when they
-            # become available after a disconnection
-            if exception is None:
-                self._num_failed_poll_attempts = 0
-                if not self._is_connected:
-                    _LOGGER.info(
-                        "%s %s - poll succeeded: now connected",
-                        self._client,
-                        self._slave,
-                    )
-                    self._is_connected = True
-                    self._notify_is_connected_changed()
-            elif self._is_connected:
-                self._num_failed_poll_attempts += 1
-                if self._num_failed_poll_attempts >= _NUM_FAILED_POLLS_FOR_DISCONNECTION:
-                    _LOGGER.warning(
-                        "%s %s - %s failed poll attempts: now not connected. Last error: %s",
-                        self._client,
-                        self._slave,
-                        self._num_failed_poll_attempts,
-                        exception,
-                    )
-                    self._is_connected = False
-                    self._notify_is_connected_changed()
-
-    def _create_read_ranges(self, max_read: int) -> Iterable[tuple[int, int]]:
+    async def _read_all_ranges(self, read_ranges: list[tuple[int, int]]) -> list[memoryview | BaseException]:
         """
-        Generates a set of read ranges to cover the addresses of all registers on this inverter,
-        respecting the maxumum number of registers to read at a time
+        Read all of the given ranges, returning the raw register bytes for each, or the exception if that read failed.
+        Raises if something unexpected went wrong
+        """
+        results: list[memoryview | BaseException]
+        if self._client.is_pipelined:
+            # Send all of the reads at once. Wait for all of them to complete, even if one fails, so that we don't
+            # leave any running in the background
+            results = await asyncio.gather(
+                *(self._read_range_with_retries(start_address, num_reads) for start_address, num_reads in read_ranges),
+                return_exceptions=True,
+            )
+        else:
+            results = []
+            for start_address, num_reads in read_ranges:
+                try:
+                    results.append(await self._read_range_with_retries(start_address, num_reads))
+                except ConnectionException as ex:
+                    # If we can't connect, there's no point trying the rest
+                    results.extend([ex] * (len(read_ranges) - len(results)))
+                    break
+                except (ModbusClientFailedError, _ReadSkippedError) as ex:
+                    results.append(ex)
+
+        for result in results:
+            if isinstance(result, BaseException) and not isinstance(
+                result, (ConnectionException, ModbusClientFailedError, _ReadSkippedError)
+            ):
+                raise result
+        return results
+
+    async def _read_range_with_retries(self, start_address: int, num_reads: int) -> memoryview:
+        """
+        Read a block, retrying as set out by the RetryPolicy. Raises _ReadSkippedError if the block has been failing
+        and we're backing off from it.
+
+        Failures to connect aren't retried here: the client's circuit breaker deals with an unresponsive adapter
+        """
+        block = (start_address, num_reads)
+        retry_poll = self._block_retry_polls.get(block)
+        if retry_poll is not None and self._num_polls < retry_poll:
+            self._poll_stats.record_skipped_read()
+            raise _ReadSkippedError(
+                f"Skipping ({start_address}, {num_reads}) until poll {retry_poll} after "
+                f"{self._block_failures[block]} failed polls"
+            )
+
+        for attempt in itertools.count():
+            try:
+                result = await self._read_range(start_address, num_reads)
+                break
+            except ModbusClientFailedError:
+                if attempt >= self._retry_policy.immediate_retries:
+                    num_failures = self._block_failures.get(block, 0) + 1
+                    self._block_failures[block] = num_failures
+                    polls_to_skip = self._retry_policy.polls_to_skip(num_failures)
+                    if polls_to_skip > 0:
+                        self._block_retry_polls[block] = self._num_polls + polls_to_skip + 1
+                    raise
+            self._poll_stats.record_retry()
+            await asyncio.sleep(self._retry_policy.next_retry_delay())
+
+        self._block_failures.pop(block, None)
+        self._block_retry_polls.pop(block, None)
+        return result
+
+    async def _read_range(self, start_address: int, num_reads: int) -> memoryview:
+        _LOGGER.debug(
+            "Reading addresses on %s %s: (%s, %s)",
+            self._client,
+            self._slave,
+            start_address,
+            num_reads,
+        )
+        start = time.monotonic()
+        succeeded = False
+        try:
+            result = await self._client.read_registers_raw(
+                start_address,
+                num_reads,
+                self._connection_type_profile.register_type,
+                self._slave,
+            )
+            succeeded = True
+            return result
+        finally:
+            self._poll_stats.record_request(time.monotonic() - start, num_reads, succeeded)
+
+    def _get_due_poll_tiers(self) -> frozenset[PollTier]:
+        """Fetches the set of tiers which should be read on this poll"""
+        return frozenset(
+            tier for tier, interval in _POLL_TIER_INTERVALS.items() if self._num_successful_polls % interval == 0
+        )
+
+    def _get_read_range_groups(self, tiers: frozenset[PollTier]) -> list[int]:
+        """
+        Fetches the consistency group of each of the read ranges for the given tiers. Read ranges in the same group are
+        only recorded if they are all read successfully
+        """
+        groups = self._read_range_groups.get(tiers)
+        if groups is None:
+            # Each entity's addresses need to be consistent with each other (e.g. the high and low words of a 32-bit
+            # value), as do all of the addresses of entities which share a consistency group
+            units: list[list[int]] = []
+            named_units: dict[str, list[int]] = {}
+            for listener in self._update_listeners:
+                if listener.consistency_group is not None:
+                    named_units.setdefault(listener.consistency_group, []).extend(listener.addresses)
+                elif len(listener.addresses) > 1:
+                    units.append(listener.addresses)
+            units.extend(named_units.values())
+            groups = _group_read_ranges(self._get_read_ranges(tiers), units)
+            self._read_range_groups[tiers] = groups
+        return groups
+
+    def _get_read_ranges(self, tiers: frozenset[PollTier]) -> list[tuple[int, int]]:
+        """Fetches the read ranges to cover all registers in the given tiers, creating them if necessary"""
+        read_ranges = self._read_ranges.get(tiers)
+        if read_ranges is None:
+            addresses = sorted(address for address, tier in self._address_tiers.items() if tier in tiers)
+            read_ranges = self._create_read_ranges(addresses, self._max_read)
+            self._read_ranges[tiers] = read_ranges
+            _LOGGER.debug(
+                "Created read ranges for %s %s, tiers %s: %s",
+                self._client,
+                self._slave,
+                sorted(tier.name for tier in tiers),
+                read_ranges,
+            )
+        return read_ranges
 
-        :returns: Sequence of tuples of (start_address, num_registers_to_read)
+    def _create_read_ranges(self, addresses: list[int], max_read: int) -> list[tuple[int, int]]:
+        """
+        Generates a set of read ranges to cover the given sorted addresses,
+        respecting the maxumum number of registers to read at a time, and minimising the time taken to perform all reads
+        as estimated by self._read_cost_model
+
+        :returns: List of tuples of (start_address, num_registers_to_read)
         """
 
         # The idea here is that read operations are expensive (there seems to be a large round-trip time at least
@@ -243,35 +539,49 @@ class ModbusController(EntityController, UnloadController):
         # 1,2 / 5,6,7,8,9,10 -> 1,2,3,4,5 / 6,7,8,9,10
         # 1,2,3 / 5,6,7 / 9,10 -> 1,2,3,4,5 / 6,7,8,9,10
 
-        # The problem as a whole looks like it's NP-hard (although I can't find a name for it).
-        # We're therefore going to use a fairly simple algorithm which just makes each read as large as it can be.
-
-        start_address: int | None = None
-        read_size = 0
-        # TODO: Do we want to cache the result of this?
-        for address in sorted(self._data.keys()):
-            if start_address is None:
-                start_address, read_size = address, 1
-            # If we're just increasing the previous read size by 1, then don't test whether we're extending
-            # the read over an invalid range (as we assume that registers we're reading to read won't be
-            # inside invalid ranges, tested in __init__). This also assumes that read_size != max_read here.
-            elif address == start_address + 1 or (
-                address <= start_address + max_read - 1
-                and not self._connection_type_profile.overlaps_invalid_range(start_address, address - 1)
-            ):
-                # There's a previous read which we can extend
-                read_size = address - start_address + 1
-            else:
-                # There's a previous read, and we can't extend it to cover this address
-                yield (start_address, read_size)
-                start_address, read_size = address, 1
-
-            if read_size == max_read:
-                yield (start_address, read_size)
-                start_address, read_size = None, 0
+        # Since each read covers a contiguous run of the sorted addresses, this is an interval covering problem which
+        # we can solve exactly with dynamic programming. best_costs[j] holds the cheapest way of reading the first j
+        # addresses, which is found by trying each possible start for the read which ends at address j-1. There are at
+        # most max_read of those, so this is O(n * max_read).
+
+        if not addresses:
+            return []
+
+        request_cost = self._read_cost_model.request_overhead
+        register_cost = self._read_cost_model.register_cost
+
+        # gap_is_invalid[i] is True if the registers between addresses[i - 1] and addresses[i] overlap an invalid
+        # range, meaning that no read can span both addresses. We assume that the addresses themselves don't overlap
+        # an invalid range (tested in register_modbus_entity).
+        gap_is_invalid = [False] + [
+            address - previous > 1 and self._connection_type_profile.overlaps_invalid_range(previous + 1, address - 1)
+            for previous, address in itertools.pairwise(addresses)
+        ]
+
+        best_costs = [0.0] + [math.inf] * len(addresses)
+        # best_starts[j] holds the index into addresses of the start of the last read when reading the first j addresses
+        best_starts = [0] * (len(addresses) + 1)
+        for end_index, end_address in enumerate(addresses):
+            start_index = end_index
+            while start_index >= 0 and end_address - addresses[start_index] < max_read:
+                cost = (
+                    best_costs[start_index] + request_cost + (end_address - addresses[start_index] + 1) * register_cost
+                )
+                if cost < best_costs[end_index + 1]:
+                    best_costs[end_index + 1] = cost
+                    best_starts[end_index + 1] = start_index
+                if gap_is_invalid[start_index]:
+                    break
+                start_index -= 1
 
-        if start_address is not None:
-            yield (start_address, read_size)
+        read_ranges: list[tuple[int, int]] = []
+        end_index = len(addresses)
+        while end_index > 0:
+            start_index = best_starts[end_index]
+            read_ranges.append((addresses[start_index], addresses[end_index - 1] - addresses[start_index] + 1))
+            end_index = start_index
+        read_ranges.reverse()
+        return read_ranges
 
     def register_modbus_entity(self, listener: ModbusControllerEntity) -> None:
         self._update_listeners.add(listener)
@@ -280,27 +590,80 @@ class ModbusController(EntityController, UnloadController):
                 f"Entity {listener} address {address} overlaps an invalid range in "
                 f"{self._connection_type_profile.invalid_register_ranges}"
             )
-            if address not in self._data:
-                self._data[address] = None
+            self._address_listeners.setdefault(address, set()).add(listener)
+            if listener.wants_unchanged_updates:
+                self._address_read_listeners.setdefault(address, set()).add(listener)
+        self._read_range_groups = {}
+        self._update_address_tiers()
+        self._update_derived_listeners()
+        if self._restored_registers is not None:
+            self._apply_restored_registers()
 
     def remove_modbus_entity(self, listener: ModbusControllerEntity) -> None:
         self._update_listeners.discard(listener)
-        # If this was the only entity listening on this address, remove it from self._data
-        other_addresses = {address for entity in self._update_listeners for address in entity.addresses}
         for address in listener.addresses:
-            if address not in other_addresses and address in self._data:
-                del self._data[address]
-
-    def _notify_update(self, changed_addresses: set[int]) -> None:
-        """Notify listeners"""
+            _discard_listener(self._address_read_listeners, address, listener)
+            _discard_listener(self._address_listeners, address, listener)
+        self._read_range_groups = {}
+        self._update_address_tiers()
+        self._update_derived_listeners()
+
+    def _update_derived_listeners(self) -> None:
+        """Recalculate the order in which derived entities are updated, after entities have been added or removed"""
+        graph = {listener: listener.sources for listener in self._update_listeners if listener.sources}
+        # static_order also includes the sources which aren't themselves derived
+        self._derived_listeners = [x for x in graphlib.TopologicalSorter(graph).static_order() if x in graph]
+
+    def _update_address_tiers(self) -> None:
+        """Recalculate the tier of each address, after entities have been added or removed"""
+        address_tiers: dict[int, PollTier] = {}
         for listener in self._update_listeners:
+            for address in listener.addresses:
+                tier = address_tiers.get(address)
+                if tier is None or listener.poll_tier.value < tier.value:
+                    address_tiers[address] = listener.poll_tier
+
+        if address_tiers != self._address_tiers:
+            if address_tiers.keys() != self._address_tiers.keys():
+                # Addresses which are no longer used are dropped, and new ones haven't been read yet
+                self._registers = self._registers.with_addresses(address_tiers)
+            self._address_tiers = address_tiers
+            self._read_ranges = {}
+            # The blocks we read will have changed, so start afresh
+            self._block_failures = {}
+            self._block_retry_polls = {}
+            # Make sure that any new addresses are read on the next poll, regardless of their tier
+            self._num_successful_polls = 0
+
+    def _notify_update(self, changed_addresses: set[int], read_addresses: Iterable[int] = ()) -> None:
+        """
+        Notify the listeners which use any of the changed addresses, or which want to know about any read address, and
+        then the derived entities whose sources were notified
+        """
+        listeners: set[ModbusControllerEntity] = set()
+        for address in changed_addresses:
+            listeners.update(self._address_listeners.get(address, ()))
+        for address in read_addresses:
+            listeners.update(self._address_read_listeners.get(address, ()))
+
+        for listener in listeners:
             listener.update_callback(changed_addresses)
 
+        # Each derived entity is only updated once, however many of its sources were updated
+        for listener in self._derived_listeners:
+            if any(source in listeners for source in listener.sources):
+                listener.update_callback(changed_addresses)
+                listeners.add(listener)
+
     def _notify_is_connected_changed(self) -> None:
         """Notify listeners that the availability states of the inverter changed"""
         for listener in self._update_listeners:
             listener.is_connected_changed_callback()
 
+    async def calibrate_max_read(self) -> list[ReadProbeResult]:
+        """Find out how many registers can reliably be read at once from this inverter, see max_read_calibration"""
+        return await calibrate_max_read(self._client, self._slave, self._connection_type_profile)
+
     @staticmethod
     async def autodetect(client: ModbusClient, slave: int, adapter_config: dict[str, Any]) -> tuple[str, str]:
         """
@@ -316,42 +679,7 @@ class ModbusController(EntityController, UnloadController):
         try:
             pymodbus_logger.addHandler(spy_handler)
 
-            # All known inverter types expose the model number at holding register 30000 onwards.
-            # (The H1 series additional expose some model info in input registers))
-            # Holding registers 30000-300015 seem to be all used for the model, with registers
-            # after the model containing 32 (an ascii space) or 0. Input registers 10008 onwards
-            # are for the serial number (and there doesn't seem to be enough space to hold all models!)
-            # The H3 starts the model number with a space, annoyingly.
-            result: list[int] = []
-            start_address = _MODEL_START_ADDRESS
-            while len(result) < _MODEL_LENGTH:
-                result.extend(
-                    await client.read_registers(
-                        start_address,
-                        min(adapter_config[MAX_READ], _MODEL_LENGTH - len(result)),
-                        RegisterType.HOLDING,
-                        slave,
-                    )
-                )
-                start_address += adapter_config[MAX_READ]
-
-            # Stop as soon as we find something non-printable-ASCII
-            full_model = ""
-            for char in result:
-                if 0x20 <= char < 0x7F:
-                    full_model += chr(char)
-                else:
-                    break
-            # Take off tailing spaces and H3's leading space
-            full_model = full_model.strip()
-            for model in INVERTER_PROFILES.values():
-                if full_model.startswith(model.model):
-                    _LOGGER.info("Autodetected inverter as '%s' (%s)", model.model, full_model)
-                    return model.model, full_model
-
-            # We've read the model type, but been unable to match it against a supported model
-            _LOGGER.error("Did not recognise inverter model '%s' (%s)", full_model, result)
-            raise UnsupportedInverterError(full_model)
+            return await ModbusController.read_model(client, slave, adapter_config[MAX_READ])
         except Exception as ex:
             _LOGGER.error("Autodetect: failed to connect to (%s)", client, exc_info=True)
             raise AutoconnectFailedError(spy_handler.records) from ex
@@ -359,6 +687,50 @@ class ModbusController(EntityController, UnloadController):
             pymodbus_logger.removeHandler(spy_handler)
             await client.close()
 
+    @staticmethod
+    async def read_model(client: ModbusClient, slave: int, max_read: int) -> tuple[str, str]:
+        """
+        Read the inverter model from the given slave. This doesn't close the client, or do any error handling.
+
+        :returns: Tuple of (inverter type name e.g. "H1", inverter full name e.g. "H1-3.7-E")
+        """
+        # All known inverter types expose the model number at holding register 30000 onwards.
+        # (The H1 series additional expose some model info in input registers))
+        # Holding registers 30000-300015 seem to be all used for the model, with registers
+        # after the model containing 32 (an ascii space) or 0. Input registers 10008 onwards
+        # are for the serial number (and there doesn't seem to be enough space to hold all models!)
+        # The H3 starts the model number with a space, annoyingly.
+        result: list[int] = []
+        start_address = _MODEL_START_ADDRESS
+        while len(result) < _MODEL_LENGTH:
+            result.extend(
+                await client.read_registers(
+                    start_address,
+                    min(max_read, _MODEL_LENGTH - len(result)),
+                    RegisterType.HOLDING,
+                    slave,
+                )
+            )
+            start_address += max_read
+
+        # Stop as soon as we find something non-printable-ASCII
+        full_model = ""
+        for char in result:
+            if 0x20 <= char < 0x7F:
+                full_model += chr(char)
+            else:
+                break
+        # Take off tailing spaces and H3's leading space
+        full_model = full_model.strip()
+        for model in INVERTER_PROFILES.values():
+            if full_model.startswith(model.model):
+                _LOGGER.info("Autodetected inverter as '%s' (%s)", model.model, full_model)
+                return model.model, full_model
+
+        # We've read the model type, but been unable to match it against a supported model
+        _LOGGER.error("Did not recognise inverter model '%s' (%s)", full_model, result)
+        raise UnsupportedInverterError(full_model)
+
 
 class _SpyHandler(logging.Handler):
     def __init__(self) -> None:
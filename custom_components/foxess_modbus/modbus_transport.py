@@ -0,0 +1,357 @@
+"""Native asyncio transports, used to talk Modbus without tying up an executor thread"""
+import asyncio
+import contextlib
+import logging
+import socket
+from abc import ABC
+from abc import abstractmethod
+from typing import Any
+from typing import cast
+
+from pymodbus.constants import Defaults
+from pymodbus.exceptions import ConnectionException
+from pymodbus.exceptions import ModbusException
+from pymodbus.exceptions import ModbusIOException
+from pymodbus.factory import ClientDecoder
+from pymodbus.pdu import ModbusRequest
+from pymodbus.pdu import ModbusResponse
+
+from .raw_register_responses import register_raw_responses
+
+_LOGGER = logging.getLogger(__name__)
+
+# MBAP transaction IDs are 16 bits
+_MAX_TRANSACTION_ID = 0xFFFF
+# Transaction ID, protocol ID, length. The length covers the unit ID and PDU which follow
+_MBAP_HEADER_LENGTH = 6
+
+
+class ModbusTransport(ABC):
+    """
+    Base class for an asyncio-based Modbus transport.
+
+    This takes care of framing (using the pymodbus framers, so that we get the same request/response types as the
+    pymodbus clients) and timeouts. Subclasses provide the means of moving bytes to and from the remote device.
+
+    By default this isn't safe to call concurrently: the caller is expected to only have one request in flight at a
+    time. If max_in_flight > 1 (only supported with MBAP framing), up to that many requests can be sent without waiting
+    for earlier responses, and responses are matched to requests using their transaction IDs.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        framer: type[Any],
+        timeout: float = Defaults.Timeout,
+        delay_on_connect: int | None = None,
+        max_in_flight: int = 1,
+    ) -> None:
+        self._host = host
+        self._port = port
+        decoder = ClientDecoder()
+        register_raw_responses(decoder)
+        self._framer = framer(decoder)
+        self._timeout = timeout
+        self._delay_on_connect = delay_on_connect
+        self._transaction_id = 0
+        self._is_connected = False
+        self._connect_lock = asyncio.Lock()
+
+        self._is_pipelined = max_in_flight > 1
+        # Without transaction IDs, there's no way to match up responses to requests
+        assert not self._is_pipelined or self._framer.method == "socket", "Pipelining needs MBAP framing"
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        # {transaction ID: future for its response}, when pipelined
+        self._pending_responses: dict[int, asyncio.Future[ModbusResponse]] = {}
+        self._receive_task: asyncio.Task[None] | None = None
+
+    @property
+    def is_connected(self) -> bool:
+        """Returns whether the transport currently has an open connection"""
+        return self._is_connected
+
+    @property
+    def is_pipelined(self) -> bool:
+        """Returns whether execute can be called concurrently"""
+        return self._is_pipelined
+
+    async def execute(self, request: ModbusRequest) -> ModbusResponse | ModbusException:
+        """
+        Send the given request and wait for its response.
+
+        In keeping with the pymodbus sync clients, failures to communicate with the device (timeouts, bad frames) are
+        returned as a ModbusIOException. Failures to connect raise a ConnectionException.
+        """
+        if self._is_pipelined:
+            async with self._in_flight:
+                return await self._execute_pipelined(request)
+
+        await self._ensure_connected()
+
+        packet = self._build_packet(request)
+
+        # Throw away anything left over from a previous request which timed out
+        self._framer.resetFrame()
+
+        try:
+            _LOGGER.debug("Sending to %s: %s", self, packet.hex())
+            self._send(packet)
+            return await asyncio.wait_for(self._receive_response(request), self._timeout)
+        except asyncio.TimeoutError:
+            # The response might still turn up later, so don't let it get confused for the next response
+            await self.close()
+            return ModbusIOException(f"No response received after {self._timeout}s", request.function_code)
+        except ModbusIOException as ex:
+            # Raised by the framer if it can't decode the response
+            await self.close()
+            return ex
+        except OSError as ex:
+            await self.close()
+            raise ConnectionException(f"Connection to {self} failed: {ex!r}") from ex
+
+    async def _execute_pipelined(self, request: ModbusRequest) -> ModbusResponse | ModbusException:
+        await self._ensure_connected()
+
+        packet = self._build_packet(request)
+        transaction_id = request.transaction_id
+        response_future: asyncio.Future[ModbusResponse] = asyncio.get_running_loop().create_future()
+        self._pending_responses[transaction_id] = response_future
+
+        try:
+            _LOGGER.debug("Sending to %s: %s", self, packet.hex())
+            self._send(packet)
+            return await asyncio.wait_for(response_future, self._timeout)
+        except asyncio.TimeoutError:
+            # Unlike the non-pipelined case, there's no need to close the connection: if the response turns up later,
+            # its transaction ID won't match any pending request
+            return ModbusIOException(f"No response received after {self._timeout}s", request.function_code)
+        except ModbusIOException as ex:
+            # Set by _receive_responses if it can't decode the response
+            return ex
+        except OSError as ex:
+            await self.close()
+            raise ConnectionException(f"Connection to {self} failed: {ex!r}") from ex
+        finally:
+            self._pending_responses.pop(transaction_id, None)
+
+    async def close(self) -> None:
+        """Close the connection, if it's open"""
+        if self._is_connected:
+            _LOGGER.debug("Closing connection to %s", self)
+            self._is_connected = False
+
+            receive_task = self._receive_task
+            self._receive_task = None
+            if receive_task is not None and receive_task is not asyncio.current_task():
+                receive_task.cancel()
+            self._fail_pending_responses(ConnectionException(f"Connection to {self} closed"))
+
+            await self._close()
+
+    def _build_packet(self, request: ModbusRequest) -> bytes:
+        self._transaction_id = self._transaction_id % _MAX_TRANSACTION_ID + 1
+        request.transaction_id = self._transaction_id
+        return cast(bytes, self._framer.buildPacket(request))
+
+    async def _ensure_connected(self) -> None:
+        # If pipelined, several requests might try to connect at the same time
+        async with self._connect_lock:
+            if self._is_connected:
+                return
+
+            _LOGGER.debug("Connecting to %s", self)
+            try:
+                await asyncio.wait_for(self._open(), self._timeout)
+            except (OSError, asyncio.TimeoutError) as ex:
+                raise ConnectionException(f"Failed to connect to {self}: {ex!r}") from ex
+            self._is_connected = True
+            self._framer.resetFrame()
+
+            if self._is_pipelined:
+                self._receive_task = asyncio.create_task(self._receive_responses())
+
+            # See CustomModbusTcpClient.connect
+            if self._delay_on_connect is not None:
+                await asyncio.sleep(self._delay_on_connect)
+
+    async def _receive_response(self, request: ModbusRequest) -> ModbusResponse:
+        responses: list[ModbusResponse] = []
+
+        def on_response(response: ModbusResponse) -> None:
+            # A late response to a request which previously timed out will have a different transaction ID (for
+            # framers which support transaction IDs: the RTU framer sets the transaction ID to the unit ID). Ignore it.
+            if response.transaction_id == request.transaction_id:
+                responses.append(response)
+            else:
+                _LOGGER.debug("Ignoring response with unexpected transaction ID %s", response.transaction_id)
+
+        buffer = b""
+        while not responses:
+            data = await self._receive()
+            _LOGGER.debug("Received from %s: %s", self, data.hex())
+
+            # The RTU framer copes with partial frames itself
+            if self._framer.method != "socket":
+                self._framer.processIncomingPacket(data, on_response, unit=request.unit_id)
+                continue
+
+            buffer += data
+            frames, buffer = _split_mbap_frames(buffer)
+            for frame in frames:
+                self._framer.processIncomingPacket(frame, on_response, unit=request.unit_id)
+
+        return responses[0]
+
+    async def _receive_responses(self) -> None:
+        """When pipelined, receives all responses and hands them to the matching request"""
+
+        def on_response(response: ModbusResponse) -> None:
+            response_future = self._pending_responses.get(response.transaction_id)
+            if response_future is not None and not response_future.done():
+                response_future.set_result(response)
+            else:
+                _LOGGER.debug("Ignoring response with unexpected transaction ID %s", response.transaction_id)
+
+        buffer = b""
+        try:
+            while True:
+                data = await self._receive()
+                _LOGGER.debug("Received from %s: %s", self, data.hex())
+
+                buffer += data
+                frames, buffer = _split_mbap_frames(buffer)
+                for frame in frames:
+                    try:
+                        # Requests might be to different units, and we match on transaction ID anyway
+                        self._framer.processIncomingPacket(frame, on_response, unit=0, single=True)
+                    except ModbusIOException as ex:
+                        self._framer.resetFrame()
+                        response_future = self._pending_responses.get(int.from_bytes(frame[0:2], "big"))
+                        if response_future is not None and not response_future.done():
+                            response_future.set_exception(ex)
+        except OSError as ex:
+            _LOGGER.debug("Connection to %s failed: %r", self, ex)
+            await self.close()
+
+    def _fail_pending_responses(self, ex: Exception) -> None:
+        for response_future in self._pending_responses.values():
+            if not response_future.done():
+                response_future.set_exception(ex)
+
+    @abstractmethod
+    async def _open(self) -> None:
+        """Open the underlying connection"""
+
+    @abstractmethod
+    def _send(self, packet: bytes) -> None:
+        """Send the given packet"""
+
+    @abstractmethod
+    async def _receive(self) -> bytes:
+        """Wait for the next chunk of data from the remote device"""
+
+    @abstractmethod
+    async def _close(self) -> None:
+        """Close the underlying connection"""
+
+    def __str__(self) -> str:
+        return f"{self._host}:{self._port}"
+
+
+def _split_mbap_frames(buffer: bytes) -> tuple[list[bytes], bytes]:
+    """
+    Split as many complete MBAP frames as possible off the start of buffer.
+
+    The socket framer treats an incomplete MBAP frame as an error (the pymodbus sync clients always read a complete
+    frame before handing it over), so we need to only give it whole frames.
+
+    :returns: Tuple of (complete frames, remaining data)
+    """
+    frames: list[bytes] = []
+    while len(buffer) >= _MBAP_HEADER_LENGTH:
+        frame_length = _MBAP_HEADER_LENGTH + int.from_bytes(buffer[4:_MBAP_HEADER_LENGTH], "big")
+        if len(buffer) < frame_length:
+            break
+        frames.append(buffer[:frame_length])
+        buffer = buffer[frame_length:]
+    return frames, buffer
+
+
+class TcpTransport(ModbusTransport):
+    """Transport for Modbus TCP and RTU-over-TCP, using asyncio streams"""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+
+    async def _open(self) -> None:
+        self._reader, self._writer = await asyncio.open_connection(self._host, self._port)
+        # Disable Nagle's algorithm, see CustomModbusTcpClient.connect
+        sock = self._writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, True)
+
+    def _send(self, packet: bytes) -> None:
+        assert self._writer is not None
+        self._writer.write(packet)
+
+    async def _receive(self) -> bytes:
+        assert self._reader is not None
+        data = await self._reader.read(1024)
+        if data == b"":
+            raise ConnectionResetError("Connection closed by remote device")
+        return data
+
+    async def _close(self) -> None:
+        writer = self._writer
+        self._reader, self._writer = None, None
+        if writer is not None:
+            writer.close()
+            # We're closing the connection anyway, so don't care if that fails
+            with contextlib.suppress(OSError):
+                await writer.wait_closed()
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self) -> None:
+        self.datagrams: asyncio.Queue[bytes | Exception] = asyncio.Queue()
+
+    def datagram_received(self, data: bytes, _addr: tuple[str | Any, int]) -> None:
+        self.datagrams.put_nowait(data)
+
+    def error_received(self, exc: Exception) -> None:
+        self.datagrams.put_nowait(exc)
+
+
+class UdpTransport(ModbusTransport):
+    """Transport for Modbus UDP, using an asyncio datagram endpoint"""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._transport: asyncio.DatagramTransport | None = None
+        self._protocol: _DatagramProtocol | None = None
+
+    async def _open(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._transport, self._protocol = await loop.create_datagram_endpoint(
+            _DatagramProtocol, remote_addr=(self._host, self._port)
+        )
+
+    def _send(self, packet: bytes) -> None:
+        assert self._transport is not None
+        self._transport.sendto(packet)
+
+    async def _receive(self) -> bytes:
+        assert self._protocol is not None
+        data = await self._protocol.datagrams.get()
+        if isinstance(data, Exception):
+            raise data
+        return data
+
+    async def _close(self) -> None:
+        transport = self._transport
+        self._transport, self._protocol = None, None
+        if transport is not None:
+            transport.close()
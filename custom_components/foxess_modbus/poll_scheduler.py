@@ -0,0 +1,91 @@
+"""Schedules polls of all of the inverters which share a ModbusClient"""
+import logging
+import time
+from datetime import datetime
+from typing import Callable
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.event import async_call_later
+
+from .common.unload_controller import UnloadController
+from .modbus_client import ModbusClient
+from .modbus_controller import ModbusController
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PollScheduler(UnloadController):
+    """
+    Polls all of the ModbusControllers (one per inverter / slave) which share a ModbusClient.
+
+    If each controller ran its own timer, they would contend for the client at arbitrary offsets, and a poll of one
+    inverter would regularly stall part-way through while another inverter was polled. Instead we run a single timer per
+    client, and poll each controller which is due in turn. Each controller keeps its own poll rate.
+
+    The order in which due controllers are polled rotates each cycle, so that no inverter always waits for the others.
+    """
+
+    def __init__(self, hass: HomeAssistant, client: ModbusClient) -> None:
+        self._hass = hass
+        self._client = client
+        self._controllers: list[ModbusController] = []
+        # {controller: time.monotonic() at which it should next be polled}
+        self._next_poll_times: dict[ModbusController, float] = {}
+        self._num_cycles = 0
+        self._cancel_next_cycle: Callable[[], None] | None = None
+        self._is_polling = False
+        self._is_stopped = False
+
+        UnloadController.__init__(self)
+        self._unload_listeners.append(self._stop)
+
+    def add_controller(self, controller: ModbusController) -> None:
+        """Start polling the given controller. Its first poll happens after its poll interval"""
+        self._controllers.append(controller)
+        self._next_poll_times[controller] = time.monotonic() + controller.poll_interval
+        self._schedule_next_cycle()
+
+    async def _run_cycle(self, _time: datetime) -> None:
+        self._cancel_next_cycle = None
+        self._is_polling = True
+        try:
+            now = time.monotonic()
+            due_controllers = [x for x in self._controllers if self._next_poll_times[x] <= now]
+            if due_controllers:
+                offset = self._num_cycles % len(due_controllers)
+                due_controllers = due_controllers[offset:] + due_controllers[:offset]
+                self._num_cycles += 1
+
+            for controller in due_controllers:
+                if self._is_stopped:
+                    return
+                start = time.monotonic()
+                try:
+                    await controller.poll()
+                except Exception:
+                    # Don't let one inverter stop the others from being polled
+                    _LOGGER.exception("Unexpected error when polling %s", controller)
+                self._next_poll_times[controller] = start + controller.poll_interval
+        finally:
+            self._is_polling = False
+            self._schedule_next_cycle()
+
+    def _schedule_next_cycle(self) -> None:
+        # If we're part-way through a cycle, this will be called at the end of it
+        if self._is_stopped or self._is_polling:
+            return
+
+        if self._cancel_next_cycle is not None:
+            self._cancel_next_cycle()
+            self._cancel_next_cycle = None
+
+        if self._next_poll_times:
+            delay = max(min(self._next_poll_times.values()) - time.monotonic(), 0)
+            self._cancel_next_cycle = async_call_later(self._hass, delay, self._run_cycle)
+
+    def _stop(self) -> None:
+        _LOGGER.debug("Stopping polling of %s", self._client)
+        self._is_stopped = True
+        if self._cancel_next_cycle is not None:
+            self._cancel_next_cycle()
+            self._cancel_next_cycle = None
@@ -0,0 +1,44 @@
+"""Register read responses which keep the raw register bytes, rather than decoding them into a list of ints"""
+import struct
+
+from pymodbus.factory import ClientDecoder
+from pymodbus.register_read_message import ReadHoldingRegistersResponse
+from pymodbus.register_read_message import ReadInputRegistersResponse
+
+
+class _RawRegistersResponseMixin:
+    """
+    Replaces the decoding of a register read response.
+
+    pymodbus unpacks each register into a list. Instead, we keep a memoryview onto the register bytes in the received
+    frame (big-endian, 2 bytes per register), which ModbusController can store without building any intermediate lists.
+    .registers still works, decoding on demand, for callers which want a list.
+    """
+
+    payload: memoryview
+
+    def decode(self, data: bytes) -> None:
+        byte_count = data[0]
+        self.payload = memoryview(data)[1 : 1 + byte_count]
+
+    @property
+    def registers(self) -> list[int]:
+        return list(struct.unpack(f">{len(self.payload) // 2}H", self.payload))
+
+    @registers.setter
+    def registers(self, values: list[int]) -> None:
+        self.payload = memoryview(struct.pack(f">{len(values)}H", *values))
+
+
+class RawReadHoldingRegistersResponse(_RawRegistersResponseMixin, ReadHoldingRegistersResponse):
+    """ReadHoldingRegistersResponse which keeps the raw register bytes"""
+
+
+class RawReadInputRegistersResponse(_RawRegistersResponseMixin, ReadInputRegistersResponse):
+    """ReadInputRegistersResponse which keeps the raw register bytes"""
+
+
+def register_raw_responses(decoder: ClientDecoder) -> None:
+    """Make the given ClientDecoder create the Raw*Response types for register reads"""
+    decoder.register(RawReadHoldingRegistersResponse)
+    decoder.register(RawReadInputRegistersResponse)
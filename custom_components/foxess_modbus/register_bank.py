@@ -0,0 +1,177 @@
+"""Compact storage for the last-read values of registers"""
+import bisect
+import sys
+from array import array
+from typing import Iterable
+from typing import Sequence
+
+# Addresses which are closer together than this share a segment. The registers in the gap cost 2 bytes each, but
+# fewer segments means fewer slices per read
+_MAX_SEGMENT_GAP = 16
+
+
+class _Segment:
+    """
+    A contiguous range of registers.
+
+    Bit i of wanted / valid refers to register start + i. wanted is set for registers which someone is interested in;
+    valid is set for registers which have been read.
+    """
+
+    def __init__(self, start: int, length: int, wanted: int) -> None:
+        self.start = start
+        self.end = start + length  # Exclusive
+        self.values = array("H", bytes(2 * length))
+        self.wanted = wanted
+        self.valid = 0
+
+
+class RegisterBank:
+    """
+    Stores the last-read values of a set of wanted registers.
+
+    Registers are stored in array('H') segments, each covering a contiguous range of addresses, with bitmaps recording
+    which registers are wanted and which have been read. Writing a block of registers is a slice assignment per segment,
+    and finding which registers have changed compares the old and new values of the whole block at once. This means that
+    the cost of a poll scales with the number of blocks read, rather than the number of registers.
+    """
+
+    def __init__(self, addresses: Iterable[int] = ()) -> None:
+        self._segments: list[_Segment] = []
+        sorted_addresses = sorted(set(addresses))
+        run_start = 0
+        for i in range(1, len(sorted_addresses) + 1):
+            if i == len(sorted_addresses) or sorted_addresses[i] - sorted_addresses[i - 1] > _MAX_SEGMENT_GAP:
+                start = sorted_addresses[run_start]
+                wanted = 0
+                for address in sorted_addresses[run_start:i]:
+                    wanted |= 1 << (address - start)
+                self._segments.append(_Segment(start, sorted_addresses[i - 1] - start + 1, wanted))
+                run_start = i
+        self._segment_starts = [segment.start for segment in self._segments]
+        self._addresses = sorted_addresses
+
+    @property
+    def addresses(self) -> list[int]:
+        """The sorted list of wanted addresses"""
+        return self._addresses
+
+    def with_addresses(self, addresses: Iterable[int]) -> "RegisterBank":
+        """Create a new RegisterBank with the given wanted addresses, keeping any values which have been read"""
+        result = RegisterBank(addresses)
+        result.restore(self.snapshot())
+        return result
+
+    def __contains__(self, address: object) -> bool:
+        if not isinstance(address, int):
+            return False
+        segment = self._find_segment(address)
+        return segment is not None and bool(segment.wanted >> (address - segment.start) & 1)
+
+    def get(self, address: int) -> int | None:
+        """Fetch the value of the given register, or None if it isn't wanted or hasn't been read"""
+        segment = self._find_segment(address)
+        if segment is None:
+            return None
+        offset = address - segment.start
+        if not segment.valid >> offset & segment.wanted >> offset & 1:
+            return None
+        return segment.values[offset]
+
+    def snapshot(self) -> dict[int, int]:
+        """Fetch {address: value} for all wanted registers which have been read"""
+        result = {}
+        for segment in self._segments:
+            valid = segment.valid & segment.wanted
+            while valid:
+                offset = (valid & -valid).bit_length() - 1
+                valid &= valid - 1
+                result[segment.start + offset] = segment.values[offset]
+        return result
+
+    def restore(self, values: dict[int, int]) -> set[int]:
+        """
+        Fill in wanted registers which haven't been read yet from the given {address: value}. Registers which have
+        already been read are left alone.
+
+        :returns: The addresses which were filled in
+        """
+        restored_addresses = set()
+        for address, value in values.items():
+            segment = self._find_segment(address)
+            if segment is not None:
+                offset = address - segment.start
+                if (segment.wanted & ~segment.valid) >> offset & 1:
+                    segment.values[offset] = value
+                    segment.valid |= 1 << offset
+                    restored_addresses.add(address)
+        return restored_addresses
+
+    def write(self, start_address: int, values: Sequence[int]) -> set[int]:
+        """
+        Store values read from consecutive registers starting at start_address, ignoring registers which aren't wanted.
+
+        :returns: The wanted addresses whose values changed (or which hadn't been read before)
+        """
+        return self._write_array(start_address, array("H", values))
+
+    def write_raw(self, start_address: int, payload: bytes | memoryview) -> set[int]:
+        """
+        As write, but takes the raw register bytes from a Modbus response (big-endian, 2 bytes per register).
+
+        This unpacks straight into an array, without going through a list of ints.
+        """
+        values = array("H")
+        values.frombytes(payload)
+        if sys.byteorder == "little":
+            values.byteswap()
+        return self._write_array(start_address, values)
+
+    def _write_array(self, start_address: int, new_values: "array[int]") -> set[int]:
+        changed_addresses: set[int] = set()
+        end_address = start_address + len(new_values)
+
+        index = max(bisect.bisect_right(self._segment_starts, start_address) - 1, 0)
+        while index < len(self._segments) and self._segments[index].start < end_address:
+            segment = self._segments[index]
+            index += 1
+            overlap_start = max(start_address, segment.start)
+            overlap_end = min(end_address, segment.end)
+            if overlap_start >= overlap_end:
+                continue
+
+            offset, length = overlap_start - segment.start, overlap_end - overlap_start
+            range_mask = ((1 << length) - 1) << offset
+            wanted = segment.wanted & range_mask
+            if not wanted:
+                continue
+
+            # memoryviews, so that we don't copy either slice
+            old_slice = memoryview(segment.values)[offset : offset + length]
+            new_slice = memoryview(new_values)[overlap_start - start_address : overlap_end - start_address]
+            # Registers which haven't been read before count as changed
+            changed = wanted & ~segment.valid
+            if old_slice != new_slice:
+                # Find the registers which differ, by XORing the old and new values and looking for non-zero registers
+                diff = int.from_bytes(old_slice, "little") ^ int.from_bytes(new_slice, "little")
+                while diff:
+                    register = ((diff & -diff).bit_length() - 1) // 16
+                    diff &= ~(0xFFFF << (register * 16))
+                    changed |= 1 << (offset + register)
+                changed &= wanted
+                old_slice[:] = new_slice
+
+            segment.valid |= wanted
+            while changed:
+                bit = (changed & -changed).bit_length() - 1
+                changed &= changed - 1
+                changed_addresses.add(segment.start + bit)
+
+        return changed_addresses
+
+    def _find_segment(self, address: int) -> _Segment | None:
+        index = bisect.bisect_right(self._segment_starts, address) - 1
+        if index < 0:
+            return None
+        segment = self._segments[index]
+        return segment if address < segment.end else None
@@ -0,0 +1,112 @@
+"""Saves the last-read register values across restarts, so that entities have values straight away at startup"""
+import logging
+from datetime import datetime
+from datetime import timedelta
+from typing import Any
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Event
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt
+
+from .common.unload_controller import UnloadController
+from .const import DOMAIN
+from .const import HOST
+from .const import INVERTER_BASE
+from .const import INVERTER_CONN
+from .const import MODBUS_SLAVE
+from .const import MODBUS_TYPE
+from .modbus_controller import ModbusController
+
+_LOGGER = logging.getLogger(__name__)
+
+_STORAGE_VERSION = 1
+# As well as saving when HA stops, save this often, in case it doesn't stop cleanly
+_SAVE_INTERVAL = timedelta(minutes=10)
+# Don't restore snapshots older than this: the inverter's state will have moved on too far for them to be useful
+_MAX_SNAPSHOT_AGE = timedelta(hours=6)
+
+
+class RegisterSnapshotStore(UnloadController):
+    """
+    Persists the registers of each inverter in a config entry to HA storage, and restores them at startup.
+
+    Restored settings are shown until the first successful poll (see ModbusController.restore_registers). Each snapshot
+    records the inverter's connection details, and is only restored if they haven't changed.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        # [(inverter ID, inverter config, controller)]
+        inverters: list[tuple[str, dict[str, Any], ModbusController]],
+    ) -> None:
+        self._hass = hass
+        self._store = Store(hass, _STORAGE_VERSION, f"{DOMAIN}.{entry_id}.registers")
+        self._inverters = inverters
+        # Snapshots loaded at startup, which we keep saving until the controller has its own data
+        self._loaded_snapshots: dict[str, Any] = {}
+        # {inverter ID: controller.last_read_time} as of the last save
+        self._saved_read_times: dict[str, datetime | None] = {}
+
+        UnloadController.__init__(self)
+
+    async def async_restore(self) -> None:
+        """Restore any saved registers to the controllers, and start saving them"""
+        data = await self._store.async_load()
+        self._loaded_snapshots = data.get("inverters", {}) if data is not None else {}
+
+        now = dt.utcnow()
+        for inverter_id, inverter, controller in self._inverters:
+            snapshot = self._loaded_snapshots.get(inverter_id)
+            if snapshot is None or snapshot["source"] != _snapshot_source(inverter):
+                continue
+            saved_at = dt.parse_datetime(snapshot["saved_at"])
+            if saved_at is None or now - saved_at > _MAX_SNAPSHOT_AGE:
+                _LOGGER.debug(
+                    "Not restoring registers for inverter %s: snapshot from %s is too old", inverter_id, saved_at
+                )
+                continue
+            _LOGGER.debug("Restoring registers for inverter %s from %s", inverter_id, saved_at)
+            controller.restore_registers({int(address): value for address, value in snapshot["registers"].items()})
+
+        self._unload_listeners.append(async_track_time_interval(self._hass, self._save, _SAVE_INTERVAL))
+        self._unload_listeners.append(self._hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, self._save))
+        # Save one last time when the config entry is unloaded
+        self._unload_listeners.append(lambda: self._save(None))
+
+    def _save(self, _event: Event | Any) -> None:
+        # Don't rewrite the store if nothing has been read since last time, e.g. if the inverter is offline
+        if all(
+            controller.last_read_time == self._saved_read_times.get(inverter_id)
+            for inverter_id, _, controller in self._inverters
+        ):
+            return
+        # If HA is stopping, this is written just before it stops
+        self._store.async_delay_save(self._data_to_save)
+
+    def _data_to_save(self) -> dict[str, Any]:
+        inverters = {}
+        for inverter_id, inverter, controller in self._inverters:
+            registers = controller.registers_snapshot()
+            read_time = controller.last_read_time
+            self._saved_read_times[inverter_id] = read_time
+            if registers is not None and read_time is not None:
+                inverters[inverter_id] = {
+                    "source": _snapshot_source(inverter),
+                    # When the values were read, not when they were saved, so that stale values aren't restored
+                    "saved_at": read_time.isoformat(),
+                    "registers": {str(address): value for address, value in registers.items()},
+                }
+            elif inverter_id in self._loaded_snapshots:
+                # We haven't managed to read anything yet. Keep the previous snapshot
+                inverters[inverter_id] = self._loaded_snapshots[inverter_id]
+        return {"inverters": inverters}
+
+
+def _snapshot_source(inverter: dict[str, Any]) -> str:
+    """Identifies the inverter that a snapshot was taken from"""
+    return "/".join(str(inverter[key]) for key in [INVERTER_BASE, INVERTER_CONN, MODBUS_TYPE, HOST, MODBUS_SLAVE])
@@ -0,0 +1,32 @@
+"""Decides how to retry failed reads"""
+import random
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    How ModbusController retries a block of registers when reading it fails.
+
+    A failed read is retried straight away (after a short, jittered delay, so that we don't land in the same bit of
+    noise or contention as the failed request). If the block still fails, it's skipped for an exponentially increasing
+    number of polls, so that a block which consistently fails doesn't cost a timeout on every poll.
+    """
+
+    immediate_retries: int = 1
+    retry_delay: float = 0.05  # Seconds
+    retry_jitter: float = 0.05  # Seconds, added to retry_delay at random
+    max_skipped_polls: int = 16
+
+    def next_retry_delay(self) -> float:
+        """How long to wait before retrying a failed read, in seconds"""
+        return self.retry_delay + random.uniform(0, self.retry_jitter)  # noqa: S311
+
+    def polls_to_skip(self, consecutive_failures: int) -> int:
+        """How many polls to skip a block for, after it has failed on this many polls in a row"""
+        if consecutive_failures <= 1:
+            return 0
+        return min(1 << (consecutive_failures - 2), self.max_skipped_polls)
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
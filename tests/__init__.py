@@ -0,0 +1 @@
+"""Tests for foxess_modbus"""
@@ -0,0 +1,359 @@
+"""
+A local Modbus server which pretends to be one or more FoxESS inverters, for tests and benchmarks.
+
+The registers each simulated inverter exposes come from the same entity descriptions and invalid ranges that the
+integration uses, so reads which the integration makes against a real inverter also work here. Latency, jitter,
+dropped frames and the adapter's max_read limit can be configured, so that the real ModbusClient and
+ModbusController read paths can be exercised and timed without hardware.
+"""
+import asyncio
+import logging
+import os
+import random
+import struct
+import tty
+from dataclasses import dataclass
+from typing import Any
+from typing import cast
+from unittest.mock import MagicMock
+
+from homeassistant.components.binary_sensor import BinarySensorEntity
+from homeassistant.components.number import NumberEntity
+from homeassistant.components.select import SelectEntity
+from homeassistant.components.sensor import SensorEntity
+from pymodbus.utilities import computeCRC
+
+from custom_components.foxess_modbus.common.entity_controller import ModbusControllerEntity
+from custom_components.foxess_modbus.common.register_type import RegisterType
+from custom_components.foxess_modbus.const import AC1
+from custom_components.foxess_modbus.const import AIO_H1
+from custom_components.foxess_modbus.const import AIO_H3
+from custom_components.foxess_modbus.const import ENTITY_ID_PREFIX
+from custom_components.foxess_modbus.const import FRIENDLY_NAME
+from custom_components.foxess_modbus.const import H1
+from custom_components.foxess_modbus.const import H3
+from custom_components.foxess_modbus.const import INVERTER_BASE
+from custom_components.foxess_modbus.const import INVERTER_CONN
+from custom_components.foxess_modbus.const import INVERTER_MODEL
+from custom_components.foxess_modbus.const import KH
+from custom_components.foxess_modbus.const import RTU_OVER_TCP
+from custom_components.foxess_modbus.const import SERIAL
+from custom_components.foxess_modbus.const import TCP
+from custom_components.foxess_modbus.const import UDP
+from custom_components.foxess_modbus.inverter_profiles import INVERTER_PROFILES
+from custom_components.foxess_modbus.inverter_profiles import create_entities
+
+_LOGGER = logging.getLogger(__name__)
+
+_READ_HOLDING_REGISTERS = 0x03
+_READ_INPUT_REGISTERS = 0x04
+_WRITE_SINGLE_REGISTER = 0x06
+_WRITE_MULTIPLE_REGISTERS = 0x10
+
+_ILLEGAL_FUNCTION = 0x01
+_ILLEGAL_DATA_ADDRESS = 0x02
+_ILLEGAL_DATA_VALUE = 0x03
+
+_MODEL_START_ADDRESS = 30000
+_MODEL_LENGTH = 16
+# What each model reports at _MODEL_START_ADDRESS. The H3 really does start with a space
+_FULL_MODELS = {
+    H1: "H1-5.0-E",
+    AC1: "AC1-5.0-E",
+    AIO_H1: "AIO-H1-5.0",
+    KH: "KH10.5",
+    H3: " H3-10.0-E",
+    AIO_H3: "AIO-H3-10.0",
+}
+
+
+@dataclass
+class SimulatorBehaviour:
+    """How the simulated adapter and inverter behave"""
+
+    # Seconds between receiving a request and sending its response, on top of processing_time. Pipelined requests
+    # overlap this
+    latency: float = 0.0
+    # Up to this many seconds are added to latency, at random
+    jitter: float = 0.0
+    # Seconds which each request takes to process. Only one request is processed at a time, like an RS485 bus
+    processing_time: float = 0.0
+    # Fraction (0-1) of requests which are ignored, as if they were lost
+    drop_rate: float = 0.0
+    # Reads of more registers than this get an exception response
+    max_read: int = 125
+    # Each register which an entity uses reads as its set value plus or minus up to this much, at
+    # random, so that entities see changing values
+    noise: int = 0
+    # Seed for the random numbers behind jitter, drop_rate and noise, so that runs are repeatable
+    seed: int | None = 0
+
+
+class SimulatedInverter:
+    """The registers of a single simulated inverter"""
+
+    def __init__(self, model: str, connection_type: str, slave: int = 247) -> None:
+        profile = INVERTER_PROFILES[model].connection_types[connection_type]
+        self.model = model
+        self.connection_type = connection_type
+        self.slave = slave
+        self.register_type = profile.register_type
+        self._invalid_ranges = profile.invalid_register_ranges
+        # The addresses which the integration's entities use, with this model and connection type
+        self.addresses = _entity_addresses(model, connection_type)
+        # Registers which read as 0 unless they've been set. Everything outside of the invalid ranges can be read for
+        # the inverter's main register type, but only the model registers are available in the other type
+        self.registers: dict[RegisterType, dict[int, int]] = {RegisterType.INPUT: {}, RegisterType.HOLDING: {}}
+        full_model = _FULL_MODELS[model].ljust(_MODEL_LENGTH)
+        for i, char in enumerate(full_model):
+            self.registers[RegisterType.HOLDING][_MODEL_START_ADDRESS + i] = ord(char)
+
+    def set_registers(self, values: dict[int, int], register_type: RegisterType | None = None) -> None:
+        """Set the value of some registers. Defaults to the inverter's main register type"""
+        self.registers[register_type or self.register_type].update(values)
+
+    def read(self, register_type: RegisterType, start_address: int, count: int) -> list[int] | None:
+        """Read registers, returning None if any of them can't be read"""
+        registers = self.registers[register_type]
+        end_address = start_address + count - 1
+        if register_type == self.register_type:
+            if any(r[0] <= end_address and start_address <= r[1] for r in self._invalid_ranges):
+                return None
+            return [registers.get(address, 0) for address in range(start_address, end_address + 1)]
+        if any(address not in registers for address in range(start_address, end_address + 1)):
+            return None
+        return [registers[address] for address in range(start_address, end_address + 1)]
+
+    def write(self, start_address: int, values: list[int]) -> bool:
+        """Write holding registers, returning False if any of them can't be written"""
+        if (
+            self.register_type != RegisterType.HOLDING
+            or self.read(RegisterType.HOLDING, start_address, len(values)) is None
+        ):
+            return False
+        self.set_registers(dict(enumerate(values, start=start_address)), RegisterType.HOLDING)
+        return True
+
+
+class ModbusSimulator:
+    """
+    Serves one or more SimulatedInverters (one per slave ID) on localhost over TCP, UDP or RTU-over-TCP, or as RTU over
+    a pseudo-terminal for SERIAL.
+
+    Requests to a slave which isn't simulated are ignored, as a real RS485 bus would. Over TCP and UDP each request is
+    handled independently, so pipelined requests overlap their latency. RTU has no transaction IDs, so RTU requests are
+    handled one at a time.
+    """
+
+    def __init__(
+        self,
+        protocol: str,
+        inverters: list[SimulatedInverter],
+        behaviour: SimulatorBehaviour | None = None,
+    ) -> None:
+        assert protocol in (TCP, UDP, RTU_OVER_TCP, SERIAL)
+        self.protocol = protocol
+        self.inverters = {inverter.slave: inverter for inverter in inverters}
+        self.behaviour = behaviour if behaviour is not None else SimulatorBehaviour()
+        self.host = "127.0.0.1"
+        # The TCP/UDP port, or the path of the pseudo-terminal for SERIAL
+        self.port: int | str = 0
+        self.num_requests = 0
+        self.num_dropped_requests = 0
+        self._random = random.Random(self.behaviour.seed)
+        self._bus_lock = asyncio.Lock()
+        self._server: asyncio.AbstractServer | None = None
+        self._udp_transport: asyncio.DatagramTransport | None = None
+        # (master, slave) file descriptors of the pseudo-terminal, for SERIAL
+        self._pty: tuple[int, int] | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    @property
+    def client_config(self) -> dict[str, Any]:
+        """Params to give to ModbusClient to connect to this simulator"""
+        if self.protocol == SERIAL:
+            return {"port": self.port, "baudrate": 9600}
+        return {"host": self.host, "port": self.port}
+
+    async def start(self) -> None:
+        """Start listening on a free port"""
+        if self.protocol == UDP:
+            transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+                lambda: _UdpProtocol(self), local_addr=(self.host, 0)
+            )
+            self._udp_transport = transport
+            self.port = transport.get_extra_info("sockname")[1]
+        elif self.protocol == SERIAL:
+            master, slave = os.openpty()
+            tty.setraw(master)
+            self._pty = (master, slave)
+            self.port = os.ttyname(slave)
+            reader = asyncio.StreamReader()
+            asyncio.get_running_loop().add_reader(master, lambda: reader.feed_data(os.read(master, 1024)))
+            self._spawn(self._serve_rtu(reader, lambda data: os.write(master, data)))
+        else:
+            self._server = await asyncio.start_server(self._handle_connection, self.host, 0)
+            self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """Stop listening, and cancel any responses which haven't been sent yet"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._udp_transport is not None:
+            self._udp_transport.close()
+            self._udp_transport = None
+        if self._pty is not None:
+            asyncio.get_running_loop().remove_reader(self._pty[0])
+            for fd in self._pty:
+                os.close(fd)
+            self._pty = None
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def __aenter__(self) -> "ModbusSimulator":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *_args: object) -> None:
+        await self.stop()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            if self.protocol == TCP:
+                while True:
+                    header = await reader.readexactly(7)
+                    transaction_id, _protocol_id, length, slave = struct.unpack(">HHHB", header)
+                    pdu = await reader.readexactly(length - 1)
+                    self._spawn(self._respond_tcp(writer.write, transaction_id, slave, pdu))
+            else:
+                await self._serve_rtu(reader, writer.write)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _serve_rtu(self, reader: asyncio.StreamReader, write: Any) -> None:
+        while True:
+            frame = await _read_rtu_frame(reader)
+            if frame is not None:
+                await self._respond_rtu(write, frame)
+
+    def handle_datagram(self, data: bytes, write: Any) -> None:
+        """Handle a Modbus UDP datagram, sending any response with write"""
+        if len(data) < 8:
+            return
+        transaction_id, _protocol_id, _length, slave = struct.unpack(">HHHB", data[:7])
+        self._spawn(self._respond_tcp(write, transaction_id, slave, data[7:]))
+
+    def _spawn(self, coro: Any) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _respond_tcp(self, write: Any, transaction_id: int, slave: int, pdu: bytes) -> None:
+        response = await self._process(slave, pdu)
+        if response is not None:
+            write(struct.pack(">HHHB", transaction_id, 0, len(response) + 1, slave) + response)
+
+    async def _respond_rtu(self, write: Any, frame: bytes) -> None:
+        response = await self._process(frame[0], frame[1:-2])
+        if response is not None:
+            message = frame[:1] + response
+            write(message + struct.pack(">H", computeCRC(message)))
+
+    async def _process(self, slave: int, pdu: bytes) -> bytes | None:
+        """Handle a request PDU, returning the response PDU, or None if there's no response"""
+        self.num_requests += 1
+        inverter = self.inverters.get(slave)
+        if inverter is None or self._random.random() < self.behaviour.drop_rate:
+            self.num_dropped_requests += 1
+            return None
+
+        async with self._bus_lock:
+            if self.behaviour.processing_time > 0:
+                await asyncio.sleep(self.behaviour.processing_time)
+            response = self._handle_pdu(inverter, pdu)
+
+        delay = self.behaviour.latency + self._random.uniform(0, self.behaviour.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return response
+
+    def _handle_pdu(self, inverter: SimulatedInverter, pdu: bytes) -> bytes:
+        function_code = pdu[0]
+        if function_code in (_READ_HOLDING_REGISTERS, _READ_INPUT_REGISTERS):
+            start_address, count = struct.unpack(">HH", pdu[1:5])
+            if count > self.behaviour.max_read:
+                return bytes([function_code | 0x80, _ILLEGAL_DATA_VALUE])
+            register_type = RegisterType.HOLDING if function_code == _READ_HOLDING_REGISTERS else RegisterType.INPUT
+            values = inverter.read(register_type, start_address, count)
+            if values is None:
+                return bytes([function_code | 0x80, _ILLEGAL_DATA_ADDRESS])
+            noise = self.behaviour.noise
+            if noise > 0 and register_type == inverter.register_type:
+                values = [
+                    (x + self._random.randint(-noise, noise)) & 0xFFFF if address in inverter.addresses else x
+                    for address, x in enumerate(values, start=start_address)
+                ]
+            return bytes([function_code, count * 2]) + struct.pack(f">{count}H", *values)
+        if function_code == _WRITE_SINGLE_REGISTER:
+            address, value = struct.unpack(">HH", pdu[1:5])
+            if not inverter.write(address, [value]):
+                return bytes([function_code | 0x80, _ILLEGAL_DATA_ADDRESS])
+            return pdu[:5]
+        if function_code == _WRITE_MULTIPLE_REGISTERS:
+            start_address, count = struct.unpack(">HH", pdu[1:5])
+            values = list(struct.unpack(f">{count}H", pdu[6 : 6 + count * 2]))
+            if not inverter.write(start_address, values):
+                return bytes([function_code | 0x80, _ILLEGAL_DATA_ADDRESS])
+            return pdu[:5]
+        return bytes([function_code | 0x80, _ILLEGAL_FUNCTION])
+
+
+class _UdpProtocol(asyncio.DatagramProtocol):
+    def __init__(self, simulator: ModbusSimulator) -> None:
+        self._simulator = simulator
+        self._transport: asyncio.DatagramTransport | None = None
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self._transport = cast(asyncio.DatagramTransport, transport)
+
+    def datagram_received(self, data: bytes, addr: tuple[str | Any, int]) -> None:
+        transport = self._transport
+        assert transport is not None
+        self._simulator.handle_datagram(data, lambda response: transport.sendto(response, addr))
+
+
+async def _read_rtu_frame(reader: asyncio.StreamReader) -> bytes | None:
+    """Read an RTU request frame, returning None if its CRC is wrong (real devices ignore these)"""
+    header = await reader.readexactly(2)
+    if header[1] == _WRITE_MULTIPLE_REGISTERS:
+        body = await reader.readexactly(5)
+        body += await reader.readexactly(body[4] + 2)
+    else:
+        body = await reader.readexactly(6)
+    frame = header + body
+    if computeCRC(frame[:-2]) != struct.unpack(">H", frame[-2:])[0]:
+        _LOGGER.debug("Ignoring RTU frame with bad CRC: %s", frame.hex())
+        return None
+    return frame
+
+
+def _entity_addresses(model: str, connection_type: str) -> set[int]:
+    """The addresses used by all of the integration's entities, for the given model and connection type"""
+    inverter_config = {
+        INVERTER_BASE: model,
+        INVERTER_CONN: connection_type,
+        INVERTER_MODEL: model,
+        ENTITY_ID_PREFIX: "",
+        FRIENDLY_NAME: "",
+    }
+    addresses: set[int] = set()
+    for entity_type in [SensorEntity, BinarySensorEntity, SelectEntity, NumberEntity]:
+        for entity in create_entities(entity_type, MagicMock(), MagicMock(), inverter_config):
+            assert isinstance(entity, ModbusControllerEntity)
+            addresses.update(entity.addresses)
+    return addresses
@@ -0,0 +1,27 @@
+from custom_components.foxess_modbus.adaptive_poll_rate import AdaptivePollRate
+
+
+def test_fixed_interval_if_not_adaptive() -> None:
+    poll_rate = AdaptivePollRate(10, 10)
+    poll_rate.record_poll(20, succeeded=True)
+    poll_rate.record_poll(20, succeeded=False)
+
+    assert poll_rate.interval == 10
+
+
+def test_slows_down_if_polls_take_too_long() -> None:
+    poll_rate = AdaptivePollRate(2, 30)
+    poll_rate.record_poll(4, succeeded=True)
+
+    assert poll_rate.interval == 6
+
+
+def test_backs_off_after_failures_then_recovers() -> None:
+    poll_rate = AdaptivePollRate(2, 30)
+    for _ in range(10):
+        poll_rate.record_poll(1, succeeded=False)
+    assert poll_rate.interval == 30
+
+    for _ in range(100):
+        poll_rate.record_poll(1, succeeded=True)
+    assert poll_rate.interval == 2
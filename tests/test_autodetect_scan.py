@@ -0,0 +1,103 @@
+import asyncio
+import contextlib
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+from pymodbus.exceptions import ConnectionException
+
+from custom_components.foxess_modbus import autodetect_scan
+from custom_components.foxess_modbus.autodetect_scan import DetectedInverter
+from custom_components.foxess_modbus.autodetect_scan import scan_for_inverters
+from custom_components.foxess_modbus.common.exceptions import UnsupportedInverterError
+from custom_components.foxess_modbus.const import TCP
+from custom_components.foxess_modbus.const import UDP
+from custom_components.foxess_modbus.inverter_adapters import ADAPTERS
+from custom_components.foxess_modbus.modbus_controller import ModbusController
+
+
+class _FakeClient:
+    def __init__(self, _hass: Any, protocol: str, _adapter: Any, params: dict[str, Any], **kwargs: Any) -> None:
+        self.protocol = protocol
+        self.params = params
+        self.kwargs = kwargs
+        self.closed = False
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_scan_finds_inverters_one_probe_at_a_time(monkeypatch: pytest.MonkeyPatch) -> None:
+    clients: list[_FakeClient] = []
+    probes: list[tuple[str, int]] = []
+    in_flight = 0
+    max_in_flight = 0
+
+    def create_client(*args: Any, **kwargs: Any) -> _FakeClient:
+        client = _FakeClient(*args, **kwargs)
+        clients.append(client)
+        return client
+
+    async def read_model(client: _FakeClient, slave: int, _max_read: int) -> tuple[str, str]:
+        nonlocal in_flight, max_in_flight
+        probes.append((client.protocol, slave))
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        try:
+            await asyncio.sleep(0)
+            if (client.protocol, slave) in [(TCP, 3), (UDP, 247)]:
+                return "H1", "H1-5.0-E"
+            if slave == 2:
+                raise UnsupportedInverterError("X1")
+            raise ConnectionException("Timeout")
+        finally:
+            in_flight -= 1
+
+    monkeypatch.setattr(autodetect_scan, "ModbusClient", create_client)
+    monkeypatch.setattr(ModbusController, "read_model", read_model)
+
+    scan = scan_for_inverters(MagicMock(), ADAPTERS["elfin_ew11"], "192.168.1.1:502", [TCP, UDP], [247, 1, 2, 3])
+    inverters = [x async for x in scan]
+
+    assert inverters == [
+        DetectedInverter(UDP, 247, "H1", "H1-5.0-E"),
+        DetectedInverter(TCP, 3, "H1", "H1-5.0-E"),
+    ]
+    # Each slave is tried on every protocol in turn. Everything is on the same bus, so only one probe is in flight
+    assert probes[:4] == [(TCP, 247), (UDP, 247), (TCP, 1), (UDP, 1)]
+    assert max_in_flight == 1
+    # One connection per protocol, using the normal transport unless told otherwise
+    assert [x.protocol for x in clients] == [TCP, UDP]
+    assert all(x.kwargs == {"use_async_transport": False} for x in clients)
+    assert all(x.closed for x in clients)
+    assert clients[0].params == {"host": "192.168.1.1", "port": 502, "timeout": 0.75}
+
+
+@pytest.mark.asyncio
+async def test_scan_stops_when_closed(monkeypatch: pytest.MonkeyPatch) -> None:
+    clients: list[_FakeClient] = []
+    probes: list[tuple[str, int]] = []
+
+    def create_client(*args: Any, **kwargs: Any) -> _FakeClient:
+        client = _FakeClient(*args, **kwargs)
+        clients.append(client)
+        return client
+
+    async def read_model(client: _FakeClient, slave: int, _max_read: int) -> tuple[str, str]:
+        probes.append((client.protocol, slave))
+        return "H1", "H1-5.0-E"
+
+    monkeypatch.setattr(autodetect_scan, "ModbusClient", create_client)
+    monkeypatch.setattr(ModbusController, "read_model", read_model)
+
+    scan = scan_for_inverters(
+        MagicMock(), ADAPTERS["elfin_ew11"], "192.168.1.1:502", [UDP], [247, 1], use_async_transport=True
+    )
+    async with contextlib.aclosing(scan):
+        async for _ in scan:
+            break
+
+    assert probes == [(UDP, 247)]
+    assert clients[0].kwargs == {"use_async_transport": True}
+    assert clients[0].closed
@@ -0,0 +1,97 @@
+# ruff: noqa: SLF001
+import time
+
+import pytest
+
+from custom_components.foxess_modbus import circuit_breaker
+from custom_components.foxess_modbus.circuit_breaker import CircuitBreaker
+from custom_components.foxess_modbus.circuit_breaker import CircuitOpenError
+from custom_components.foxess_modbus.circuit_breaker import CircuitState
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture()
+def clock(monkeypatch: pytest.MonkeyPatch) -> _Clock:
+    clock = _Clock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    return clock
+
+
+def _state(breaker: CircuitBreaker) -> CircuitState:
+    # Stops mypy from narrowing breaker.state between assertions
+    return breaker.state
+
+
+def _fail(breaker: CircuitBreaker, clock: _Clock, count: int, interval: float) -> None:
+    for _ in range(count):
+        clock.now += interval
+        breaker.before_request()
+        breaker.record_result(succeeded=False)
+
+
+def test_opens_after_failing_for_long_enough(clock: _Clock) -> None:
+    breaker = CircuitBreaker()
+
+    # Lots of failures in quick succession aren't enough on their own
+    _fail(breaker, clock, 20, 0.1)
+    assert _state(breaker) == CircuitState.CLOSED
+
+    _fail(breaker, clock, 1, 30)
+    assert _state(breaker) == CircuitState.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+
+def test_interleaved_successes_keep_it_closed(clock: _Clock) -> None:
+    breaker = CircuitBreaker()
+    for _ in range(20):
+        _fail(breaker, clock, 5, 3)
+        breaker.record_result(succeeded=True)
+
+    assert _state(breaker) == CircuitState.CLOSED
+
+
+def test_probe_closes_or_backs_off(clock: _Clock) -> None:
+    breaker = CircuitBreaker()
+    _fail(breaker, clock, 5, 10)
+    assert _state(breaker) == CircuitState.OPEN
+
+    # One probe is allowed after the open duration, and it fails: we then wait twice as long
+    clock.now += circuit_breaker._MIN_OPEN_DURATION
+    breaker.before_request()
+    assert _state(breaker) == CircuitState.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+    breaker.record_result(succeeded=False)
+    assert _state(breaker) == CircuitState.OPEN
+
+    clock.now += circuit_breaker._MIN_OPEN_DURATION
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+    clock.now += circuit_breaker._MIN_OPEN_DURATION
+    breaker.before_request()
+    breaker.record_result(succeeded=True)
+    assert _state(breaker) == CircuitState.CLOSED
+    breaker.before_request()
+
+
+def test_cancelled_probe_lets_another_probe_through(clock: _Clock) -> None:
+    breaker = CircuitBreaker()
+    _fail(breaker, clock, 5, 10)
+
+    clock.now += circuit_breaker._MIN_OPEN_DURATION
+    breaker.before_request()
+    breaker.record_cancelled()
+    assert _state(breaker) == CircuitState.HALF_OPEN
+
+    breaker.before_request()
+    breaker.record_result(succeeded=True)
+    assert _state(breaker) == CircuitState.CLOSED
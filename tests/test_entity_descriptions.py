@@ -9,6 +9,7 @@ from pytest_homeassistant_custom_component.common import MockConfigEntry
 from custom_components.foxess_modbus.const import ENTITY_ID_PREFIX
 from custom_components.foxess_modbus.const import INVERTER_BASE
 from custom_components.foxess_modbus.const import INVERTER_CONN
+from custom_components.foxess_modbus.entities.modbus_lambda_sensor import ModbusLambdaSensor
 from custom_components.foxess_modbus.inverter_profiles import INVERTER_PROFILES
 from custom_components.foxess_modbus.inverter_profiles import create_entities
 
@@ -23,3 +24,30 @@ def test_creates_all_entities() -> None:
                 inverter_config = {INVERTER_BASE: profile.model, INVERTER_CONN: connection_type, ENTITY_ID_PREFIX: ""}
                 # Asserts if e.g. the ModbusAddressSpecs match
                 create_entities(entity_type, controller, config_entry, inverter_config)
+
+
+def test_indexed_creation_matches_full_creation() -> None:
+    controller = MagicMock()
+    config_entry = MockConfigEntry()
+
+    for profile in INVERTER_PROFILES.values():
+        for connection_type in profile.connection_types:
+            inverter_config = {INVERTER_BASE: profile.model, INVERTER_CONN: connection_type, ENTITY_ID_PREFIX: ""}
+            # The second call goes through the index built by the first
+            first = create_entities(SensorEntity, controller, config_entry, inverter_config)
+            second = create_entities(SensorEntity, controller, config_entry, inverter_config)
+            assert [x.entity_id for x in first] == [x.entity_id for x in second]
+
+
+def test_lambda_sensors_are_derived_from_sensors_of_the_same_inverter() -> None:
+    controller = MagicMock()
+    config_entry = MockConfigEntry()
+
+    for profile in INVERTER_PROFILES.values():
+        for connection_type in profile.connection_types:
+            inverter_config = {INVERTER_BASE: profile.model, INVERTER_CONN: connection_type, ENTITY_ID_PREFIX: ""}
+            entities = create_entities(SensorEntity, controller, config_entry, inverter_config)
+            for entity in entities:
+                if isinstance(entity, ModbusLambdaSensor):
+                    assert len(entity.sources) > 0
+                    assert all(source in entities for source in entity.sources)
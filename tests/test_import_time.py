@@ -0,0 +1,40 @@
+import subprocess
+import sys
+from pathlib import Path
+
+_PACKAGE = "custom_components.foxess_modbus"
+
+# Generous, so that this doesn't fail on a slow CI machine, but catches something like importing all of the entity
+# descriptions again
+_IMPORT_TIME_BUDGET_US = 200_000
+
+# Modules which should only be imported once a config entry is set up
+_DEFERRED_MODULES = ["pymodbus", f"{_PACKAGE}.entities", f"{_PACKAGE}.modbus_client"]
+
+
+def _import_times() -> dict[str, int]:
+    """Import the integration in a fresh interpreter, and return {module: self time in us}"""
+    args = [sys.executable, "-X", "importtime", "-c", f"import {_PACKAGE}"]
+    cwd = Path(__file__).parent.parent
+    result = subprocess.run(args, cwd=cwd, capture_output=True, text=True, check=True)  # noqa: S603
+    times = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_time, _, module = line[len("import time:") :].split("|")
+        times[module.strip()] = int(self_time)
+    return times
+
+
+def test_import_does_not_load_deferred_modules() -> None:
+    modules = _import_times()
+    assert _PACKAGE in modules
+    loaded = [x for x in modules if any(x == m or x.startswith(m + ".") for m in _DEFERRED_MODULES)]
+    assert loaded == []
+
+
+def test_import_time_budget() -> None:
+    modules = _import_times()
+    own_time = sum(time for module, time in modules.items() if module.startswith(_PACKAGE))
+    assert own_time < _IMPORT_TIME_BUDGET_US, f"Importing {_PACKAGE} took {own_time}us"
@@ -0,0 +1,81 @@
+# ruff: noqa: SLF001
+from typing import Any
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+from pymodbus.exceptions import ModbusIOException
+from pymodbus.pdu import ExceptionResponse
+
+from custom_components.foxess_modbus.const import TCP
+from custom_components.foxess_modbus.inter_frame_gap import InterFrameGap
+from custom_components.foxess_modbus.inter_frame_gap import rtu_inter_frame_gap
+from custom_components.foxess_modbus.inverter_adapters import ADAPTERS
+from custom_components.foxess_modbus.modbus_client import ModbusClient
+
+
+def test_rtu_inter_frame_gap() -> None:
+    assert rtu_inter_frame_gap(9600) == pytest.approx(0.004, abs=0.0001)
+    assert rtu_inter_frame_gap(115200) == 0.00175
+
+
+def test_gap_shrinks_while_requests_succeed() -> None:
+    gap = InterFrameGap(0.004, 0.03)
+    for _ in range(100):
+        gap.record_result(succeeded=True)
+
+    assert gap.delay == 0.004
+
+
+def test_gap_does_not_return_to_failing_value() -> None:
+    gap = InterFrameGap(0, 0.03)
+    for _ in range(20):
+        gap.record_result(succeeded=True)
+    assert gap.delay == pytest.approx(0.01)
+
+    gap.record_result(succeeded=False)
+    assert gap.delay == 0.03
+
+    for _ in range(100):
+        gap.record_result(succeeded=True)
+    assert gap.delay == pytest.approx(0.015)
+
+
+def test_failure_floor_decays_after_many_successes() -> None:
+    gap = InterFrameGap(0, 0.03)
+    for _ in range(20):
+        gap.record_result(succeeded=True)
+    gap.record_result(succeeded=False)
+
+    for _ in range(499):
+        gap.record_result(succeeded=True)
+    assert gap.delay == pytest.approx(0.015)
+    gap.record_result(succeeded=True)
+    assert gap.delay == pytest.approx(0.014)
+
+    # A failure resets the count
+    for _ in range(100):
+        gap.record_result(succeeded=True)
+    gap.record_result(succeeded=False)
+    for _ in range(499):
+        gap.record_result(succeeded=True)
+    assert gap.delay == pytest.approx(0.019)
+
+
+@pytest.mark.asyncio
+async def test_client_only_backs_off_after_transport_failures() -> None:
+    responses: list[Any] = []
+    hass = MagicMock()
+    hass.async_add_executor_job = AsyncMock(side_effect=lambda *_args: responses.pop(0))
+    client = ModbusClient(hass, TCP, ADAPTERS["direct"], {"host": "localhost", "port": 502})
+
+    with patch("asyncio.sleep", AsyncMock()):
+        # The inverter rejected the request, but the frame got through
+        responses.append(ExceptionResponse(0x04, 0x02))
+        await client._execute_request(MagicMock())
+        assert client._inter_frame_gap.delay == pytest.approx(0.029)
+
+        responses.append(ModbusIOException("No response"))
+        await client._execute_request(MagicMock())
+        assert client._inter_frame_gap.delay == 0.03
@@ -0,0 +1,42 @@
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+
+import pytest
+
+from custom_components.foxess_modbus.common.register_type import RegisterType
+from custom_components.foxess_modbus.inverter_profiles import InverterModelConnectionTypeProfile
+from custom_components.foxess_modbus.max_read_calibration import calibrate_max_read
+from custom_components.foxess_modbus.max_read_calibration import largest_reliable_max_read
+from custom_components.foxess_modbus.modbus_client import ModbusClientFailedError
+
+
+def _create_client(max_reliable_read: int) -> MagicMock:
+    async def read_registers(_start: int, num_registers: int, _register_type: RegisterType, _slave: int) -> list[int]:
+        if num_registers > max_reliable_read:
+            raise ModbusClientFailedError("Timed out", client, Exception())
+        return [0] * num_registers
+
+    client = MagicMock()
+    client.read_registers = AsyncMock(side_effect=read_registers)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_calibration_stops_at_first_unreliable_size() -> None:
+    profile = InverterModelConnectionTypeProfile("H1", "AUX", RegisterType.INPUT, [])
+
+    results = await calibrate_max_read(_create_client(32), 1, profile)
+
+    assert [result.num_registers for result in results] == [8, 16, 20, 32, 50]
+    assert not results[-1].is_reliable
+    assert largest_reliable_max_read(results) == 32
+
+
+@pytest.mark.asyncio
+async def test_calibration_does_not_read_invalid_ranges() -> None:
+    profile = InverterModelConnectionTypeProfile("H1", "AUX", RegisterType.INPUT, [(11096, 39999)])
+
+    results = await calibrate_max_read(_create_client(1000), 1, profile)
+
+    assert [result.num_registers for result in results] == [8, 16, 20, 32, 50, 64, 80]
+    assert largest_reliable_max_read(results) == 80
@@ -0,0 +1,366 @@
+# ruff: noqa: SLF001
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+
+import pytest
+
+from custom_components.foxess_modbus.common.entity_controller import ModbusControllerEntity
+from custom_components.foxess_modbus.common.poll_tier import PollTier
+from custom_components.foxess_modbus.common.register_type import RegisterType
+from custom_components.foxess_modbus.inverter_adapters import ReadCostModel
+from custom_components.foxess_modbus.inverter_profiles import InverterModelConnectionTypeProfile
+from custom_components.foxess_modbus.modbus_client import ModbusClientFailedError
+from custom_components.foxess_modbus.modbus_controller import ModbusController
+from custom_components.foxess_modbus.modbus_controller import _group_read_ranges
+from custom_components.foxess_modbus.retry_policy import RetryPolicy
+
+
+class _FakeEntity(ModbusControllerEntity):
+    def __init__(
+        self,
+        addresses: list[int],
+        poll_tier: PollTier = PollTier.NORMAL,
+        wants_unchanged_updates: bool = False,
+        consistency_group: str | None = None,
+        sources: list[ModbusControllerEntity] | None = None,
+    ) -> None:
+        self._addresses = addresses
+        self._sources = sources or []
+        self._consistency_group = consistency_group
+        self._poll_tier = poll_tier
+        self._wants_unchanged_updates = wants_unchanged_updates
+        self.num_updates = 0
+        self.update_order: list[int] = []
+
+    @property
+    def addresses(self) -> list[int]:
+        return self._addresses
+
+    @property
+    def poll_tier(self) -> PollTier:
+        return self._poll_tier
+
+    @property
+    def wants_unchanged_updates(self) -> bool:
+        return self._wants_unchanged_updates
+
+    @property
+    def consistency_group(self) -> str | None:
+        return self._consistency_group
+
+    @property
+    def sources(self) -> list[ModbusControllerEntity]:
+        return self._sources
+
+    def update_callback(self, _changed_addresses: set[int]) -> None:
+        self.num_updates += 1
+        _update_order.append(self)
+
+    def is_connected_changed_callback(self) -> None:
+        pass
+
+
+# The order in which _FakeEntities were updated
+_update_order: list[_FakeEntity] = []
+_DEFAULT_READ_COST_MODEL = ReadCostModel(request_overhead=0.1, register_cost=0.001)
+_ALL_POLL_TIERS = frozenset(PollTier)
+
+
+def _create_controller(
+    max_read: int,
+    invalid_register_ranges: list[tuple[int, int]],
+    read_cost_model: ReadCostModel = _DEFAULT_READ_COST_MODEL,
+    retry_policy: RetryPolicy | None = None,
+    max_poll_rate: int | None = None,
+) -> ModbusController:
+    profile = InverterModelConnectionTypeProfile("H1", "AUX", RegisterType.INPUT, invalid_register_ranges)
+    return ModbusController(
+        MagicMock(),
+        profile,
+        slave=1,
+        poll_rate=10,
+        max_poll_rate=max_poll_rate,
+        max_read=max_read,
+        read_cost_model=read_cost_model,
+        retry_policy=retry_policy if retry_policy is not None else RetryPolicy(retry_delay=0, retry_jitter=0),
+    )
+
+
+def test_read_ranges_merge_nearby_addresses() -> None:
+    controller = _create_controller(max_read=5, invalid_register_ranges=[])
+    controller.register_modbus_entity(_FakeEntity([1, 2, 3, 5, 6, 7, 9, 10]))
+
+    assert controller._get_read_ranges(_ALL_POLL_TIERS) == [(1, 5), (6, 5)]
+
+
+def test_read_ranges_do_not_span_invalid_ranges() -> None:
+    controller = _create_controller(max_read=10, invalid_register_ranges=[(3, 4)])
+    controller.register_modbus_entity(_FakeEntity([1, 2, 5, 6]))
+
+    assert controller._get_read_ranges(_ALL_POLL_TIERS) == [(1, 2), (5, 2)]
+
+
+def test_read_ranges_avoid_reading_unneeded_registers() -> None:
+    # Reading 1-5 then 6-9 would also take two reads, but reads 3 unneeded registers
+    controller = _create_controller(max_read=5, invalid_register_ranges=[])
+    controller.register_modbus_entity(_FakeEntity([1, 5, 6, 7, 8, 9]))
+
+    assert controller._get_read_ranges(_ALL_POLL_TIERS) == [(1, 1), (5, 5)]
+
+
+def test_read_ranges_split_large_gaps_if_registers_are_expensive() -> None:
+    controller = _create_controller(
+        max_read=100,
+        invalid_register_ranges=[],
+        read_cost_model=ReadCostModel(request_overhead=0.1, register_cost=0.01),
+    )
+    controller.register_modbus_entity(_FakeEntity([1, 2, 5, 30, 31]))
+
+    assert controller._get_read_ranges(_ALL_POLL_TIERS) == [(1, 5), (30, 2)]
+
+
+def test_read_ranges_are_cached_until_addresses_change() -> None:
+    controller = _create_controller(max_read=5, invalid_register_ranges=[])
+    entity_1 = _FakeEntity([1, 2])
+    entity_2 = _FakeEntity([20])
+    controller.register_modbus_entity(entity_1)
+
+    read_ranges = controller._get_read_ranges(_ALL_POLL_TIERS)
+    assert controller._get_read_ranges(_ALL_POLL_TIERS) is read_ranges
+
+    controller.register_modbus_entity(entity_2)
+    assert controller._get_read_ranges(_ALL_POLL_TIERS) == [(1, 2), (20, 1)]
+
+    controller.remove_modbus_entity(entity_1)
+    assert controller._get_read_ranges(_ALL_POLL_TIERS) == [(20, 1)]
+
+
+def test_poll_tiers_are_read_at_different_rates() -> None:
+    controller = _create_controller(max_read=5, invalid_register_ranges=[])
+    controller.register_modbus_entity(_FakeEntity([1], PollTier.FAST))
+    controller.register_modbus_entity(_FakeEntity([2], PollTier.NORMAL))
+    controller.register_modbus_entity(_FakeEntity([3], PollTier.SLOW))
+
+    # Everything is read on the first poll
+    assert controller._get_due_poll_tiers() == _ALL_POLL_TIERS
+    assert controller._get_read_ranges(controller._get_due_poll_tiers()) == [(1, 3)]
+
+    controller._num_successful_polls = 1
+    assert controller._get_due_poll_tiers() == {PollTier.FAST}
+    assert controller._get_read_ranges(controller._get_due_poll_tiers()) == [(1, 1)]
+
+    controller._num_successful_polls = 3
+    assert controller._get_read_ranges(controller._get_due_poll_tiers()) == [(1, 2)]
+
+
+def test_shared_address_uses_fastest_poll_tier() -> None:
+    controller = _create_controller(max_read=5, invalid_register_ranges=[])
+    fast_entity = _FakeEntity([1], PollTier.FAST)
+    controller.register_modbus_entity(_FakeEntity([1, 2], PollTier.SLOW))
+    controller.register_modbus_entity(fast_entity)
+
+    assert controller._get_read_ranges(frozenset({PollTier.FAST})) == [(1, 1)]
+
+    controller.remove_modbus_entity(fast_entity)
+    assert controller._get_read_ranges(frozenset({PollTier.FAST})) == []
+    # Changing the addresses means that everything is read on the next poll
+    assert controller._get_due_poll_tiers() == _ALL_POLL_TIERS
+
+
+def test_only_entities_using_changed_addresses_are_notified() -> None:
+    controller = _create_controller(max_read=5, invalid_register_ranges=[])
+    entity_1 = _FakeEntity([1, 2])
+    entity_2 = _FakeEntity([2, 3])
+    entity_3 = _FakeEntity([4])
+    filtered_entity = _FakeEntity([5], wants_unchanged_updates=True)
+    for entity in [entity_1, entity_2, entity_3, filtered_entity]:
+        controller.register_modbus_entity(entity)
+
+    controller._notify_update({1}, read_addresses=[1, 2, 3, 4])
+    assert [entity.num_updates for entity in [entity_1, entity_2, entity_3, filtered_entity]] == [1, 0, 0, 0]
+
+    controller._notify_update({2}, read_addresses=[1, 2, 3, 4, 5])
+    assert [entity.num_updates for entity in [entity_1, entity_2, entity_3, filtered_entity]] == [2, 1, 0, 1]
+
+    controller.remove_modbus_entity(entity_1)
+    controller._notify_update({1, 2})
+    assert [entity.num_updates for entity in [entity_1, entity_2, entity_3, filtered_entity]] == [2, 2, 0, 1]
+    assert 1 not in controller._registers
+
+
+def test_derived_entities_are_updated_once_after_their_sources() -> None:
+    controller = _create_controller(max_read=5, invalid_register_ranges=[])
+    source_1 = _FakeEntity([1])
+    source_2 = _FakeEntity([2])
+    derived = _FakeEntity([], sources=[source_1, source_2])
+    derived_from_derived = _FakeEntity([], sources=[derived])
+    # Register out of order, to check that the controller orders them
+    for entity in [derived_from_derived, derived, source_1, source_2]:
+        controller.register_modbus_entity(entity)
+
+    _update_order.clear()
+    controller._notify_update({1, 2})
+    assert _update_order[2:] == [derived, derived_from_derived]
+    assert [entity.num_updates for entity in [source_1, source_2, derived, derived_from_derived]] == [1, 1, 1, 1]
+
+    # Derived entities aren't updated if none of their sources were
+    controller._notify_update({3})
+    assert derived.num_updates == 1
+
+
+@pytest.mark.asyncio
+async def test_restored_settings_are_shown_until_first_poll() -> None:
+    controller = _create_controller(max_read=10, invalid_register_ranges=[])
+    controller.restore_registers({1: 10, 2: 20, 3: 30})
+    entity = _FakeEntity([1, 2], PollTier.SLOW)
+    fast_entity = _FakeEntity([3], PollTier.FAST)
+    controller.register_modbus_entity(entity)
+    controller.register_modbus_entity(fast_entity)
+
+    assert controller.is_showing_restored_data
+    assert (controller.read(1), controller.read(2), entity.num_updates) == (10, 20, 1)
+    # Quickly-changing values aren't restored, as they'd be out of date
+    assert (controller.read(3), fast_entity.num_updates) == (None, 0)
+    # There's nothing new to save yet
+    assert controller.registers_snapshot() is None
+    assert controller.last_read_time is None
+
+    controller._client = MagicMock(is_pipelined=False)
+    controller._client.read_registers_raw = AsyncMock(return_value=memoryview(b"\x00\x0a\x00\x15\x00\x1f"))
+    await controller.poll()
+
+    assert not controller.is_showing_restored_data
+    # Only the changed register is notified
+    assert (controller.read(1), controller.read(2), entity.num_updates) == (10, 21, 2)
+    assert (controller.read(3), fast_entity.num_updates) == (31, 1)
+    assert controller.registers_snapshot() == {1: 10, 2: 21, 3: 31}
+    assert controller.last_read_time is not None
+
+
+def test_group_read_ranges_joins_ranges_sharing_a_unit() -> None:
+    read_ranges = [(1, 5), (10, 5), (20, 5), (30, 5)]
+    groups = _group_read_ranges(read_ranges, [[1, 11], [21], [11, 12], [100]])
+    assert groups[0] == groups[1]
+    assert len({groups[0], groups[2], groups[3]}) == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_read_only_discards_its_consistency_group() -> None:
+    controller = _create_controller(max_read=1, invalid_register_ranges=[])
+    independent = _FakeEntity([1])
+    grouped_1 = _FakeEntity([10], consistency_group="group")
+    grouped_2 = _FakeEntity([20], consistency_group="group")
+    for entity in [independent, grouped_1, grouped_2]:
+        controller.register_modbus_entity(entity)
+
+    async def read_registers_raw(start_address: int, *_args: object) -> memoryview:
+        if start_address == 20:
+            raise ModbusClientFailedError("Failed", controller._client, None)
+        return memoryview(b"\x00\x01")
+
+    controller._client = MagicMock(is_pipelined=False)
+    controller._client.read_registers_raw = read_registers_raw
+    await controller.poll()
+
+    assert (controller.read(1), controller.read(10), controller.read(20)) == (1, None, None)
+    assert [entity.num_updates for entity in [independent, grouped_1, grouped_2]] == [1, 0, 0]
+    # The inverter is responding, even though the poll failed
+    assert controller._num_failed_poll_attempts == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_read_is_retried_immediately() -> None:
+    controller = _create_controller(max_read=1, invalid_register_ranges=[])
+    entity = _FakeEntity([1])
+    controller.register_modbus_entity(entity)
+
+    num_reads = 0
+
+    async def read_registers_raw(*_args: object) -> memoryview:
+        nonlocal num_reads
+        num_reads += 1
+        if num_reads == 1:
+            raise ModbusClientFailedError("Failed", controller._client, None)
+        return memoryview(b"\x00\x01")
+
+    controller._client = MagicMock(is_pipelined=False)
+    controller._client.read_registers_raw = read_registers_raw
+
+    assert (await controller._refresh()).complete
+    assert num_reads == 2
+    assert controller.read(1) == 1
+    assert (controller.poll_stats.num_requests, controller.poll_stats.num_retries) == (2, 1)
+
+
+@pytest.mark.asyncio
+async def test_block_which_keeps_failing_is_skipped_with_backoff() -> None:
+    controller = _create_controller(
+        max_read=1,
+        invalid_register_ranges=[],
+        retry_policy=RetryPolicy(immediate_retries=0, retry_delay=0, retry_jitter=0, max_skipped_polls=2),
+    )
+    controller.register_modbus_entity(_FakeEntity([1], PollTier.FAST))
+    controller.register_modbus_entity(_FakeEntity([10], PollTier.FAST))
+
+    reads: list[int] = []
+
+    async def read_registers_raw(start_address: int, *_args: object) -> memoryview:
+        reads.append(start_address)
+        if start_address == 10:
+            raise ModbusClientFailedError("Failed", controller._client, None)
+        return memoryview(b"\x00\x01")
+
+    controller._client = MagicMock(is_pipelined=False)
+    controller._client.read_registers_raw = read_registers_raw
+
+    polls_reading_10 = []
+    for poll in range(1, 11):
+        reads.clear()
+        await controller._refresh()
+        assert 1 in reads
+        if 10 in reads:
+            polls_reading_10.append(poll)
+
+    # Skip 0, then 1, then 2 (capped) polls
+    assert polls_reading_10 == [1, 2, 4, 7, 10]
+
+
+@pytest.mark.asyncio
+async def test_block_which_keeps_failing_does_not_hold_back_the_rest() -> None:
+    controller = _create_controller(
+        max_read=1,
+        invalid_register_ranges=[],
+        retry_policy=RetryPolicy(immediate_retries=0, retry_delay=0, retry_jitter=0, max_skipped_polls=2),
+        max_poll_rate=60,
+    )
+    controller.restore_registers({3: 30})
+    controller.register_modbus_entity(_FakeEntity([1], PollTier.FAST))
+    controller.register_modbus_entity(_FakeEntity([3], PollTier.SLOW))
+    controller.register_modbus_entity(_FakeEntity([20], PollTier.FAST))
+
+    reads: list[int] = []
+
+    async def read_registers_raw(start_address: int, *_args: object) -> memoryview:
+        reads.append(start_address)
+        if start_address == 20:
+            raise ModbusClientFailedError("Failed", controller._client, None)
+        return memoryview(b"\x00\x01")
+
+    controller._client = MagicMock(is_pipelined=False)
+    controller._client.read_registers_raw = read_registers_raw
+
+    polls_reading_3 = []
+    for poll in range(1, 21):
+        reads.clear()
+        await controller.poll()
+        if 3 in reads:
+            polls_reading_3.append(poll)
+
+    assert not controller.is_showing_restored_data
+    assert controller.registers_snapshot() == {1: 1, 3: 1}
+    # The first failure might be a one-off, so the SLOW tier is read again. After that, the block is left to the
+    # RetryPolicy, and the tiers move on as normal
+    assert polls_reading_3 == [1, 2]
+    assert controller._num_successful_polls == 19
+    # Nor does it stop the poll rate from recovering
+    assert controller.poll_interval == 10
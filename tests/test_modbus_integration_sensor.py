@@ -0,0 +1,63 @@
+# ruff: noqa: SLF001
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from homeassistant.components.sensor import SensorEntity
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.foxess_modbus.common.poll_tier import PollTier
+from custom_components.foxess_modbus.const import AUX
+from custom_components.foxess_modbus.const import ENTITY_ID_PREFIX
+from custom_components.foxess_modbus.const import H1
+from custom_components.foxess_modbus.const import INVERTER_BASE
+from custom_components.foxess_modbus.const import INVERTER_CONN
+from custom_components.foxess_modbus.entities.modbus_integration_sensor import ModbusIntegrationSensor
+from custom_components.foxess_modbus.inverter_profiles import create_entities
+
+
+def test_integrates_source_registers_on_each_poll(monkeypatch: pytest.MonkeyPatch) -> None:
+    registers: dict[int, int] = {}
+    now = 0.0
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    controller = MagicMock(is_showing_restored_data=False)
+    controller.read.side_effect = registers.get
+    inverter_config = {INVERTER_BASE: H1, INVERTER_CONN: AUX, ENTITY_ID_PREFIX: ""}
+    entities = create_entities(SensorEntity, controller, MockConfigEntry(), inverter_config)
+    pv1_energy = next(
+        x for x in entities if isinstance(x, ModbusIntegrationSensor) and x.entity_description.key == "pv1_energy_total"
+    )
+    pv1_energy.schedule_update_ha_state = MagicMock()  # type: ignore[method-assign]
+
+    # It samples PV1 Power's register whenever it's read
+    assert pv1_energy.addresses == [11002]
+    assert pv1_energy.poll_tier == PollTier.FAST
+    assert pv1_energy.wants_unchanged_updates
+
+    # Values restored from before a restart aren't sampled
+    registers[11002] = 1000
+    controller.is_showing_restored_data = True
+    pv1_energy.update_callback({11002})
+    controller.is_showing_restored_data = False
+
+    registers[11002] = 2000  # 2kW
+    pv1_energy.update_callback({11002})
+    assert pv1_energy.native_value is None
+
+    now = 1800.0
+    registers[11002] = 4000
+    pv1_energy.update_callback({11002})
+    assert pv1_energy.native_value == 1.0
+
+    now = 3600.0
+    pv1_energy.update_callback(set())
+    assert pv1_energy.native_value == 3.0
+
+    # Nothing is integrated while disconnected
+    pv1_energy.is_connected_changed_callback()
+    now = 7200.0
+    pv1_energy.update_callback(set())
+    now = 9000.0
+    pv1_energy.update_callback(set())
+    assert pv1_energy.native_value == 5.0
+    assert pv1_energy.extra_restore_state_data.as_dict() == {"total": 5.0}
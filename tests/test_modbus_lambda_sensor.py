@@ -0,0 +1,39 @@
+# ruff: noqa: SLF001
+from unittest.mock import MagicMock
+
+from homeassistant.components.sensor import SensorEntity
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.foxess_modbus.const import AUX
+from custom_components.foxess_modbus.const import ENTITY_ID_PREFIX
+from custom_components.foxess_modbus.const import H1
+from custom_components.foxess_modbus.const import INVERTER_BASE
+from custom_components.foxess_modbus.const import INVERTER_CONN
+from custom_components.foxess_modbus.entities.modbus_lambda_sensor import ModbusLambdaSensor
+from custom_components.foxess_modbus.inverter_profiles import create_entities
+
+
+def test_value_ignores_disabled_sources_and_is_unknown_if_any_source_is_unknown() -> None:
+    inverter_config = {INVERTER_BASE: H1, INVERTER_CONN: AUX, ENTITY_ID_PREFIX: ""}
+    entities = create_entities(SensorEntity, MagicMock(), MockConfigEntry(), inverter_config)
+    pv_power = next(
+        x for x in entities if isinstance(x, ModbusLambdaSensor) and x.entity_description.key == "pv_power_now"
+    )
+    pv_power.hass = MagicMock()
+    pv_power.schedule_update_ha_state = MagicMock()  # type: ignore[method-assign]
+    pv1_power, pv2_power = pv_power._sources
+
+    # PV2 is disabled, so was never added to HA
+    pv1_power.hass = MagicMock()
+    pv1_power._attr_native_value = 1.5
+    pv_power.update_callback(set())
+    assert pv_power.native_value == 1.5
+
+    pv2_power.hass = MagicMock()
+    pv_power.update_callback(set())
+    assert pv_power.native_value is None
+
+    pv2_power._attr_native_value = 0.5
+    pv_power.update_callback(set())
+    assert pv_power.native_value == 2.0
+    assert pv_power.schedule_update_ha_state.call_count == 3
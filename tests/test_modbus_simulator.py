@@ -0,0 +1,89 @@
+# ruff: noqa: SLF001
+from unittest.mock import MagicMock
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from custom_components.foxess_modbus.common.poll_tier import PollTier
+from custom_components.foxess_modbus.common.register_type import RegisterType
+from custom_components.foxess_modbus.const import AUX
+from custom_components.foxess_modbus.const import H1
+from custom_components.foxess_modbus.const import LAN
+from custom_components.foxess_modbus.const import RTU_OVER_TCP
+from custom_components.foxess_modbus.const import TCP
+from custom_components.foxess_modbus.const import UDP
+from custom_components.foxess_modbus.inverter_adapters import ADAPTERS
+from custom_components.foxess_modbus.inverter_profiles import INVERTER_PROFILES
+from custom_components.foxess_modbus.modbus_client import ModbusClient
+from custom_components.foxess_modbus.modbus_client import ModbusClientFailedError
+from custom_components.foxess_modbus.modbus_controller import ModbusController
+from tests.modbus_simulator import ModbusSimulator
+from tests.modbus_simulator import SimulatedInverter
+from tests.modbus_simulator import SimulatorBehaviour
+
+# The simulator listens on localhost
+pytestmark = pytest.mark.usefixtures("socket_enabled")
+
+
+def _create_client(hass: HomeAssistant, simulator: ModbusSimulator, use_async_transport: bool = True) -> ModbusClient:
+    config = {**simulator.client_config, "timeout": 0.5}
+    return ModbusClient(hass, simulator.protocol, ADAPTERS["network_other"], config, use_async_transport)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("protocol", "use_async_transport"), [(TCP, True), (TCP, False), (UDP, True), (RTU_OVER_TCP, True)]
+)
+async def test_reads_model_and_registers(hass: HomeAssistant, protocol: str, use_async_transport: bool) -> None:
+    inverter = SimulatedInverter(H1, AUX)
+    inverter.set_registers({11000: 1234})
+    async with ModbusSimulator(protocol, [inverter]) as simulator:
+        client = _create_client(hass, simulator, use_async_transport)
+        assert await ModbusController.read_model(client, 247, 8) == ("H1", "H1-5.0-E")
+        assert await client.read_registers(10999, 2, RegisterType.INPUT, 247) == [0, 1234]
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_controller_polls_entity_addresses(hass: HomeAssistant) -> None:
+    inverter = SimulatedInverter(H1, LAN)
+    inverter.set_registers({address: address % 100 for address in inverter.addresses})
+    async with ModbusSimulator(TCP, [inverter], SimulatorBehaviour(max_read=50)) as simulator:
+        client = _create_client(hass, simulator)
+        profile = INVERTER_PROFILES[H1].connection_types[LAN]
+        controller = ModbusController(client, profile, 247, 10, None, 50, ADAPTERS["direct"].read_cost_model)
+        for address in inverter.addresses:
+            entity = MagicMock(
+                addresses=[address], poll_tier=PollTier.NORMAL, consistency_group=None, wants_unchanged_updates=False
+            )
+            controller.register_modbus_entity(entity)
+
+        assert (await controller._refresh()).complete
+        assert [controller.read(address) for address in inverter.addresses] == [x % 100 for x in inverter.addresses]
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_enforces_invalid_ranges_and_max_read(hass: HomeAssistant) -> None:
+    async with ModbusSimulator(TCP, [SimulatedInverter(H1, AUX)], SimulatorBehaviour(max_read=10)) as simulator:
+        client = _create_client(hass, simulator)
+        with pytest.raises(ModbusClientFailedError):
+            await client.read_registers(11090, 10, RegisterType.INPUT, 247)
+        with pytest.raises(ModbusClientFailedError):
+            await client.read_registers(11000, 11, RegisterType.INPUT, 247)
+        # An unknown slave doesn't respond at all
+        with pytest.raises(ModbusClientFailedError):
+            await client.read_registers(11000, 1, RegisterType.INPUT, 1)
+        assert simulator.num_dropped_requests == 1
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_writes_holding_registers(hass: HomeAssistant) -> None:
+    inverter = SimulatedInverter(H1, LAN)
+    async with ModbusSimulator(RTU_OVER_TCP, [inverter]) as simulator:
+        client = _create_client(hass, simulator)
+        await client.write_registers(41001, [1, 2, 3], 247)
+        await client.write_registers(41010, [90], 247)
+        assert await client.read_registers(41001, 10, RegisterType.HOLDING, 247) == [1, 2, 3, 0, 0, 0, 0, 0, 0, 90]
+        await client.close()
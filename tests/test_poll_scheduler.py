@@ -0,0 +1,73 @@
+# ruff: noqa: SLF001
+from datetime import datetime
+from datetime import timezone
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.foxess_modbus.poll_scheduler import PollScheduler
+
+
+def _create_controller(name: str, poll_order: list[str]) -> MagicMock:
+    controller = MagicMock()
+    controller.poll_interval = 10
+    controller.poll = AsyncMock(side_effect=lambda: poll_order.append(name))
+    return controller
+
+
+@pytest.mark.asyncio
+async def test_due_controllers_are_polled_in_rotating_order() -> None:
+    poll_order: list[str] = []
+    with patch("custom_components.foxess_modbus.poll_scheduler.async_call_later") as async_call_later:
+        scheduler = PollScheduler(MagicMock(), MagicMock())
+        controllers = [_create_controller(name, poll_order) for name in ["a", "b", "c"]]
+        for controller in controllers:
+            scheduler.add_controller(controller)
+
+        for _ in range(3):
+            for controller in controllers:
+                scheduler._next_poll_times[controller] = 0
+            await scheduler._run_cycle(datetime.now(tz=timezone.utc))
+
+        assert poll_order == ["a", "b", "c", "b", "c", "a", "c", "a", "b"]
+        # The next cycle is scheduled for when the controllers are next due
+        assert async_call_later.call_args.args[1] == pytest.approx(10, abs=1)
+
+
+@pytest.mark.asyncio
+async def test_only_due_controllers_are_polled() -> None:
+    poll_order: list[str] = []
+    with patch("custom_components.foxess_modbus.poll_scheduler.async_call_later"):
+        scheduler = PollScheduler(MagicMock(), MagicMock())
+        due_controller = _create_controller("due", poll_order)
+        not_due_controller = _create_controller("not_due", poll_order)
+        scheduler.add_controller(due_controller)
+        scheduler.add_controller(not_due_controller)
+
+        scheduler._next_poll_times[due_controller] = 0
+        await scheduler._run_cycle(datetime.now(tz=timezone.utc))
+
+        assert poll_order == ["due"]
+
+
+@pytest.mark.asyncio
+async def test_failed_poll_does_not_stop_polling() -> None:
+    poll_order: list[str] = []
+    with patch("custom_components.foxess_modbus.poll_scheduler.async_call_later") as async_call_later:
+        scheduler = PollScheduler(MagicMock(), MagicMock())
+        failing_controller = _create_controller("failing", poll_order)
+        failing_controller.poll.side_effect = RuntimeError("Failed")
+        controller = _create_controller("ok", poll_order)
+        scheduler.add_controller(failing_controller)
+        scheduler.add_controller(controller)
+
+        scheduler._next_poll_times[failing_controller] = 0
+        scheduler._next_poll_times[controller] = 0
+        async_call_later.reset_mock()
+        await scheduler._run_cycle(datetime.now(tz=timezone.utc))
+
+        assert poll_order == ["ok"]
+        assert failing_controller.poll.await_count == 1
+        async_call_later.assert_called_once()
@@ -0,0 +1,37 @@
+import pytest
+
+from custom_components.foxess_modbus.common.poll_stats import LatencyHistogram
+from custom_components.foxess_modbus.common.poll_stats import PollStats
+
+
+def test_histogram_percentiles_use_bucket_bounds() -> None:
+    histogram = LatencyHistogram()
+    assert histogram.percentile(0.5) is None
+
+    for _ in range(90):
+        histogram.record(0.02)
+    for _ in range(10):
+        histogram.record(0.3)
+
+    assert histogram.percentile(0.5) == 0.025
+    assert histogram.percentile(0.95) == 0.3  # Capped at the max, rather than the bucket's bound of 0.5
+    assert histogram.mean == pytest.approx(0.048)
+    assert histogram.as_dict()["buckets"]["<=0.025s"] == 90
+
+
+def test_poll_counts_its_requests_and_notifies_listeners() -> None:
+    stats = PollStats()
+    notified = []
+    remove_listener = stats.add_listener(lambda: notified.append(stats.last_poll_num_requests))
+
+    stats.record_request(0.05, 10, succeeded=True)
+    stats.record_request(0.5, 10, succeeded=False)
+    stats.record_poll(0.6, failed=True, overran=False)
+    remove_listener()
+    stats.record_request(0.05, 5, succeeded=True)
+    stats.record_poll(0.05, failed=False, overran=False)
+
+    assert notified == [2]
+    assert stats.last_poll_num_requests == 1
+    assert (stats.num_requests, stats.num_failed_requests, stats.bytes_read) == (3, 1, 30)
+    assert (stats.num_polls, stats.num_failed_polls) == (2, 1)
@@ -0,0 +1,17 @@
+from pymodbus.factory import ClientDecoder
+from pymodbus.register_read_message import ReadHoldingRegistersResponse
+
+from custom_components.foxess_modbus.raw_register_responses import RawReadHoldingRegistersResponse
+from custom_components.foxess_modbus.raw_register_responses import register_raw_responses
+
+
+def test_decoder_keeps_raw_register_bytes() -> None:
+    decoder = ClientDecoder()
+    register_raw_responses(decoder)
+
+    # Function code 3, 4 bytes
+    response = decoder.decode(b"\x03\x04\x01\x02\xff\xfe")
+    assert isinstance(response, RawReadHoldingRegistersResponse)
+    assert isinstance(response, ReadHoldingRegistersResponse)
+    assert bytes(response.payload) == b"\x01\x02\xff\xfe"
+    assert response.registers == [0x0102, 0xFFFE]
@@ -0,0 +1,53 @@
+from custom_components.foxess_modbus.register_bank import RegisterBank
+
+
+def test_first_write_reports_all_wanted_addresses_as_changed() -> None:
+    bank = RegisterBank([1, 3, 100])
+    assert bank.get(1) is None
+
+    assert bank.write(0, [10, 11, 12, 13, 14]) == {1, 3}
+    assert bank.get(1) == 11
+    assert bank.get(3) == 13
+    # Addresses which aren't wanted aren't stored
+    assert bank.get(2) is None
+    assert 2 not in bank
+    assert bank.get(100) is None
+
+
+def test_only_changed_addresses_are_reported() -> None:
+    bank = RegisterBank([1, 2, 3, 40, 41])
+    bank.write(1, [1, 2, 3])
+    bank.write(40, [4, 5])
+
+    assert bank.write(1, [1, 2, 3]) == set()
+    assert bank.write(1, [1, 0xFFFF, 3]) == {2}
+    assert bank.get(2) == 0xFFFF
+    # A write spanning several segments
+    assert bank.write(1, [9] + [0] * 39 + [5]) == {1, 2, 3, 40}
+
+
+def test_with_addresses_keeps_read_values() -> None:
+    bank = RegisterBank([1, 2])
+    bank.write(1, [5, 6])
+
+    bank = bank.with_addresses([2, 3])
+    assert 1 not in bank
+    assert bank.get(2) == 6
+    assert bank.get(3) is None
+    assert bank.write(2, [6, 7]) == {3}
+
+
+def test_write_raw_decodes_big_endian_registers() -> None:
+    bank = RegisterBank([1, 2])
+    assert bank.write_raw(1, memoryview(b"\x01\x02\xff\xfe")) == {1, 2}
+    assert bank.get(1) == 0x0102
+    assert bank.get(2) == 0xFFFE
+    assert bank.write_raw(1, b"\x01\x02\x00\x00") == {2}
+
+
+def test_restore_only_fills_unread_wanted_registers() -> None:
+    bank = RegisterBank([1, 2, 3])
+    bank.write(1, [5])
+
+    assert bank.restore({1: 6, 2: 7, 4: 8}) == {2}
+    assert bank.snapshot() == {1: 5, 2: 7}
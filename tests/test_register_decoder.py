@@ -0,0 +1,27 @@
+from custom_components.foxess_modbus.entities.register_decoder import RegisterDecoder
+from custom_components.foxess_modbus.entities.validation import Max
+from custom_components.foxess_modbus.entities.validation import Min
+from custom_components.foxess_modbus.entities.validation import Range
+from custom_components.foxess_modbus.entities.validation import Time
+
+
+def test_decodes_signed_multi_register_values() -> None:
+    registers = {1: 0xFFFE, 2: 0xFFFF}
+    decoder = RegisterDecoder([1, 2], signed=True, scale=0.5, post_process=None, validators=[])
+    assert decoder.decode(registers.get) == (-2, -1.0)
+
+    decoder = RegisterDecoder([1, 2], signed=False, scale=None, post_process=lambda x: x + 1, validators=[])
+    assert decoder.decode(registers.get) == (0xFFFFFFFE, 0xFFFFFFFF)
+
+    decoder = RegisterDecoder([1, 3], signed=True, scale=None, post_process=None, validators=[])
+    assert decoder.decode(registers.get) is None
+
+
+def test_bounds_validators_are_merged() -> None:
+    decoder = RegisterDecoder([1], signed=True, scale=None, post_process=None, validators=[Range(0, 100), Min(10)])
+    assert [decoder.is_valid(x) for x in [5, 10, 100, 101]] == [False, True, True, False]
+
+    decoder = RegisterDecoder([1], signed=True, scale=None, post_process=None, validators=[Max(3000), Time()])
+    assert decoder.is_valid(0x0102)
+    assert not decoder.is_valid(0x0160)
+    assert not decoder.is_valid(3001)